@@ -1,11 +1,25 @@
 # Extensible AI agents library with LangChain and MCP
 
-from .agents import BaseAgent, SearchAgent, ChatAgent, AgentConfig, AgentResponse
+from .agents import BaseAgent, SearchAgent, ChatAgent, AgentConfig, AgentResponse, LLMCall
+from .cache import ResponseCache
+from .registry import AgentRegistry
+from .singleflight import SingleFlight
+from .memory import SessionStore
+from .limiter import ModelLimiter, Overloaded, PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
 
 __all__ = [
     "BaseAgent",
     "SearchAgent", 
     "ChatAgent",
     "AgentConfig",
-    "AgentResponse"
+    "AgentResponse",
+    "LLMCall",
+    "ResponseCache",
+    "AgentRegistry",
+    "SingleFlight",
+    "SessionStore",
+    "ModelLimiter",
+    "Overloaded",
+    "PRIORITY_INTERACTIVE",
+    "PRIORITY_BACKGROUND"
 ]
@@ -1,14 +1,23 @@
 # Extensible AI agents with LangChain and MCP support
 
-from typing import Dict, Any, Optional, List
+from typing import AsyncIterator, Awaitable, Callable, Dict, Any, NamedTuple, Optional, List
+import asyncio
+import contextlib
 import os
 import logging
+import time
+import httpx
 from dataclasses import dataclass
 from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.messages import AIMessage, ToolMessage
 from langchain_mcp_adapters.client import MultiServerMCPClient
 from pydantic import BaseModel
 
+from .cache import CachedResponse, ResponseCache, prompt_key
+from .limiter import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, ModelLimiter, Overloaded, backoff_delay, is_retryable
+from .memory import Session, SessionStore, fallback_summary, session_messages, summary_messages
+from .singleflight import SingleFlight
+
 logger = logging.getLogger(__name__)
 
 
@@ -18,6 +27,25 @@ class AgentConfig:
     api_base_url: str = None
     model_name: str = None
     api_key: str = None
+    # Response cache; ttl 0 disables it, similarity None keeps exact matches only
+    cache_ttl: float = None
+    cache_size: int = None
+    cache_similarity: Optional[float] = None
+    # Upstream admission control, shared per model by AgentRegistry; rate is requests/second, 0 = unlimited
+    max_concurrency: int = None
+    rate_limit: float = None
+    max_queue: int = None
+    max_retries: int = None
+    # MCP tools: schema refresh interval, schema load and per-call timeouts (seconds), model/tool round trips per answer
+    mcp_tools_refresh: float = None
+    mcp_load_timeout: float = None
+    tool_timeout: float = None
+    max_tool_rounds: int = None
+    # Conversation memory; session_ttl 0 disables it
+    session_ttl: float = None
+    max_sessions: int = None
+    session_max_messages: int = None
+    session_token_budget: int = None
     
     def __post_init__(self):
         # Load from env if not provided
@@ -28,6 +56,55 @@ class AgentConfig:
         if self.api_key is None:
             # LITELLM_AUTH_TOKEN for AI API
             self.api_key = os.getenv("LITELLM_AUTH_TOKEN", "dummy-key")
+        if self.cache_ttl is None:
+            self.cache_ttl = float(os.getenv("AGENT_CACHE_TTL", "3600"))
+        if self.cache_size is None:
+            self.cache_size = int(os.getenv("AGENT_CACHE_SIZE", "512"))
+        if self.cache_similarity is None and os.getenv("AGENT_CACHE_SIMILARITY"):
+            self.cache_similarity = float(os.getenv("AGENT_CACHE_SIMILARITY"))
+        if self.max_concurrency is None:
+            self.max_concurrency = int(os.getenv("AGENT_MAX_CONCURRENCY", "8"))
+        if self.rate_limit is None:
+            self.rate_limit = float(os.getenv("AGENT_RATE_LIMIT", "10"))
+        if self.max_queue is None:
+            self.max_queue = int(os.getenv("AGENT_MAX_QUEUE", "100"))
+        if self.max_retries is None:
+            self.max_retries = int(os.getenv("AGENT_MAX_RETRIES", "3"))
+        if self.mcp_tools_refresh is None:
+            self.mcp_tools_refresh = float(os.getenv("MCP_TOOLS_REFRESH", "600"))
+        if self.mcp_load_timeout is None:
+            self.mcp_load_timeout = float(os.getenv("MCP_LOAD_TIMEOUT", "10"))
+        if self.tool_timeout is None:
+            self.tool_timeout = float(os.getenv("MCP_TOOL_TIMEOUT", "20"))
+        if self.max_tool_rounds is None:
+            self.max_tool_rounds = int(os.getenv("AGENT_MAX_TOOL_ROUNDS", "4"))
+        if self.session_ttl is None:
+            self.session_ttl = float(os.getenv("AGENT_SESSION_TTL", "1800"))
+        if self.max_sessions is None:
+            self.max_sessions = int(os.getenv("AGENT_MAX_SESSIONS", "1000"))
+        if self.session_max_messages is None:
+            self.session_max_messages = int(os.getenv("AGENT_SESSION_MAX_MESSAGES", "40"))
+        if self.session_token_budget is None:
+            self.session_token_budget = int(os.getenv("AGENT_SESSION_TOKEN_BUDGET", "2000"))
+
+
+class LLMCall(NamedTuple):
+    # One upstream attempt, reported to the agent's observer; mode is "invoke" or "stream"
+    model: str
+    mode: str
+    seconds: float
+    outcome: str
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+
+LLMObserver = Callable[[LLMCall], None]
+
+
+def token_usage(message: Any) -> Dict[str, int]:
+    # LangChain's usage_metadata when the provider reports it
+    usage = getattr(message, "usage_metadata", None) or {}
+    return {"input_tokens": usage.get("input_tokens", 0), "output_tokens": usage.get("output_tokens", 0)}
 
 
 class AgentResponse(BaseModel):
@@ -41,60 +118,232 @@ class AgentResponse(BaseModel):
 class BaseAgent:
     # Base AI agent with LangChain and MCP support
     
-    def __init__(self, config: AgentConfig, system_prompt: str = "You are a helpful AI assistant."):
+    def __init__(self, config: AgentConfig, system_prompt: str = "You are a helpful AI assistant.",
+                 http_client: Optional[httpx.AsyncClient] = None):
         self.config = config
         self.system_prompt = system_prompt
         
-        # LangChain ChatOpenAI setup
+        # LangChain ChatOpenAI setup; a shared http_client pools connections across agents
         self.llm = ChatOpenAI(
             base_url=config.api_base_url,
             api_key=config.api_key,
-            model=config.model_name
+            model=config.model_name,
+            http_async_client=http_client,
+            # Retries happen in _call so backoff releases the limiter slot
+            max_retries=0,
+            # Streams end with a usage chunk, so token counts cover /chat/stream too
+            stream_usage=True
         )
+
+        # Set by AgentRegistry; None means calls go straight upstream
+        self.limiter: Optional[ModelLimiter] = None
+        # Set by AgentRegistry; told about every upstream attempt (latency, outcome, tokens)
+        self.observer: Optional[LLMObserver] = None
         
         # MCP client lazy init
         self.mcp_client: Optional[MultiServerMCPClient] = None
         self.mcp_tools = []
+        self._tools_loaded_at: Optional[float] = None
+        self._tools_lock = asyncio.Lock()
+
+        # Repeated questions are answered from memory instead of the remote model
+        self.cache: Optional[ResponseCache] = None
+        if config.cache_ttl > 0:
+            self.cache = ResponseCache(
+                maxsize=config.cache_size,
+                ttl=config.cache_ttl,
+                similarity_threshold=config.cache_similarity
+            )
+
+        # Identical prompts already in flight wait on the same upstream call
+        self.inflight = SingleFlight()
+
+        # Multi-turn history kept server-side, keyed by the client's session_id
+        self.sessions: Optional[SessionStore] = None
+        if config.session_ttl > 0:
+            self.sessions = SessionStore(
+                max_sessions=config.max_sessions,
+                ttl=config.session_ttl,
+                max_messages=config.session_max_messages,
+                token_budget=config.session_token_budget
+            )
+        self._background: set = set()
         
         logger.info(f"Initialized {self.__class__.__name__} with model {config.model_name}")
     
-    def setup_mcp(self, server_configs: List[Dict[str, str]]):
-        # Setup MCP servers
+    def setup_mcp(self, server_configs: Dict[str, Dict[str, Any]]):
+        # Setup MCP servers, keyed by server name
         try:
             self.mcp_client = MultiServerMCPClient(server_configs)
-            # Tools bound when needed
+            # Tools fetched by load_tools()
             self.mcp_tools = []
-            logger.info(f"MCP setup complete")
+            self._tools_loaded_at = None
+            logger.info("MCP setup complete")
         except Exception as e:
             logger.error(f"Failed to setup MCP: {e}")
             self.mcp_client = None
+
+    async def load_tools(self, force: bool = False) -> List[Any]:
+        # Tool schemas are cached and refreshed periodically; a failed refresh keeps the old list
+        if self.mcp_client is None:
+            return []
+        if not force and self._tools_fresh():
+            return self.mcp_tools
+        async with self._tools_lock:
+            if not force and self._tools_fresh():
+                return self.mcp_tools
+            try:
+                # Bounded so an unreachable MCP server can't hold up app startup or requests
+                self.mcp_tools = await asyncio.wait_for(self.mcp_client.get_tools(), self.config.mcp_load_timeout)
+                logger.info(f"Loaded {len(self.mcp_tools)} MCP tools")
+            except asyncio.TimeoutError:
+                logger.error(f"Timed out loading MCP tools after {self.config.mcp_load_timeout:.0f}s")
+            except Exception as e:
+                logger.error(f"Failed to load MCP tools: {e}")
+            # Failures also wait out the interval instead of retrying on every request
+            self._tools_loaded_at = time.monotonic()
+        return self.mcp_tools
+
+    def _tools_fresh(self) -> bool:
+        return (self._tools_loaded_at is not None
+                and time.monotonic() - self._tools_loaded_at < self.config.mcp_tools_refresh)
     
-    async def execute(self, prompt: str, use_tools: bool = True) -> AgentResponse:
+    def _use_cache(self, use_tools: bool, use_cache: Optional[bool]) -> bool:
+        # Tool calls fetch live data, so they skip the cache unless explicitly asked
+        if self.cache is None:
+            return False
+        if use_cache is None:
+            use_cache = not (use_tools and self.mcp_client)
+        if not use_cache:
+            self.cache.bypass()
+        return use_cache
+
+    def _cached(self, prompt: str) -> Optional[CachedResponse]:
+        return self.cache.get(self.system_prompt, self.config.model_name, prompt)
+
+    def _remember(self, prompt: str, content: str, metadata: Dict[str, Any]) -> None:
+        self.cache.set(self.system_prompt, self.config.model_name, prompt, CachedResponse(content, metadata))
+
+    def _slot(self, priority: int):
+        return self.limiter.slot(priority) if self.limiter else contextlib.nullcontext()
+
+    def _observe(self, mode: str, started: float, outcome: str, usage: Optional[Dict[str, int]] = None) -> None:
+        if self.observer is None:
+            return
+        try:
+            self.observer(LLMCall(self.config.model_name, mode, time.perf_counter() - started, outcome, **(usage or {})))
+        except Exception as e:
+            logger.warning(f"LLM observer failed: {e}")
+
+    async def _call(self, invoke: Callable[[], Awaitable[Any]], priority: int) -> Any:
+        # Each attempt takes its own slot, so backing off never holds capacity
+        for attempt in range(self.config.max_retries + 1):
+            try:
+                async with self._slot(priority):
+                    # Timed inside the slot so queueing shows up in the limiter, not here
+                    started = time.perf_counter()
+                    try:
+                        response = await invoke()
+                    except Exception:
+                        self._observe("invoke", started, "error")
+                        raise
+                    self._observe("invoke", started, "ok", token_usage(response))
+                    return response
+            except Exception as e:
+                if attempt == self.config.max_retries or not is_retryable(e):
+                    raise
+                delay = backoff_delay(attempt)
+                logger.warning(f"Retrying {self.config.model_name} in {delay:.2f}s after: {e}")
+                await asyncio.sleep(delay)
+
+    def _session(self, session_id: Optional[str]) -> Optional[Session]:
+        if session_id is None or self.sessions is None:
+            return None
+        return self.sessions.get(session_id)
+
+    def _record(self, session: Session, prompt: str, content: str) -> None:
+        session.add("user", prompt)
+        session.add("assistant", content)
+        # Summarize off the request path; one compaction per session at a time
+        if self.sessions.needs_compaction(session) and session.compaction is None:
+            session.compaction = asyncio.ensure_future(self._compact(session))
+            self._background.add(session.compaction)
+            session.compaction.add_done_callback(self._background.discard)
+
+    async def _compact(self, session: Session) -> None:
+        try:
+            turns = self.sessions.oldest_turns(session)
+            if not turns:
+                return
+            try:
+                response = await self._call(
+                    lambda: self.llm.ainvoke(summary_messages(session.summary, turns)), PRIORITY_BACKGROUND
+                )
+                summary = response.content
+            except Exception as e:
+                logger.warning(f"Session summary failed, truncating instead: {e}")
+                summary = fallback_summary(session.summary, turns, self.sessions.token_budget // 4)
+            session.summary = summary
+            session.drop_through(turns[-1].seq)
+            self.sessions.compactions += 1
+        finally:
+            session.compaction = None
+
+    async def execute(self, prompt: str, use_tools: bool = True, use_cache: Optional[bool] = None,
+                      priority: int = PRIORITY_INTERACTIVE, session_id: Optional[str] = None) -> AgentResponse:
+        # Execute agent with prompt; raises Overloaded when the model's queue is full
+        session = self._session(session_id)
+        if session is not None:
+            # Answers depend on the history, so sessions skip the cache and coalescing
+            response = await self._execute(prompt, use_tools, False, priority, session)
+            if response.success:
+                self._record(session, prompt, response.content)
+            return response
+
         # Execute agent with prompt
+        use_cache = self._use_cache(use_tools, use_cache)
+        if use_cache:
+            cached = self._cached(prompt)
+            if cached is not None:
+                return AgentResponse(success=True, content=cached.content, metadata={**cached.metadata, "cached": True})
+
+        key = f"{prompt_key(self.system_prompt, self.config.model_name, prompt)}:{bool(use_tools)}"
+        response, shared = await self.inflight.do(key, lambda: self._execute(prompt, use_tools, use_cache, priority))
+        if shared:
+            return response.model_copy(update={"metadata": {**response.metadata, "coalesced": True}})
+        return response
+
+    async def _execute(self, prompt: str, use_tools: bool, use_cache: bool, priority: int,
+                       session: Optional[Session] = None) -> AgentResponse:
         try:
-            messages = [
-                SystemMessage(content=self.system_prompt),
-                HumanMessage(content=prompt)
-            ]
+            messages = session_messages(session, self.system_prompt, prompt)
             
             # Use MCP tools if available
-            if use_tools and self.mcp_client and self.mcp_tools:
+            tools = await self.load_tools() if use_tools else []
+            tool_calls: List[str] = []
+            if tools:
                 # Agent with tools
-                agent_executor = self.llm.bind_tools(self.mcp_tools)
-                response = await agent_executor.ainvoke(messages)
+                response = await self._run_with_tools(messages, tools, tool_calls, priority)
             else:
                 # LLM without tools
-                response = await self.llm.ainvoke(messages)
+                response = await self._call(lambda: self.llm.ainvoke(messages), priority)
             
+            metadata = {
+                "model": self.config.model_name,
+                "tools_used": len(tool_calls),
+                "tool_calls": tool_calls
+            }
+            if use_cache:
+                self._remember(prompt, response.content, metadata)
+
             return AgentResponse(
                 success=True,
                 content=response.content,
-                metadata={
-                    "model": self.config.model_name,
-                    "tools_used": len(self.mcp_tools) if use_tools else 0
-                }
+                metadata={**metadata, "cached": False}
             )
             
+        except Overloaded:
+            raise
         except Exception as e:
             logger.error(f"Error executing agent: {e}")
             return AgentResponse(
@@ -103,21 +352,135 @@ class BaseAgent:
                 error=str(e)
             )
     
+    async def _run_with_tools(self, messages: List[Any], tools: List[Any], tool_calls: List[str],
+                              priority: int) -> AIMessage:
+        # Model asks for tools, tools run concurrently, results go back; until the model answers
+        agent_executor = self.llm.bind_tools(tools)
+        tools_by_name = {tool.name: tool for tool in tools}
+        for _ in range(self.config.max_tool_rounds):
+            response = await self._call(lambda: agent_executor.ainvoke(messages), priority)
+            if not response.tool_calls:
+                return response
+            messages.append(response)
+            messages.extend(await asyncio.gather(
+                *(self._run_tool(tools_by_name, call) for call in response.tool_calls)
+            ))
+            tool_calls.extend(call["name"] for call in response.tool_calls)
+        # Out of rounds: answer from what the tools returned so far
+        return await self._call(lambda: self.llm.ainvoke(messages), priority)
+
+    async def _run_tool(self, tools_by_name: Dict[str, Any], call: Dict[str, Any]) -> ToolMessage:
+        # Failures become tool output so one slow or broken tool doesn't sink the answer
+        tool = tools_by_name.get(call["name"])
+        if tool is None:
+            return ToolMessage(content=f"Unknown tool: {call['name']}", tool_call_id=call["id"], status="error")
+        try:
+            result = await asyncio.wait_for(tool.ainvoke(call), timeout=self.config.tool_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Tool {call['name']} timed out after {self.config.tool_timeout}s")
+            return ToolMessage(content=f"Tool {call['name']} timed out", tool_call_id=call["id"], status="error")
+        except Exception as e:
+            logger.error(f"Tool {call['name']} failed: {e}")
+            return ToolMessage(content=f"Tool {call['name']} failed: {e}", tool_call_id=call["id"], status="error")
+        if isinstance(result, ToolMessage):
+            return result
+        return ToolMessage(content=str(result), tool_call_id=call["id"])
+
+    async def stream(self, prompt: str, use_cache: Optional[bool] = None,
+                     priority: int = PRIORITY_INTERACTIVE, session_id: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        # Stream tokens as {"event": "token"} dicts, ending with one "done" or "error" event.
+        # Overloaded is raised before the first event so callers can still answer 503.
+        started = time.perf_counter()
+        first_token_at = None
+        chunks = 0
+
+        session = self._session(session_id)
+        use_cache = self._use_cache(False, use_cache) if session is None else False
+        cached = self._cached(prompt) if use_cache else None
+        if cached is not None:
+            latency = round((time.perf_counter() - started) * 1000, 1)
+            yield {"event": "token", "data": {"content": cached.content}}
+            yield {"event": "done", "data": {
+                **cached.metadata, "chunks": 1, "cached": True,
+                "time_to_first_token_ms": latency, "total_latency_ms": latency,
+            }}
+            return
+
+        content = []
+        try:
+            messages = session_messages(session, self.system_prompt, prompt)
+
+            for attempt in range(self.config.max_retries + 1):
+                try:
+                    async with self._slot(priority):
+                        attempt_started = time.perf_counter()
+                        usage = {"input_tokens": 0, "output_tokens": 0}
+                        try:
+                            async for chunk in self.llm.astream(messages):
+                                # Usage arrives on the last chunk when the provider sends it
+                                for key, count in token_usage(chunk).items():
+                                    usage[key] += count
+                                if not chunk.content:
+                                    continue
+                                if first_token_at is None:
+                                    first_token_at = time.perf_counter()
+                                chunks += 1
+                                content.append(chunk.content)
+                                yield {"event": "token", "data": {"content": chunk.content}}
+                        except Exception:
+                            self._observe("stream", attempt_started, "error")
+                            raise
+                        self._observe("stream", attempt_started, "ok", usage)
+                    break
+                except Exception as e:
+                    # Only retry while nothing has reached the client yet
+                    if chunks or attempt == self.config.max_retries or not is_retryable(e):
+                        raise
+                    await asyncio.sleep(backoff_delay(attempt))
+
+            finished = time.perf_counter()
+            if use_cache:
+                self._remember(prompt, "".join(content), {"model": self.config.model_name, "tools_used": 0})
+            if session is not None:
+                self._record(session, prompt, "".join(content))
+            yield {
+                "event": "done",
+                "data": {
+                    "model": self.config.model_name,
+                    "chunks": chunks,
+                    "cached": False,
+                    "time_to_first_token_ms": round((first_token_at - started) * 1000, 1) if first_token_at else None,
+                    "total_latency_ms": round((finished - started) * 1000, 1),
+                }
+            }
+
+        except Overloaded:
+            raise
+        except Exception as e:
+            logger.error(f"Error streaming agent: {e}")
+            yield {"event": "error", "data": {"error": str(e)}}
+
     def get_capabilities(self) -> List[str]:
         # Get agent capabilities
-        capabilities = ["text_generation", "conversation"]
+        capabilities = ["text_generation", "conversation", "streaming"]
+        if self.cache:
+            capabilities.append("response_cache")
         if self.mcp_client:
             capabilities.append("mcp_enabled")
+        if self.mcp_tools:
+            capabilities.append("tool_calling")
+        if self.sessions:
+            capabilities.append("conversation_memory")
         return capabilities
 
 
 class SearchAgent(BaseAgent):
     # Web search and research agent
     
-    def __init__(self, config: AgentConfig):
+    def __init__(self, config: AgentConfig, http_client: Optional[httpx.AsyncClient] = None):
         system_prompt = "Research assistant with web search tools. Use search for current info, cite sources."
         
-        super().__init__(config, system_prompt)
+        super().__init__(config, system_prompt, http_client)
         
         # Web search MCP setup
         self.setup_web_search_mcp()
@@ -126,11 +489,13 @@ class SearchAgent(BaseAgent):
         # Setup web search MCP with auth token
         mcp_token = os.getenv("CODEXHUB_MCP_AUTH_TOKEN")
         if mcp_token and mcp_token != "dummy-key":
-            server_configs = [{
-                "type": "http",
-                "url": "https://mcp.codexhub.ai/web/mcp",
-                "headers": {"x-team-key": mcp_token}
-            }]
+            server_configs = {
+                "web": {
+                    "transport": "streamable_http",
+                    "url": "https://mcp.codexhub.ai/web/mcp",
+                    "headers": {"x-team-key": mcp_token}
+                }
+            }
             self.setup_mcp(server_configs)
             logger.info("Web search MCP configured")
         else:
@@ -140,7 +505,7 @@ class SearchAgent(BaseAgent):
 class ChatAgent(BaseAgent):
     # General chat and assistance agent
     
-    def __init__(self, config: AgentConfig):
+    def __init__(self, config: AgentConfig, http_client: Optional[httpx.AsyncClient] = None):
         system_prompt = "Friendly conversational AI. Natural conversations, explanations, analysis. Helpful, harmless, honest."
         
-        super().__init__(config, system_prompt)
+        super().__init__(config, system_prompt, http_client)
@@ -0,0 +1,137 @@
+# Response cache for agent calls: exact prompt hashes plus an optional similarity tier
+
+import hashlib
+import math
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional
+
+_WORD = re.compile(r"\w+")
+
+# Dimensions of the hashed bag-of-words vectors used by the similarity tier
+EMBEDDING_DIMENSIONS = 1024
+
+
+def normalize_prompt(prompt: str) -> str:
+    # "What are your hours?" and "what are  your hours" share a key
+    text = unicodedata.normalize("NFKC", prompt).casefold()
+    return " ".join(text.split()).strip(" ?!.,;:")
+
+
+def prompt_key(system_prompt: str, model: str, prompt: str) -> str:
+    raw = "\x1f".join((system_prompt, model, normalize_prompt(prompt)))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def hashed_embedding(text: str, dimensions: int = EMBEDDING_DIMENSIONS) -> Dict[int, float]:
+    # Local feature-hashing embedding over words and word pairs; no model call needed
+    words = _WORD.findall(normalize_prompt(text))
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    vector: Dict[int, float] = {}
+    for feature in features:
+        digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+        bucket = int.from_bytes(digest[:4], "little") % dimensions
+        sign = 1.0 if digest[4] & 1 else -1.0
+        vector[bucket] = vector.get(bucket, 0.0) + sign
+    norm = math.sqrt(sum(v * v for v in vector.values()))
+    return {k: v / norm for k, v in vector.items()} if norm else {}
+
+
+def cosine(a: Dict[int, float], b: Dict[int, float]) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(k, 0.0) for k, v in a.items())
+
+
+class CachedResponse(NamedTuple):
+    content: str
+    metadata: Dict[str, Any]
+
+
+class _Entry(NamedTuple):
+    expires_at: float
+    scope: str
+    vector: Optional[Dict[int, float]]
+    response: CachedResponse
+
+
+class ResponseCache:
+    # LRU + TTL; similarity lookups only compare prompts with the same system prompt and model
+
+    def __init__(self, maxsize: int = 512, ttl: float = 3600.0, similarity_threshold: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    def get(self, system_prompt: str, model: str, prompt: str) -> Optional[CachedResponse]:
+        now = time.monotonic()
+        key = prompt_key(system_prompt, model, prompt)
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at > now:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.response
+        if entry is not None:
+            del self._entries[key]
+
+        if self.similarity_threshold:
+            match = self._most_similar(self._scope(system_prompt, model), hashed_embedding(prompt), now)
+            if match is not None:
+                self._entries.move_to_end(match)
+                self.similar_hits += 1
+                return self._entries[match].response
+
+        self.misses += 1
+        return None
+
+    def set(self, system_prompt: str, model: str, prompt: str, response: CachedResponse) -> None:
+        key = prompt_key(system_prompt, model, prompt)
+        vector = hashed_embedding(prompt) if self.similarity_threshold else None
+        self._entries[key] = _Entry(time.monotonic() + self.ttl, self._scope(system_prompt, model), vector, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def bypass(self) -> None:
+        self.bypassed += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.similar_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_ratio": round((self.hits + self.similar_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+    @staticmethod
+    def _scope(system_prompt: str, model: str) -> str:
+        return hashlib.sha256(f"{system_prompt}\x1f{model}".encode()).hexdigest()
+
+    def _most_similar(self, scope: str, vector: Dict[int, float], now: float) -> Optional[str]:
+        # Linear scan is fine at cache sizes in the hundreds; expired entries are dropped on the way
+        best_key, best_score = None, self.similarity_threshold
+        expired = []
+        for key, entry in self._entries.items():
+            if entry.expires_at <= now:
+                expired.append(key)
+            elif entry.scope == scope and entry.vector:
+                score = cosine(vector, entry.vector)
+                if score >= best_score:
+                    best_key, best_score = key, score
+        for key in expired:
+            del self._entries[key]
+        return best_key
@@ -0,0 +1,141 @@
+# Per-model admission control: concurrency slots, a token bucket and a bounded priority queue
+
+import asyncio
+import heapq
+import itertools
+import math
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Tuple
+
+import openai
+
+# Lower runs first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class Overloaded(Exception):
+    # Queue is full; callers should answer 503 with Retry-After
+
+    def __init__(self, retry_after: int):
+        self.retry_after = retry_after
+        super().__init__(f"LLM queue is full, retry after {retry_after}s")
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, openai.APIConnectionError):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code in RETRYABLE_STATUS
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 8.0) -> float:
+    # Full jitter keeps retries from a burst of failures from landing together
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class ModelLimiter:
+
+    def __init__(self, max_concurrency: int = 8, rate: float = 10.0, burst: int = None, max_queue: int = 100):
+        self.max_concurrency = max_concurrency
+        self.rate = rate
+        self.burst = (burst or max(1, math.ceil(rate))) if rate > 0 else 0
+        self.max_queue = max_queue
+        self.active = 0
+        self.tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._timer = None
+        self.admitted = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if self.rate > 0:
+            self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _can_start(self) -> bool:
+        self._refill()
+        return self.active < self.max_concurrency and (self.rate <= 0 or self.tokens >= 1)
+
+    def _admit(self) -> None:
+        self.active += 1
+        self.tokens -= 1
+        self.admitted += 1
+
+    def retry_after(self) -> int:
+        # Rough drain time for everything ahead of a new caller
+        if self.rate <= 0:
+            return 1
+        return max(1, math.ceil((len(self._waiters) + self.active) / self.rate))
+
+    async def acquire(self, priority: int = PRIORITY_INTERACTIVE) -> None:
+        if not self._waiters and self._can_start():
+            self._admit()
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise Overloaded(self.retry_after())
+
+        started = time.monotonic()
+        waiter = (priority, next(self._seq), asyncio.get_running_loop().create_future())
+        heapq.heappush(self._waiters, waiter)
+        self._dispatch()
+        try:
+            await waiter[2]
+        except asyncio.CancelledError:
+            if waiter[2].done() and not waiter[2].cancelled():
+                # Granted just as we were cancelled; hand the slot on
+                self.release()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+                heapq.heapify(self._waiters)
+            raise
+        self.wait_seconds += time.monotonic() - started
+
+    def release(self) -> None:
+        self.active -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_INTERACTIVE):
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._waiters and self._can_start():
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            self._admit()
+            future.set_result(None)
+        # Out of tokens with free slots: wake up when the next token lands
+        if self._waiters and self.active < self.max_concurrency and self.rate > 0:
+            delay = max(0.0, (1 - self.tokens) / self.rate)
+            self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+    def stats(self) -> Dict[str, Any]:
+        self._refill()
+        return {
+            "active": self.active,
+            "queued": len(self._waiters),
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "rate": self.rate,
+            "tokens": round(self.tokens, 2),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self.wait_seconds / self.admitted * 1000, 1) if self.admitted else 0.0,
+        }
@@ -0,0 +1,146 @@
+# Server-side conversation memory: bounded per-session history with summary compaction
+
+import itertools
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, NamedTuple, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token plus per-message overhead; close enough for budgeting
+    return len(text) // 4 + 4
+
+
+class Turn(NamedTuple):
+    seq: int
+    role: str
+    content: str
+    tokens: int
+
+
+class Session:
+
+    def __init__(self, session_id: str, max_messages: int):
+        self.id = session_id
+        self.summary = ""
+        # Ring buffer: compaction normally runs before it fills, maxlen is the hard cap
+        self.turns: Deque[Turn] = deque(maxlen=max_messages)
+        self.last_used = time.monotonic()
+        self.compaction = None
+        self._seq = itertools.count()
+
+    def add(self, role: str, content: str) -> None:
+        self.turns.append(Turn(next(self._seq), role, content, estimate_tokens(content)))
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.summary) + sum(turn.tokens for turn in self.turns)
+
+    def messages(self, system_prompt: str) -> List[BaseMessage]:
+        if self.summary:
+            system_prompt = f"{system_prompt}\n\nSummary of the conversation so far: {self.summary}"
+        messages: List[BaseMessage] = [SystemMessage(content=system_prompt)]
+        for turn in self.turns:
+            message_type = HumanMessage if turn.role == "user" else AIMessage
+            messages.append(message_type(content=turn.content))
+        return messages
+
+    def drop_through(self, seq: int) -> None:
+        while self.turns and self.turns[0].seq <= seq:
+            self.turns.popleft()
+
+
+class SessionStore:
+    # LRU + idle TTL over sessions; each session keeps recent turns verbatim and older ones as a summary
+
+    def __init__(self, max_sessions: int = 1000, ttl: float = 1800.0, max_messages: int = 40,
+                 token_budget: int = 2000):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_messages = max_messages
+        self.token_budget = token_budget
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self.expired = 0
+        self.evicted = 0
+        self.compactions = 0
+
+    def get(self, session_id: str) -> Session:
+        now = time.monotonic()
+        self._expire(now)
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = Session(session_id, self.max_messages)
+            self._sessions[session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evicted += 1
+        self._sessions.move_to_end(session_id)
+        session.last_used = now
+        return session
+
+    def drop(self, session_id: str) -> bool:
+        return self._sessions.pop(session_id, None) is not None
+
+    def _expire(self, now: float) -> None:
+        # Oldest-used first, so stop at the first live session
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.last_used <= self.ttl:
+                break
+            self._sessions.popitem(last=False)
+            self.expired += 1
+
+    def needs_compaction(self, session: Session) -> bool:
+        return session.tokens > self.token_budget or len(session.turns) >= self.max_messages
+
+    def oldest_turns(self, session: Session) -> List[Turn]:
+        # Oldest turns to fold into the summary, leaving about half the token budget and
+        # half the ring verbatim; the latest exchange is always kept
+        keep_tokens, keep_messages = self.token_budget // 2, self.max_messages // 2
+        turns = list(session.turns)
+        remaining = session.tokens
+        selected = []
+        for turn in turns[:-2]:
+            if remaining <= keep_tokens and len(turns) - len(selected) <= keep_messages:
+                break
+            selected.append(turn)
+            remaining -= turn.tokens
+        return selected
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "compactions": self.compactions,
+        }
+
+
+def transcript(turns: List[Turn]) -> str:
+    return "\n".join(f"{turn.role}: {turn.content}" for turn in turns)
+
+
+def fallback_summary(previous: str, turns: List[Turn], max_tokens: int) -> str:
+    # Used when the model can't summarize; keeps the most recent text that fits
+    text = f"{previous}\n{transcript(turns)}".strip()
+    max_chars = max_tokens * 4
+    return text[-max_chars:] if len(text) > max_chars else text
+
+
+def summary_messages(previous: str, turns: List[Turn]) -> List[BaseMessage]:
+    prompt = transcript(turns)
+    if previous:
+        prompt = f"Existing summary: {previous}\n\nNew messages:\n{prompt}"
+    return [
+        SystemMessage(content="Condense this conversation into a short summary. Keep names, preferences, "
+                              "order details, decisions and open questions. Reply with the summary only."),
+        HumanMessage(content=prompt),
+    ]
+
+
+def session_messages(session: Optional[Session], system_prompt: str, prompt: str) -> List[BaseMessage]:
+    base = session.messages(system_prompt) if session else [SystemMessage(content=system_prompt)]
+    return base + [HumanMessage(content=prompt)]
@@ -0,0 +1,100 @@
+# Shared agent instances for the lifetime of the app
+
+import asyncio
+import logging
+import os
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+from .agents import AgentConfig, BaseAgent, ChatAgent, LLMObserver, SearchAgent
+from .limiter import ModelLimiter
+
+logger = logging.getLogger(__name__)
+
+AgentFactory = Callable[[AgentConfig, httpx.AsyncClient], BaseAgent]
+
+DEFAULT_AGENTS: Dict[str, AgentFactory] = {
+    "chat": ChatAgent,
+    "search": SearchAgent,
+}
+
+
+class AgentRegistry:
+    # One agent per name, all sharing a pooled HTTP client; creation is serialized by a lock
+
+    def __init__(self, config: AgentConfig, factories: Optional[Dict[str, AgentFactory]] = None,
+                 observer: Optional[LLMObserver] = None):
+        self.config = config
+        self.factories = dict(factories or DEFAULT_AGENTS)
+        # Handed to every agent, e.g. to export LLM latency and token metrics
+        self.observer = observer
+        self.agents: Dict[str, BaseAgent] = {}
+        self.http_client: Optional[httpx.AsyncClient] = None
+        # One limiter per model, so agents sharing a model share its upstream budget
+        self.limiters: Dict[str, ModelLimiter] = {}
+        self._capabilities: Optional[Dict[str, List[str]]] = None
+        self._lock = asyncio.Lock()
+
+    def _client(self) -> httpx.AsyncClient:
+        if self.http_client is None:
+            max_connections = int(os.getenv("AGENT_HTTP_MAX_CONNECTIONS", "100"))
+            self.http_client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+                timeout=httpx.Timeout(float(os.getenv("AGENT_HTTP_TIMEOUT", "120")), connect=10.0)
+            )
+        return self.http_client
+
+    async def start(self) -> None:
+        # Build every agent up front so no request pays for construction
+        async with self._lock:
+            for name in self.factories:
+                self._build(name)
+            # Tool schemas are fetched once here, then refreshed on the agent's interval;
+            # a load that fails or times out leaves the agent without tools until then
+            await asyncio.gather(*(agent.load_tools() for agent in self.agents.values()))
+            self._capabilities = {name: agent.get_capabilities() for name, agent in self.agents.items()}
+        logger.info(f"Agent registry ready: {', '.join(self.agents)}")
+
+    def _build(self, name: str) -> BaseAgent:
+        agent = self.agents.get(name)
+        if agent is None:
+            agent = self.factories[name](self.config, self._client())
+            agent.limiter = self._limiter(agent.config)
+            agent.observer = self.observer
+            self.agents[name] = agent
+        return agent
+
+    def _limiter(self, config: AgentConfig) -> ModelLimiter:
+        limiter = self.limiters.get(config.model_name)
+        if limiter is None:
+            limiter = ModelLimiter(
+                max_concurrency=config.max_concurrency,
+                rate=config.rate_limit,
+                max_queue=config.max_queue
+            )
+            self.limiters[config.model_name] = limiter
+        return limiter
+
+    async def get(self, name: str) -> BaseAgent:
+        if name not in self.factories:
+            raise KeyError(name)
+        agent = self.agents.get(name)
+        if agent is not None:
+            return agent
+        # Started lazily (or start() failed): the lock stops concurrent first requests building twice
+        async with self._lock:
+            return self._build(name)
+
+    async def capabilities(self) -> Dict[str, List[str]]:
+        if self._capabilities is None:
+            await self.start()
+        return self._capabilities
+
+    async def close(self) -> None:
+        async with self._lock:
+            self.agents.clear()
+            self._capabilities = None
+            if self.http_client is not None:
+                await self.http_client.aclose()
+                self.http_client = None
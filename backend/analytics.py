@@ -0,0 +1,122 @@
+# Dashboard analytics: one aggregation per collection, collections queried concurrently
+
+import asyncio
+import heapq
+from typing import Any, Dict, List
+
+RECENT_ORDERS_LIMIT = 5
+PENDING_REVIEWS_LIMIT = 10
+
+
+def _count(facet: List[dict]) -> int:
+    # $count emits nothing for an empty match
+    return facet[0]["n"] if facet else 0
+
+
+PRODUCT_PIPELINE = [
+    {"$facet": {
+        "total": [{"$count": "n"}],
+        "available": [{"$match": {"available": True}}, {"$count": "n"}],
+    }}
+]
+
+ORDER_PIPELINE = [
+    {"$facet": {
+        "total": [{"$count": "n"}],
+        "pending": [{"$match": {"status": "pending"}}, {"$count": "n"}],
+        "recent": [
+            {"$sort": {"order_date": -1, "id": -1}},
+            {"$limit": RECENT_ORDERS_LIMIT},
+            {"$project": {"_id": 0}},
+        ],
+    }}
+]
+
+REVIEW_PIPELINE = [
+    {"$facet": {
+        "total": [{"$count": "n"}],
+        "approved": [{"$match": {"approved": True}}, {"$count": "n"}],
+        "pending": [
+            {"$match": {"approved": False}},
+            {"$sort": {"created_at": -1, "id": -1}},
+            {"$limit": PENDING_REVIEWS_LIMIT},
+            {"$project": {"_id": 0}},
+        ],
+    }}
+]
+
+
+async def _facet(collection, pipeline: List[dict]) -> Dict[str, Any]:
+    result = await collection.aggregate(pipeline).to_list(1)
+    return result[0]
+
+
+async def dashboard_from_mongo(db) -> Dict[str, Any]:
+    # Three round trips in parallel instead of eight in sequence
+    products, orders, reviews = await asyncio.gather(
+        _facet(db.products, PRODUCT_PIPELINE),
+        _facet(db.orders, ORDER_PIPELINE),
+        _facet(db.reviews, REVIEW_PIPELINE),
+    )
+    return {
+        "total_products": _count(products["total"]),
+        "available_products": _count(products["available"]),
+        "total_orders": _count(orders["total"]),
+        "pending_orders": _count(orders["pending"]),
+        "total_reviews": _count(reviews["total"]),
+        "approved_reviews": _count(reviews["approved"]),
+        "recent_orders": orders["recent"],
+        "pending_reviews": reviews["pending"],
+    }
+
+
+def _keep_top(heap: List[tuple], sort_value, doc: dict, size: int) -> None:
+    # Bounded min-heap of the newest docs seen so far; the cheap sort_value check
+    # rejects most docs before building the (sort_value, id) tuple key
+    if len(heap) < size:
+        heapq.heappush(heap, ((sort_value, doc["id"]), doc))
+    elif sort_value >= heap[0][0][0]:
+        key = (sort_value, doc["id"])
+        if key > heap[0][0]:
+            heapq.heapreplace(heap, (key, doc))
+
+
+def _newest_first(heap: List[tuple]) -> List[dict]:
+    return [doc for _, doc in sorted(heap, key=lambda e: e[0], reverse=True)]
+
+
+def dashboard_from_memory(products: List[dict], orders: List[dict], reviews: List[dict]) -> Dict[str, Any]:
+    # Single pass per list, same shape and ordering as the Mongo facets. Their $match is
+    # exact equality, so a doc without the flag counts in neither available nor pending.
+    available_products = 0
+    for p in products:
+        if p.get("available") is True:
+            available_products += 1
+
+    pending_orders = 0
+    recent = []
+    for o in orders:
+        if o.get("status") == "pending":
+            pending_orders += 1
+        _keep_top(recent, o["order_date"], o, RECENT_ORDERS_LIMIT)
+
+    approved_reviews = 0
+    pending = []
+    for r in reviews:
+        approved = r.get("approved")
+        if approved is True:
+            approved_reviews += 1
+        elif approved is False:
+            _keep_top(pending, r["created_at"], r, PENDING_REVIEWS_LIMIT)
+
+    return {
+        "total_products": len(products),
+        "available_products": available_products,
+        "total_orders": len(orders),
+        "pending_orders": pending_orders,
+        "total_reviews": len(reviews),
+        "approved_reviews": approved_reviews,
+        "recent_orders": _newest_first(recent),
+        "pending_reviews": _newest_first(pending),
+    }
+
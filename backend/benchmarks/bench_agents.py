@@ -0,0 +1,120 @@
+# Load test: /api/chat, /api/chat/stream and /api/search against the offline fake LLM
+#
+# Starts benchmarks/fake_llm.py on a free port (unless LITELLM_BASE_URL is set),
+# drives the app in-process on the in-memory store at several concurrency levels
+# and reports latency percentiles and throughput per route. Response caching is
+# off and every prompt is unique, so each request reaches the model.
+#
+#   python benchmarks/bench_agents.py
+#   BENCH_CONCURRENCY=1,16,64 AGENT_RATE_LIMIT=0 python benchmarks/bench_agents.py
+#   BENCH_API_URL=http://localhost:8001 python benchmarks/bench_agents.py   # a running server
+#
+# Fake model behaviour is configured with the FAKE_LLM_* variables (see fake_llm.py).
+
+import asyncio
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+
+# Add backend to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from fake_llm import serve_in_background
+
+CONCURRENCY = [int(c) for c in os.getenv("BENCH_CONCURRENCY", "1,8,32").split(",")]
+REQUESTS = int(os.getenv("BENCH_REQUESTS", "100"))
+ROUTES = os.getenv("BENCH_ROUTES", "chat,stream,search").split(",")
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return float("nan")
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def report(route, concurrency, timings, failures, elapsed):
+    timings = sorted(timings)
+    print(f"{route:<8} c={concurrency:<4} ok {len(timings):5d}  err {failures:4d}  "
+          f"p50 {percentile(timings, 0.50) * 1000:8.1f} ms  p95 {percentile(timings, 0.95) * 1000:8.1f} ms  "
+          f"p99 {percentile(timings, 0.99) * 1000:8.1f} ms  {len(timings) / elapsed:7.1f} req/s")
+
+
+async def call(client, route):
+    prompt = f"What should I bake today? ({uuid.uuid4().hex[:8]})"
+    if route == "search":
+        response = await client.post("/api/search", json={"query": prompt})
+        return response.status_code == 200 and response.json()["success"]
+    if route == "stream":
+        async with client.stream("POST", "/api/chat/stream", json={"message": prompt}) as response:
+            body = "".join([chunk async for chunk in response.aiter_text()])
+        return response.status_code == 200 and "event: done" in body
+    response = await client.post("/api/chat", json={"message": prompt})
+    return response.status_code == 200 and response.json()["success"]
+
+
+async def run_level(client, route, concurrency):
+    gate = asyncio.Semaphore(concurrency)
+    timings, failures = [], 0
+
+    async def one():
+        nonlocal failures
+        async with gate:
+            started = time.perf_counter()
+            try:
+                ok = await call(client, route)
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                timings.append(time.perf_counter() - started)
+            else:
+                failures += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(REQUESTS)))
+    report(route, concurrency, timings, failures, time.perf_counter() - started)
+
+
+async def main():
+    api_url = os.getenv("BENCH_API_URL")
+    if not api_url and not os.getenv("LITELLM_BASE_URL"):
+        os.environ["LITELLM_BASE_URL"] = serve_in_background()
+    os.environ.setdefault("AGENT_CACHE_TTL", "0")
+    os.environ.setdefault("LITELLM_AUTH_TOKEN", "bench")
+
+    if api_url:
+        client = httpx.AsyncClient(base_url=api_url, timeout=120)
+        shutdown = None
+    else:
+        import server
+        from storage import MemoryStorage
+
+        # .env may point MONGO_URL at a real database; startup reconciles counters,
+        # rebuilds ratings and creates indexes, so keep the in-process app off it
+        await server.storage.close()
+        server.storage = MemoryStorage(seed={"reviews": server.mock_reviews})
+        await server.startup_event()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://bench", timeout=120)
+        shutdown = server.shutdown_db_client
+
+    print(f"LLM: {os.getenv('LITELLM_BASE_URL', 'via ' + str(api_url))}  "
+          f"rate limit {os.getenv('AGENT_RATE_LIMIT', '10')}/s  max concurrency {os.getenv('AGENT_MAX_CONCURRENCY', '8')}  "
+          f"{REQUESTS} requests per level\n")
+    try:
+        for route in ROUTES:
+            for concurrency in CONCURRENCY:
+                await run_level(client, route, concurrency)
+            print()
+    finally:
+        await client.aclose()
+        if shutdown:
+            await shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
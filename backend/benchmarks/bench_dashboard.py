@@ -0,0 +1,150 @@
+# Benchmark: legacy sequential dashboard queries vs. $facet + asyncio.gather
+#
+# Seeds a scratch database (never DB_NAME) with 100k orders and times both
+# implementations. Without BENCH_MONGO_URL only the in-memory path is compared.
+#
+#   BENCH_MONGO_URL=mongodb://localhost:27017 python benchmarks/bench_dashboard.py
+
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add backend to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from analytics import dashboard_from_memory, dashboard_from_mongo
+
+ORDER_COUNT = int(os.getenv("BENCH_ORDERS", "100000"))
+PRODUCT_COUNT = 200
+REVIEW_COUNT = 5000
+RUNS = int(os.getenv("BENCH_RUNS", "20"))
+STATUSES = ["pending", "confirmed", "preparing", "ready", "delivered", "cancelled"]
+
+
+def seed_data():
+    rng = random.Random(42)
+    start = datetime(2023, 1, 1)
+    products = [
+        {"id": str(uuid.uuid4()), "name": f"Product {i}", "available": rng.random() > 0.2,
+         "created_at": start + timedelta(hours=i)}
+        for i in range(PRODUCT_COUNT)
+    ]
+    orders = [
+        {"id": str(uuid.uuid4()), "customer_name": f"Customer {i}", "customer_email": "c@example.com",
+         "customer_phone": "555-0100", "delivery_address": "1 Main St", "items": [],
+         "total_amount": round(rng.uniform(5, 120), 2), "status": rng.choice(STATUSES),
+         "order_date": start + timedelta(minutes=i)}
+        for i in range(ORDER_COUNT)
+    ]
+    reviews = [
+        {"id": str(uuid.uuid4()), "customer_name": f"Reviewer {i}", "rating": rng.randint(1, 5),
+         "comment": "Lovely", "approved": rng.random() > 0.3, "created_at": start + timedelta(minutes=7 * i)}
+        for i in range(REVIEW_COUNT)
+    ]
+    # Arrival order differs from order_date order in real data
+    rng.shuffle(orders)
+    rng.shuffle(reviews)
+    return products, orders, reviews
+
+
+async def legacy_dashboard_from_mongo(db):
+    # The pre-aggregation implementation: eight sequential round trips
+    total_products = await db.products.count_documents({})
+    available_products = await db.products.count_documents({"available": True})
+    total_orders = await db.orders.count_documents({})
+    pending_orders = await db.orders.count_documents({"status": "pending"})
+    total_reviews = await db.reviews.count_documents({})
+    approved_reviews = await db.reviews.count_documents({"approved": True})
+    recent_orders = await db.orders.find().sort("order_date", -1).limit(5).to_list(5)
+    pending_reviews = await db.reviews.find({"approved": False}).sort("created_at", -1).limit(10).to_list(10)
+    return (total_products, available_products, total_orders, pending_orders,
+            total_reviews, approved_reviews, recent_orders, pending_reviews)
+
+
+def legacy_dashboard_from_memory(products, orders, reviews):
+    # The pre-aggregation mock path: one list comprehension per metric
+    return (
+        len(products),
+        len([p for p in products if p.get("available", True)]),
+        len(orders),
+        len([o for o in orders if o.get("status") == "pending"]),
+        len(reviews),
+        len([r for r in reviews if r.get("approved", False)]),
+        sorted(orders, key=lambda o: o["order_date"], reverse=True)[:5],
+        sorted([r for r in reviews if not r.get("approved", False)], key=lambda r: r["created_at"], reverse=True)[:10],
+    )
+
+
+def report(label, timings):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{label:<28} median {statistics.median(timings) * 1000:8.2f} ms   p95 {p95 * 1000:8.2f} ms")
+
+
+async def time_async(fn, *args):
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        await fn(*args)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def time_sync(fn, *args):
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+async def bench_mongo(mongo_url, products, orders, reviews):
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from indexes import ensure_indexes
+
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[os.getenv("BENCH_DB_NAME", "bench_dashboard")]
+    try:
+        for name in ("products", "orders", "reviews"):
+            await db[name].drop()
+        await ensure_indexes(db)
+        await db.products.insert_many([dict(p) for p in products])
+        for i in range(0, len(orders), 10000):
+            await db.orders.insert_many([dict(o) for o in orders[i:i + 10000]])
+        await db.reviews.insert_many([dict(r) for r in reviews])
+
+        # Warm up caches and connection pool before timing
+        await legacy_dashboard_from_mongo(db)
+        await dashboard_from_mongo(db)
+
+        report("mongo legacy (8 sequential)", await time_async(legacy_dashboard_from_mongo, db))
+        report("mongo $facet + gather", await time_async(dashboard_from_mongo, db))
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+
+
+def main():
+    products, orders, reviews = seed_data()
+    print(f"Dataset: {len(products)} products, {len(orders)} orders, {len(reviews)} reviews, {RUNS} runs\n")
+
+    report("memory legacy (multi-pass)", time_sync(legacy_dashboard_from_memory, products, orders, reviews))
+    report("memory single pass", time_sync(dashboard_from_memory, products, orders, reviews))
+
+    mongo_url = os.getenv("BENCH_MONGO_URL")
+    if mongo_url:
+        asyncio.run(bench_mongo(mongo_url, products, orders, reviews))
+    else:
+        print("\nBENCH_MONGO_URL not set, skipping MongoDB comparison")
+
+
+if __name__ == "__main__":
+    main()
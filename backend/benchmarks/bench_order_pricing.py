@@ -0,0 +1,112 @@
+# Benchmark: server-side pricing for orders with 50+ line items
+#
+# Compares the legacy client-trusted float sum with catalog pricing from a warm
+# price index and from a cold index (one $in lookup per order).
+#
+#   python benchmarks/bench_order_pricing.py
+#   BENCH_MONGO_URL=mongodb://localhost:27017 python benchmarks/bench_order_pricing.py
+
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+# Add backend to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from pricing import PriceIndex, price_items, to_money
+from server import OrderCreate
+from storage import MemoryStorage
+
+PRODUCT_COUNT = 500
+LINE_ITEMS = int(os.getenv("BENCH_LINE_ITEMS", "60"))
+RUNS = int(os.getenv("BENCH_RUNS", "500"))
+
+
+def seed_products():
+    rng = random.Random(7)
+    return [
+        {"id": str(uuid.uuid4()), "name": f"Product {i}", "description": "", "price": round(rng.uniform(1, 60), 2),
+         "category": "cakes", "image_url": "", "available": True, "created_at": datetime(2024, 1, 1, 0, 0, i % 60)}
+        for i in range(PRODUCT_COUNT)
+    ]
+
+
+def make_order(products):
+    rng = random.Random(11)
+    picked = rng.sample(products, LINE_ITEMS)
+    return OrderCreate(
+        customer_name="Bench", customer_email="bench@example.com", customer_phone="555-0100",
+        delivery_address="1 Main St",
+        items=[{"product_id": p["id"], "product_name": p["name"], "price": p["price"], "quantity": rng.randint(1, 4)} for p in picked],
+    )
+
+
+def report(label, timings):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{label:<30} median {statistics.median(timings) * 1e6:9.1f} us   p95 {p95 * 1e6:9.1f} us")
+
+
+async def time_pricing(order, repository, index_factory):
+    timings = []
+    for _ in range(RUNS):
+        index = index_factory()
+        start = time.perf_counter()
+        entries = await index.resolve(repository, (item.product_id for item in order.items))
+        _, total = price_items(order.items, entries)
+        to_money(total)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+async def bench(repository, label, order):
+    warm = PriceIndex()
+    await warm.warm(repository)
+    report(f"{label} warm index", await time_pricing(order, repository, lambda: warm))
+    report(f"{label} cold index ($in)", await time_pricing(order, repository, PriceIndex))
+
+
+async def main():
+    products = seed_products()
+    order = make_order(products)
+    print(f"Order with {LINE_ITEMS} line items, {PRODUCT_COUNT} products in catalog, {RUNS} runs\n")
+
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        sum(item.price * item.quantity for item in order.items)
+        timings.append(time.perf_counter() - start)
+    report("legacy client-price float sum", timings)
+
+    await bench(MemoryStorage(seed={"products": products}).products, "memory", order)
+
+    mongo_url = os.getenv("BENCH_MONGO_URL")
+    if not mongo_url:
+        print("\nBENCH_MONGO_URL not set, skipping MongoDB comparison")
+        return
+
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from indexes import ensure_indexes
+    from storage import MongoStorage
+
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[os.getenv("BENCH_DB_NAME", "bench_order_pricing")]
+    try:
+        await db.products.drop()
+        await ensure_indexes(db)
+        await db.products.insert_many([dict(p) for p in products])
+        await bench(MongoStorage(db).products, "mongo", order)
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
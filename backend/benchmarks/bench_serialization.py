@@ -0,0 +1,148 @@
+# Benchmark: validated list responses vs. projected documents encoded with orjson
+#
+# Compares the previous GET /api/orders and GET /api/reviews handlers (model per
+# row, then FastAPI's response_model validate + serialize + json.dumps) with the
+# current ones, over the in-memory store so only the Python side is measured.
+# 1000 rows are fetched as pages of MAX_PAGE_SIZE, as clients do.
+#
+#   BENCH_ROWS=1000 BENCH_RUNS=30 python benchmarks/bench_serialization.py
+
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add backend to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+ROWS = int(os.getenv("BENCH_ROWS", "1000"))
+RUNS = int(os.getenv("BENCH_RUNS", "30"))
+STATUSES = ["pending", "confirmed", "preparing", "ready", "delivered", "cancelled"]
+
+
+def seed_data():
+    rng = random.Random(42)
+    start = datetime(2024, 1, 1)
+    orders = [
+        {"id": str(uuid.uuid4()), "customer_name": f"Customer {i}", "customer_email": f"c{i}@example.com",
+         "customer_phone": "555-0100", "delivery_address": f"{i} Main St", "delivery_notes": None,
+         "items": [{"product_id": str(uuid.uuid4()), "product_name": f"Cake {n}", "quantity": rng.randint(1, 4),
+                    "price": round(rng.uniform(3, 40), 2)} for n in range(rng.randint(1, 4))],
+         "total_amount": round(rng.uniform(5, 120), 2), "status": rng.choice(STATUSES),
+         "order_date": start + timedelta(minutes=i), "delivery_date": None, "special_instructions": None}
+        for i in range(ROWS)
+    ]
+    reviews = [
+        {"id": str(uuid.uuid4()), "customer_name": f"Reviewer {i}", "customer_email": None,
+         "rating": rng.randint(1, 5), "comment": "Lovely crumb, would order again " * 3,
+         "product_id": str(uuid.uuid4()), "order_id": None, "approved": True,
+         "created_at": start + timedelta(minutes=7 * i)}
+        for i in range(ROWS)
+    ]
+    return orders, reviews
+
+
+def report(label, timings):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{label:<36} median {statistics.median(timings) * 1000:8.2f} ms   p95 {p95 * 1000:8.2f} ms")
+    return statistics.median(timings)
+
+
+def time_sync(fn, *args):
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def legacy_encode(model, page_model, adapter, docs):
+    # What the old handler plus FastAPI's response_model handling did per response
+    page = page_model(items=[model(**doc) for doc in docs], next_cursor=None)
+    validated = adapter.validate_python(page.model_dump(by_alias=True))
+    content = adapter.dump_python(validated, mode="json", by_alias=True)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+def fast_encode(model, docs):
+    import orjson
+    from serialization import trusted
+
+    return orjson.dumps({"items": trusted(model, [dict(doc) for doc in docs]), "next_cursor": None})
+
+
+def add_legacy_routes(server):
+    # The pre-change handlers, kept here only for comparison
+    async def legacy_orders(limit: int = 50, cursor: str = None):
+        orders, next_cursor = await server.find_page(server.storage.orders, {}, limit, cursor)
+        return server.OrderPage(items=[server.Order(**order) for order in orders], next_cursor=next_cursor)
+
+    async def legacy_reviews(limit: int = 50, cursor: str = None):
+        reviews, next_cursor = await server.find_page(server.storage.reviews, {"approved": True}, limit, cursor)
+        return server.ReviewPage(items=[server.Review(**review) for review in reviews], next_cursor=next_cursor)
+
+    server.app.add_api_route("/bench/legacy/orders", legacy_orders, response_model=server.OrderPage)
+    server.app.add_api_route("/bench/legacy/reviews", legacy_reviews, response_model=server.ReviewPage)
+
+
+def fetch_all(client, path, page_size):
+    # Follows next_cursor until ROWS rows have come back
+    rows, cursor = 0, None
+    while True:
+        params = {"limit": min(ROWS - rows, page_size)}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get(path, params=params).json()
+        rows += len(page["items"])
+        cursor = page["next_cursor"]
+        if rows >= ROWS or not cursor:
+            return rows
+
+
+def main():
+    from fastapi.testclient import TestClient
+    from pydantic import TypeAdapter
+
+    import server
+    from storage import MemoryStorage
+
+    orders, reviews = seed_data()
+    print(f"Dataset: {ROWS} orders, {ROWS} reviews, {RUNS} runs\n")
+
+    print("Encoding only, one list of all rows")
+    speedups = {}
+    for name, model, page_model, docs in (("orders", server.Order, server.OrderPage, orders),
+                                          ("reviews", server.Review, server.ReviewPage, reviews)):
+        adapter = TypeAdapter(page_model)
+        assert json.loads(legacy_encode(model, page_model, adapter, docs)) == json.loads(fast_encode(model, docs))
+        legacy = report(f"  {name} validated + json.dumps", time_sync(legacy_encode, model, page_model, adapter, docs))
+        fast = report(f"  {name} projected + orjson", time_sync(fast_encode, model, docs))
+        speedups[f"{name} encoding"] = legacy / fast
+
+    print(f"\nHTTP, {ROWS} rows via pages of up to {server.MAX_PAGE_SIZE}")
+    server.storage = MemoryStorage(seed={"orders": orders, "reviews": reviews})
+    add_legacy_routes(server)
+    with TestClient(server.app) as client:
+        for name in ("orders", "reviews"):
+            page_size = server.MAX_PAGE_SIZE
+            fetch_all(client, f"/api/{name}", page_size)
+            fetch_all(client, f"/bench/legacy/{name}", page_size)
+            legacy = report(f"  GET legacy {name}", time_sync(fetch_all, client, f"/bench/legacy/{name}", page_size))
+            fast = report(f"  GET /api/{name}", time_sync(fetch_all, client, f"/api/{name}", page_size))
+            speedups[f"GET /api/{name}"] = legacy / fast
+
+    print()
+    for label, speedup in speedups.items():
+        print(f"{label:<24} {speedup:5.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
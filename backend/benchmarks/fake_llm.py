@@ -0,0 +1,141 @@
+# Offline stand-in for the LiteLLM proxy: an OpenAI-compatible /chat/completions
+#
+# Replies are synthetic words paced like a real model, so the agent path can be
+# load-tested without network access or token spend.
+#
+#   FAKE_LLM_LATENCY_MS=300 FAKE_LLM_TOKENS_PER_SEC=40 python benchmarks/fake_llm.py
+#   LITELLM_BASE_URL=http://127.0.0.1:4010 uvicorn server:app
+#
+# FAKE_LLM_LATENCY_MS      delay before the first token (default 200)
+# FAKE_LLM_TOKENS_PER_SEC  generation speed after that, 0 = instant (default 50)
+# FAKE_LLM_REPLY_TOKENS    words per reply (default 30)
+# FAKE_LLM_ERROR_RATE      fraction of requests that fail, 0..1 (default 0)
+# FAKE_LLM_ERROR_STATUS    status for injected failures (default 429)
+# FAKE_LLM_PORT            listen port when run directly (default 4010)
+
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+WORDS = ("fresh", "bread", "cake", "butter", "flour", "oven", "sweet", "crust", "bake", "daily")
+
+
+@dataclass
+class FakeLLMConfig:
+    latency_ms: float = float(os.getenv("FAKE_LLM_LATENCY_MS", "200"))
+    tokens_per_sec: float = float(os.getenv("FAKE_LLM_TOKENS_PER_SEC", "50"))
+    reply_tokens: int = int(os.getenv("FAKE_LLM_REPLY_TOKENS", "30"))
+    error_rate: float = float(os.getenv("FAKE_LLM_ERROR_RATE", "0"))
+    error_status: int = int(os.getenv("FAKE_LLM_ERROR_STATUS", "429"))
+    seed: int = 7
+    stats: dict = field(default_factory=lambda: {"requests": 0, "errors": 0, "streams": 0})
+
+
+def create_app(config: FakeLLMConfig = None) -> FastAPI:
+    config = config or FakeLLMConfig()
+    rng = random.Random(config.seed)
+    app = FastAPI(title="Fake LLM")
+    app.state.config = config
+
+    def reply_words():
+        return [rng.choice(WORDS) for _ in range(config.reply_tokens)]
+
+    async def token_delay():
+        if config.tokens_per_sec > 0:
+            await asyncio.sleep(1 / config.tokens_per_sec)
+
+    def injected_error():
+        config.stats["errors"] += 1
+        headers = {"Retry-After": "1"} if config.error_status == 429 else {}
+        return JSONResponse(
+            status_code=config.error_status,
+            content={"error": {"message": "Injected failure", "type": "fake_llm_error", "code": config.error_status}},
+            headers=headers
+        )
+
+    def usage(body, completion_tokens):
+        prompt_tokens = sum(len(str(m.get("content", ""))) // 4 for m in body.get("messages", []))
+        return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens}
+
+    async def completions(request: Request):
+        body = await request.json()
+        config.stats["requests"] += 1
+        await asyncio.sleep(config.latency_ms / 1000)
+        if rng.random() < config.error_rate:
+            return injected_error()
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        model = body.get("model", "fake")
+        words = reply_words()
+
+        if body.get("stream"):
+            config.stats["streams"] += 1
+
+            async def chunks():
+                for i, word in enumerate(words):
+                    if i:
+                        await token_delay()
+                    delta = {"content": word if i == 0 else f" {word}"}
+                    if i == 0:
+                        delta["role"] = "assistant"
+                    chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": created,
+                             "model": model, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                final = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                         "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+                yield f"data: {json.dumps(final)}\n\n"
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(chunks(), media_type="text/event-stream")
+
+        for _ in words[1:]:
+            await token_delay()
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": " ".join(words)},
+                         "finish_reason": "stop"}],
+            "usage": usage(body, len(words)),
+        }
+
+    app.post("/chat/completions")(completions)
+    app.post("/v1/chat/completions")(completions)
+
+    @app.get("/stats")
+    async def stats():
+        return config.stats
+
+    return app
+
+
+def serve_in_background(config: FakeLLMConfig = None, port: int = 0) -> str:
+    # Starts uvicorn on a daemon thread and returns the base URL once it is listening
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(create_app(config), host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError(f"Fake LLM failed to start on port {port}")
+        time.sleep(0.01)
+    bound_port = server.servers[0].sockets[0].getsockname()[1]
+    return f"http://127.0.0.1:{bound_port}"
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(create_app(), host="127.0.0.1", port=int(os.getenv("FAKE_LLM_PORT", "4010")))
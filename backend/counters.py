@@ -0,0 +1,76 @@
+# Materialized dashboard counters, maintained with $inc on every write
+
+import asyncio
+import logging
+from typing import Dict, List
+
+from analytics import dashboard_from_memory, dashboard_from_mongo
+
+logger = logging.getLogger(__name__)
+
+COUNTERS_COLLECTION = "analytics_counters"
+COUNTERS_ID = "dashboard"
+COUNTER_FIELDS = [
+    "total_products", "available_products",
+    "total_orders", "pending_orders",
+    "total_reviews", "approved_reviews",
+]
+
+
+def empty_counters() -> Dict[str, int]:
+    return {field: 0 for field in COUNTER_FIELDS}
+
+
+async def bump_counters(db, **deltas: int) -> None:
+    # Single atomic $inc on the counters document; zero deltas are dropped
+    inc = {field: delta for field, delta in deltas.items() if delta}
+    if inc:
+        await db[COUNTERS_COLLECTION].update_one({"_id": COUNTERS_ID}, {"$inc": inc}, upsert=True)
+
+
+def bump_memory_counters(counters: Dict[str, int], **deltas: int) -> None:
+    for field, delta in deltas.items():
+        counters[field] += delta
+
+
+async def read_counters(db) -> Dict[str, int]:
+    doc = await db[COUNTERS_COLLECTION].find_one({"_id": COUNTERS_ID})
+    if doc is None:
+        # First read on a fresh database: materialize from scratch
+        return (await reconcile_counters(db))["counters"]
+    return {field: doc.get(field, 0) for field in COUNTER_FIELDS}
+
+
+def _drift(stored: Dict[str, int], actual: Dict[str, int]) -> Dict[str, int]:
+    return {field: actual[field] - stored.get(field, 0) for field in COUNTER_FIELDS if actual[field] != stored.get(field, 0)}
+
+
+async def reconcile_counters(db) -> Dict[str, Dict[str, int]]:
+    # Recount from the collections and overwrite the materialized document
+    stats = await dashboard_from_mongo(db)
+    actual = {field: stats[field] for field in COUNTER_FIELDS}
+    stored = await db[COUNTERS_COLLECTION].find_one_and_update(
+        {"_id": COUNTERS_ID}, {"$set": actual}, upsert=True
+    ) or {}
+    drift = _drift(stored, actual)
+    if drift:
+        logger.warning(f"Dashboard counters drifted, corrected by {drift}")
+    return {"counters": actual, "drift": drift}
+
+
+def reconcile_memory_counters(counters: Dict[str, int], products: List[dict], orders: List[dict], reviews: List[dict]) -> Dict[str, Dict[str, int]]:
+    stats = dashboard_from_memory(products, orders, reviews)
+    actual = {field: stats[field] for field in COUNTER_FIELDS}
+    drift = _drift(counters, actual)
+    counters.update(actual)
+    return {"counters": actual, "drift": drift}
+
+
+async def run_reconciliation(reconcile, interval_seconds: float) -> None:
+    # Background loop; reconcile is a zero-arg coroutine function
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await reconcile()
+        except Exception as e:
+            logger.error(f"Counter reconciliation failed: {e}")
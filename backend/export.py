@@ -0,0 +1,93 @@
+# Streaming NDJSON / CSV encoders for order exports
+
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from typing import AsyncIterator
+
+# Flush once this much output is buffered; the first row is always flushed at once
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+ORDER_CSV_COLUMNS = [
+    "id", "order_date", "status", "customer_name", "customer_email", "customer_phone",
+    "delivery_address", "delivery_date", "item_count", "items", "total_amount",
+    "delivery_notes", "special_instructions",
+]
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+# Spreadsheets run cells starting with these as formulas
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def naive_utc(value: datetime) -> datetime:
+    # Stored dates are naive UTC; an aware bound (e.g. "...Z") can't be compared with them
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _csv_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        # Customer-entered text; a leading quote makes it a literal
+        return "'" + value
+    return "" if value is None else value
+
+
+def order_csv_row(order: dict) -> list:
+    items = order.get("items", [])
+    flat = {
+        **order,
+        "item_count": sum(item["quantity"] for item in items),
+        "items": "; ".join(f"{item['quantity']} x {item['product_name']} @ {item['price']}" for item in items),
+    }
+    return [_csv_value(flat.get(column)) for column in ORDER_CSV_COLUMNS]
+
+
+async def _chunked(lines: AsyncIterator[str]) -> AsyncIterator[bytes]:
+    buffer, size, first = [], 0, True
+    async for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if first or size >= EXPORT_CHUNK_BYTES:
+            yield "".join(buffer).encode()
+            buffer, size, first = [], 0, False
+    if buffer:
+        yield "".join(buffer).encode()
+
+
+async def ndjson_stream(docs: AsyncIterator[dict]) -> AsyncIterator[bytes]:
+    async def lines():
+        async for doc in docs:
+            yield json.dumps(doc, default=_default, separators=(",", ":")) + "\n"
+
+    async for chunk in _chunked(lines()):
+        yield chunk
+
+
+async def orders_csv_stream(docs: AsyncIterator[dict]) -> AsyncIterator[bytes]:
+    out = io.StringIO()
+    writer = csv.writer(out)
+
+    def render(row) -> str:
+        # Reuse one buffer; csv handles quoting and embedded newlines
+        out.seek(0)
+        out.truncate()
+        writer.writerow(row)
+        return out.getvalue()
+
+    async def lines():
+        yield render(ORDER_CSV_COLUMNS)
+        async for doc in docs:
+            yield render(order_csv_row(doc))
+
+    async for chunk in _chunked(lines()):
+        yield chunk
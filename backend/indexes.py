@@ -0,0 +1,114 @@
+# Declared MongoDB indexes, startup provisioning and drift reporting
+
+import logging
+from typing import Any, Dict, List
+
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from pymongo.errors import OperationFailure
+
+from search import PRODUCT_SEARCH_WEIGHTS
+
+logger = logging.getLogger(__name__)
+
+
+def _recent(*prefix, sort_field: str) -> List[tuple]:
+    # Equality prefix followed by the keyset sort used by list routes
+    return [(field, ASCENDING) for field in prefix] + [(sort_field, DESCENDING), ("id", DESCENDING)]
+
+
+# Every index a route relies on, keyed by collection
+INDEX_SPECS: Dict[str, List[IndexModel]] = {
+    "products": [
+        IndexModel([("id", ASCENDING)], name="products_id", unique=True),
+        IndexModel(_recent(sort_field="created_at"), name="products_recent"),
+        IndexModel(_recent("category", sort_field="created_at"), name="products_category_recent"),
+        # The storefront default (available only, any category) can't sort on the index
+        # below, since category sits between available and created_at
+        IndexModel(_recent("available", sort_field="created_at"), name="products_available_recent"),
+        IndexModel(_recent("available", "category", sort_field="created_at"), name="products_available_category_recent"),
+        IndexModel([("available", ASCENDING), ("avg_rating", DESCENDING), ("review_count", DESCENDING), ("id", ASCENDING)],
+                   name="products_top_rated"),
+        IndexModel([(field, TEXT) for field in PRODUCT_SEARCH_WEIGHTS], name="products_text",
+                   weights={field: int(weight) for field, weight in PRODUCT_SEARCH_WEIGHTS.items()},
+                   default_language="english"),
+    ],
+    "orders": [
+        IndexModel([("id", ASCENDING)], name="orders_id", unique=True),
+        IndexModel(_recent(sort_field="order_date"), name="orders_recent"),
+        IndexModel(_recent("status", sort_field="order_date"), name="orders_status_recent"),
+    ],
+    "reviews": [
+        IndexModel([("id", ASCENDING)], name="reviews_id", unique=True),
+        IndexModel(_recent(sort_field="created_at"), name="reviews_recent"),
+        IndexModel(_recent("approved", sort_field="created_at"), name="reviews_approved_recent"),
+        IndexModel(_recent("product_id", sort_field="created_at"), name="reviews_product_recent"),
+        IndexModel(_recent("approved", "product_id", sort_field="created_at"), name="reviews_approved_product_recent"),
+    ],
+}
+
+
+def _key_list(key: Any) -> List[list]:
+    # Normalize SON / dict / list-of-tuples keys for comparison. The server reports a
+    # text index's fields as _fts/_ftsx (the fields live in its weights), so declared
+    # text fields collapse to the same pair.
+    items = key.items() if hasattr(key, "items") else key
+    keys = []
+    for field, direction in items:
+        if direction == TEXT or field in ("_fts", "_ftsx"):
+            if ["_fts", TEXT] not in keys:
+                keys += [["_fts", TEXT], ["_ftsx", 1]]
+            continue
+        keys.append([field, direction])
+    return keys
+
+
+async def ensure_indexes(db) -> Dict[str, List[str]]:
+    # createIndexes is a no-op for indexes that already exist with the same spec
+    created = {}
+    for collection, models in INDEX_SPECS.items():
+        created[collection] = []
+        for model in models:
+            # One command per index so a conflict doesn't block the others
+            try:
+                created[collection] += await db[collection].create_indexes([model])
+            except OperationFailure as e:
+                logger.error(f"Failed to create index {model.document['name']} on {collection}: {e}")
+    return created
+
+
+async def index_drift(db) -> Dict[str, Any]:
+    # Compare declared indexes with what the server has and how often each is used
+    report = {}
+    for collection, models in INDEX_SPECS.items():
+        declared = {m.document["name"]: _key_list(m.document["key"]) for m in models}
+
+        existing = {}
+        async for index in db[collection].list_indexes():
+            existing[index["name"]] = _key_list(index["key"])
+        existing.pop("_id_", None)
+
+        usage = {}
+        try:
+            async for stat in db[collection].aggregate([{"$indexStats": {}}]):
+                usage[stat["name"]] = {
+                    "ops": stat["accesses"]["ops"],
+                    "since": stat["accesses"]["since"],
+                }
+        except OperationFailure as e:
+            # $indexStats needs extra privileges on some hosted tiers
+            logger.warning(f"Index usage unavailable for {collection}: {e}")
+
+        report[collection] = {
+            "missing": sorted(name for name in declared if name not in existing),
+            "mismatched": sorted(
+                name for name in declared
+                if name in existing and existing[name] != declared[name]
+            ),
+            "undeclared": sorted(name for name in existing if name not in declared),
+            "unused": sorted(
+                name for name, stat in usage.items()
+                if name != "_id_" and stat["ops"] == 0
+            ),
+            "usage": usage,
+        }
+    return report
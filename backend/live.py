@@ -0,0 +1,178 @@
+# Real-time order feed: one upstream change source fanned out to bounded per-client queues
+
+import asyncio
+import itertools
+import logging
+import uuid
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Change(NamedTuple):
+    # token doubles as the SSE event id; reconnecting clients send it back as Last-Event-ID
+    token: str
+    op: str
+    doc: dict
+
+
+class FeedUnavailable(RuntimeError):
+    # The backend can't produce changes at all, e.g. change streams on a standalone mongod
+    pass
+
+
+def history_lost() -> Change:
+    # Sources yield this when they can't resume where asked and carry on from now;
+    # it has no resume token of its own
+    return Change("", "reset", {})
+
+
+class ChangeBus:
+    # In-process stand-in for a change stream on the memory store; publishing never blocks
+
+    def __init__(self):
+        # Tokens from a previous process must not match this one's
+        self._epoch = uuid.uuid4().hex[:8]
+        self._seq = itertools.count(1)
+        self._subscribers: List[asyncio.Queue] = []
+        self.last_token: Optional[str] = None
+
+    def publish(self, op: str, doc: dict) -> None:
+        change = Change(f"{self._epoch}-{next(self._seq)}", op, dict(doc))
+        self.last_token = change.token
+        for queue in self._subscribers:
+            queue.put_nowait(change)
+
+    async def watch(self, resume_after: Optional[str] = None) -> AsyncIterator[Change]:
+        # No history here, so resuming from anything but the latest change means the
+        # watcher missed some, like a resume token past the end of the oplog
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.append(queue)
+        try:
+            if resume_after is not None and resume_after != self.last_token:
+                yield history_lost()
+            while True:
+                yield await queue.get()
+        finally:
+            self._subscribers.remove(queue)
+
+
+class Subscription:
+
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.lagged = False
+
+
+class LiveFeed:
+    # A single watcher task reads the source and pushes each change to every subscriber.
+    # A client whose queue fills is cut loose after draining it; on reconnect it resumes
+    # from its last event id out of the replay history, or gets a reset if that has rolled off.
+
+    def __init__(self, queue_size: int = 100, history: int = 1000, retry_delay: float = 1.0,
+                 max_retry_delay: float = 60.0):
+        self.queue_size = queue_size
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._history: Deque[Change] = deque(maxlen=history)
+        self._subscribers: List[Subscription] = []
+        self._task: Optional[asyncio.Task] = None
+        self.last_token: Optional[str] = None
+        self.available = True
+        self.published = 0
+        self.lagged = 0
+        self.source_errors = 0
+        self.resets = 0
+
+    def start(self, watch: Callable[[Optional[str]], AsyncIterator[Change]]) -> None:
+        self._task = asyncio.create_task(self._run(watch))
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, watch: Callable[[Optional[str]], AsyncIterator[Change]]) -> None:
+        delay = self.retry_delay
+        while True:
+            try:
+                # Resuming from the last token means a dropped cursor loses nothing
+                async for change in watch(self.last_token):
+                    self._publish(change)
+                    delay = self.retry_delay
+            except asyncio.CancelledError:
+                raise
+            except FeedUnavailable as e:
+                logger.warning(f"Live order feed disabled: {e}")
+                self.available = False
+                return
+            except Exception as e:
+                self.source_errors += 1
+                logger.warning(f"Order change source failed, retrying in {delay:.0f}s: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_retry_delay)
+
+    def _publish(self, change: Change) -> None:
+        if change.op == "reset":
+            # The source skipped changes: every client must refetch, and no event id
+            # from before the gap can be resumed from any more
+            self._history.clear()
+            self.last_token = change.token or None
+            self.resets += 1
+        else:
+            self._history.append(change)
+            self.last_token = change.token
+        self.published += 1
+        for subscription in list(self._subscribers):
+            try:
+                subscription.queue.put_nowait(change)
+            except asyncio.QueueFull:
+                subscription.lagged = True
+                self._subscribers.remove(subscription)
+                self.lagged += 1
+
+    def _replay(self, last_event_id: str) -> Optional[List[Change]]:
+        # Changes after last_event_id, or None if it is no longer (or never was) in the history
+        changes = list(self._history)
+        for i, change in enumerate(changes):
+            if change.token == last_event_id:
+                return changes[i + 1:]
+        return None
+
+    async def listen(self, last_event_id: Optional[str] = None, heartbeat: float = 15.0) -> AsyncIterator[Optional[Change]]:
+        # Yields changes, None when idle for a heartbeat, and a "reset" change when the
+        # client's position is unknown and it should refetch before trusting the feed
+        subscription = Subscription(self.queue_size)
+        self._subscribers.append(subscription)
+        try:
+            if last_event_id:
+                backlog = self._replay(last_event_id)
+                if backlog is None:
+                    yield Change(self.last_token or "", "reset", {})
+                else:
+                    for change in backlog:
+                        yield change
+            while not (subscription.lagged and subscription.queue.empty()):
+                try:
+                    yield await asyncio.wait_for(subscription.queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "available": self.available,
+            "clients": len(self._subscribers),
+            "published": self.published,
+            "lagged": self.lagged,
+            "source_errors": self.source_errors,
+            "resets": self.resets,
+            "history": len(self._history),
+        }
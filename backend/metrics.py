@@ -0,0 +1,234 @@
+# Prometheus text-format metrics: counters, gauges and pre-bucketed histograms
+#
+# Every update runs on the event loop thread between awaits, so plain dict and
+# list arithmetic is safe without locks; a scrape renders whatever is current.
+
+import functools
+import time
+from bisect import bisect_left
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Seconds; wide enough for both Mongo round trips and LLM generations
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, description, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        return self.header() + [
+            f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+            for labels, value in self._values.items()
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels: str, value: float) -> None:
+        self._values[labels] = value
+
+
+class Histogram(Metric):
+    # Per label set: one count per bucket (not cumulative until rendered), then sum and count
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, description, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            # bucket counts, +Inf, sum
+            series = self._series[labels] = [0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return sum(series[:-1]) if series else 0
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    # Metrics plus collectors: callbacks that produce metrics from live state at scrape time
+
+    def __init__(self):
+        self._metrics: List[Metric] = []
+        self._collectors: List[Callable[[], Iterable[Metric]]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, description: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, description, labelnames))
+
+    def gauge(self, name: str, description: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, description, labelnames))
+
+    def histogram(self, name: str, description: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, description, labelnames, buckets))
+
+    def collector(self, collect: Callable[[], Iterable[Metric]]) -> None:
+        self._collectors.append(collect)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collect in self._collectors:
+            for metric in collect():
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = REGISTRY.counter("http_requests_total", "HTTP requests by route and status",
+                                 ["method", "route", "status"])
+HTTP_LATENCY = REGISTRY.histogram("http_request_duration_seconds", "HTTP request latency, including streamed bodies",
+                                  ["method", "route"])
+HTTP_IN_FLIGHT = REGISTRY.gauge("http_requests_in_flight", "HTTP requests currently being served", ["method"])
+
+MONGO_LATENCY = REGISTRY.histogram("mongo_operation_duration_seconds", "MongoDB repository operation latency",
+                                   ["collection", "operation"])
+MONGO_ERRORS = REGISTRY.counter("mongo_operation_errors_total", "MongoDB repository operations that raised",
+                                ["collection", "operation"])
+
+LLM_LATENCY = REGISTRY.histogram("llm_call_duration_seconds", "Upstream model call latency, excluding limiter queueing",
+                                 ["model", "mode", "outcome"])
+LLM_TOKENS = REGISTRY.counter("llm_tokens_total", "Tokens reported by the model", ["model", "direction"])
+
+
+class MetricsMiddleware:
+    # Raw ASGI so streamed responses are timed to their last byte without buffering
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc(method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_IN_FLIGHT.dec(method)
+            # Route templates keep label cardinality bounded; unknown paths share one label
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            HTTP_LATENCY.observe(time.perf_counter() - started, method, path)
+            HTTP_REQUESTS.inc(method, path, str(status))
+
+
+def timed(operation: str, collection: Optional[str] = None):
+    # Times an async repository method; the collection label defaults to the repository's name
+    def decorate(method: Callable[..., Awaitable[Any]]):
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            labels = (collection or self.name, operation)
+            started = time.perf_counter()
+            try:
+                return await method(self, *args, **kwargs)
+            except Exception:
+                MONGO_ERRORS.inc(*labels)
+                raise
+            finally:
+                MONGO_LATENCY.observe(time.perf_counter() - started, *labels)
+        return wrapper
+    return decorate
+
+
+def observe_llm_call(call) -> None:
+    # Observer for ai_agents: one LLMCall per upstream attempt
+    LLM_LATENCY.observe(call.seconds, call.model, call.mode, call.outcome)
+    if call.input_tokens:
+        LLM_TOKENS.inc(call.model, "input", amount=call.input_tokens)
+    if call.output_tokens:
+        LLM_TOKENS.inc(call.model, "output", amount=call.output_tokens)
+
+
+def cache_metrics(caches: Dict[str, Dict[str, Any]]) -> List[Metric]:
+    # Point-in-time metrics from stats() dicts with hits, misses, size and hit_ratio
+    hits = Counter("cache_hits_total", "Cache hits", ["cache"])
+    misses = Counter("cache_misses_total", "Cache misses", ["cache"])
+    ratio = Gauge("cache_hit_ratio", "Cache hits over lookups since start", ["cache"])
+    entries = Gauge("cache_entries", "Entries currently cached", ["cache"])
+    for name, stats in caches.items():
+        hits.inc(name, amount=stats.get("hits", 0) + stats.get("similar_hits", 0))
+        misses.inc(name, amount=stats.get("misses", 0))
+        ratio.set(name, value=stats.get("hit_ratio", 0.0))
+        entries.set(name, value=stats.get("size", 0))
+    return [hits, misses, ratio, entries]
@@ -0,0 +1,61 @@
+# Opaque-cursor keyset pagination helpers
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Sort value for documents written before they carried one, e.g. by seed_data.py;
+# backfilled at startup so they sort last and stay reachable by cursors
+LEGACY_SORT_VALUE = datetime(1970, 1, 1)
+
+
+class InvalidCursor(ValueError):
+    # Raised when a client sends a cursor we did not issue
+    pass
+
+
+def encode_cursor(sort_value: datetime, doc_id: str) -> str:
+    # Cursor is the (sort_value, id) of the last row on the page
+    payload = json.dumps([sort_value.isoformat(), doc_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, doc_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(sort_value), str(doc_id)
+    except Exception as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+
+
+def keyset_query(query: Dict[str, Any], sort_field: str, cursor: Optional[str]) -> Dict[str, Any]:
+    # Rows strictly after the cursor in (sort_field desc, id desc) order
+    if not cursor:
+        return query
+    sort_value, doc_id = decode_cursor(cursor)
+    after = {
+        "$or": [
+            {sort_field: {"$lt": sort_value}},
+            {sort_field: sort_value, "id": {"$lt": doc_id}},
+        ]
+    }
+    return {"$and": [query, after]} if query else after
+
+
+def keyset_sort(sort_field: str) -> List[Tuple[str, int]]:
+    return [(sort_field, -1), ("id", -1)]
+
+
+def build_page(docs: List[dict], sort_field: str, limit: int) -> Tuple[List[dict], Optional[str]]:
+    # Callers fetch limit + 1 rows; the extra row only signals another page
+    if len(docs) <= limit:
+        return docs, None
+    page = docs[:limit]
+    last = page[-1]
+    return page, encode_cursor(last[sort_field], last["id"])
+
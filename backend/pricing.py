@@ -0,0 +1,120 @@
+# Server-side order pricing from a warm product price index
+
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+from cache import TTLCache
+
+CENTS = Decimal("0.01")
+
+
+class PriceEntry(NamedTuple):
+    name: str
+    price: Decimal
+    available: bool
+
+
+class PricingError(ValueError):
+    # Raised when an order references products we can't sell
+
+    def __init__(self, unknown: List[str], unavailable: List[str]):
+        self.unknown = unknown
+        self.unavailable = unavailable
+        parts = []
+        if unknown:
+            parts.append(f"Unknown products: {', '.join(unknown)}")
+        if unavailable:
+            parts.append(f"Unavailable products: {', '.join(unavailable)}")
+        super().__init__("; ".join(parts))
+
+
+def to_money(amount: Decimal) -> float:
+    return float(amount.quantize(CENTS, rounding=ROUND_HALF_UP))
+
+
+class PriceIndex:
+    # product_id -> PriceEntry; entries expire so other workers' edits are picked up
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 300.0):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    @staticmethod
+    def _entry(product: dict) -> PriceEntry:
+        # str() first so 2.1 becomes Decimal("2.1"), not its binary expansion
+        return PriceEntry(
+            name=product["name"],
+            price=Decimal(str(product["price"])),
+            available=product.get("available", True),
+        )
+
+    def upsert(self, product: dict) -> PriceEntry:
+        # For writers: invalidating first moves the generation on, so a read of the
+        # older document that is still in flight can't overwrite this entry
+        entry = self._entry(product)
+        self._entries.invalidate(product["id"])
+        self._entries.set(product["id"], entry)
+        return entry
+
+    def _fill(self, product: dict, generation: int) -> PriceEntry:
+        # For readers: cached only if no write happened since the read began;
+        # otherwise the newer entry that write left wins
+        entry = self._entry(product)
+        if self._entries.set(product["id"], entry, generation):
+            return entry
+        return self._entries.get(product["id"]) or entry
+
+    def invalidate(self, product_id: str) -> None:
+        self._entries.invalidate(product_id)
+
+    def stats(self) -> dict:
+        return self._entries.stats()
+
+    async def warm(self, repository, page_size: int = 500) -> int:
+        count, cursor = 0, None
+        while True:
+            generation = self._entries.generation
+            products, cursor = await repository.find_page({}, page_size, cursor)
+            for product in products:
+                self._fill(product, generation)
+            count += len(products)
+            if cursor is None:
+                return count
+
+    async def resolve(self, repository, product_ids: Iterable[str]) -> Dict[str, PriceEntry]:
+        # Warm hits stay in memory; all misses share one get_many ($in) round trip
+        entries, misses = {}, []
+        for product_id in set(product_ids):
+            entry = self._entries.get(product_id)
+            if entry is None:
+                misses.append(product_id)
+            else:
+                entries[product_id] = entry
+        if misses:
+            generation = self._entries.generation
+            for product in await repository.get_many(misses):
+                entries[product["id"]] = self._fill(product, generation)
+        return entries
+
+
+def price_items(items: Iterable, entries: Dict[str, PriceEntry]) -> Tuple[List[dict], Decimal]:
+    # Catalog name and price replace whatever the client sent
+    priced, total = [], Decimal(0)
+    unknown, unavailable = [], []
+    for item in items:
+        entry = entries.get(item.product_id)
+        if entry is None:
+            unknown.append(item.product_id)
+            continue
+        if not entry.available:
+            unavailable.append(item.product_id)
+            continue
+        total += entry.price * item.quantity
+        priced.append({
+            "product_id": item.product_id,
+            "product_name": entry.name,
+            "quantity": item.quantity,
+            "price": float(entry.price),
+        })
+    if unknown or unavailable:
+        raise PricingError(list(dict.fromkeys(unknown)), list(dict.fromkeys(unavailable)))
+    return priced, total
@@ -0,0 +1,262 @@
+# Opt-in sampling profiler for single requests
+#
+# A sampler thread reads the event loop thread's Python stack every few milliseconds
+# and checks which task is running. Samples taken while one of the profiled request's
+# tasks runs become collapsed stacks (flamegraph.pl / speedscope input). Others count
+# as time spent on other requests or as the loop idling while the request awaits I/O.
+# Runs of busy samples long enough to starve the loop go into the blocking report.
+#
+# A request's work doesn't all run in its own task: StreamingResponse bodies (exports,
+# SSE) and anyio task groups run in child tasks. The sampler rides in a contextvar that
+# those tasks inherit, and a task factory installed while profiling enrolls every task
+# created under it, so their samples count as the request's too.
+
+import asyncio
+import contextvars
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional, Set
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    path = code.co_filename.replace("\\", "/").split("/")
+    return f"{code.co_name} ({'/'.join(path[-2:])}:{code.co_firstlineno})"
+
+
+# Each loop's running task, readable from another thread (asyncio.current_task() only
+# works on the loop's own). It is private and not on every Python version; without it
+# the sampler reads the same from the loop thread's stack.
+_CURRENT_TASKS = getattr(asyncio.tasks, "_current_tasks", None)
+
+# The active Sampler in the profiled request's context, inherited by the tasks it spawns
+_PROFILED: contextvars.ContextVar[Optional["Sampler"]] = contextvars.ContextVar("profiled_request", default=None)
+
+
+def _enrolling_factory(previous):
+    # Task factory that hands tasks created in a profiled context to that context's sampler
+    def factory(loop, coro, **kwargs):
+        if previous is not None:
+            task = previous(loop, coro, **kwargs)
+        else:
+            task = asyncio.Task(coro, loop=loop, **kwargs)
+        context = kwargs.get("context")
+        sampler = context.get(_PROFILED) if context is not None else _PROFILED.get()
+        if sampler is not None:
+            sampler.tasks.add(task)
+        return task
+    return factory
+
+
+class Sampler:
+    # Samples one thread's stack until stopped or max_seconds pass. tasks holds the profiled
+    # request's task and those spawned under it; the loop thread adds, the sampler reads.
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, task: asyncio.Task, interval: float,
+                 max_seconds: float, max_depth: int, block_threshold: float):
+        self.loop = loop
+        self.tasks: Set[asyncio.Task] = {task}
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.max_depth = max_depth
+        self.block_threshold = block_threshold
+        self.thread_id = threading.get_ident()
+        self.stacks: Counter = Counter()
+        self.samples = {"request": 0, "other": 0, "idle": 0}
+        self.blocking: List[Dict[str, Any]] = []
+        self.truncated = False
+        self._busy: List[tuple] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        # No samples after this returns; join() waits for the thread to exit
+        self._stop.set()
+
+    def join(self) -> None:
+        self._thread.join()
+
+    def _state(self, frame) -> str:
+        # "request" while one of the profiled tasks runs, "other" for other tasks, "idle" while polling
+        if isinstance(_CURRENT_TASKS, dict):
+            task = _CURRENT_TASKS.get(self.loop)
+            if task is None:
+                return "idle"
+            return "request" if task in self.tasks else "other"
+        # Fallback: the loop polls inside selectors, and a running task has its
+        # coroutine's frame on the stack
+        if frame is None or frame.f_code.co_filename.endswith("selectors.py"):
+            return "idle"
+        task_frames = {getattr(task.get_coro(), "cr_frame", None) for task in tuple(self.tasks)}
+        while frame is not None:
+            if frame in task_frames:
+                return "request"
+            frame = frame.f_back
+        return "other"
+
+    def _stack(self, frame) -> Optional[str]:
+        labels = []
+        while frame is not None and len(labels) < self.max_depth:
+            labels.append(_frame_label(frame))
+            frame = frame.f_back
+        # Collapsed stacks read root first
+        return ";".join(reversed(labels)) if labels else None
+
+    def _run(self) -> None:
+        deadline = time.monotonic() + self.max_seconds
+        while not self._stop.wait(self.interval):
+            if time.monotonic() > deadline:
+                self.truncated = True
+                break
+            frame = sys._current_frames().get(self.thread_id)
+            kind = self._state(frame)
+            self.samples[kind] += 1
+            if kind == "idle":
+                self._end_busy()
+                continue
+            stack = self._stack(frame)
+            if kind == "request" and stack:
+                self.stacks[stack] += 1
+            self._busy.append((kind, stack, time.perf_counter()))
+        self._end_busy()
+
+    def _end_busy(self) -> None:
+        # A stretch of samples with no idle poll in between means the loop served nothing else.
+        # Timed by the clock: a busy loop holds the GIL, so samples arrive less often than asked.
+        busy, self._busy = self._busy, []
+        if not busy:
+            return
+        duration = busy[-1][2] - busy[0][2] + self.interval
+        if duration < self.block_threshold:
+            return
+        kinds = Counter(kind for kind, _, _ in busy)
+        stacks = Counter(stack for _, stack, _ in busy if stack)
+        self.blocking.append({
+            "duration_ms": round(duration * 1000, 1),
+            "request_share": round(kinds["request"] / len(busy), 2),
+            "stack": stacks.most_common(1)[0][0] if stacks else None,
+        })
+
+    def collapsed(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+
+class ProfileStore:
+    # Ring buffer of finished profiles, newest last
+
+    def __init__(self, maxlen: int = 20):
+        self._profiles: Deque[Dict[str, Any]] = deque(maxlen=maxlen)
+
+    def add(self, profile: Dict[str, Any]) -> None:
+        self._profiles.append(profile)
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        return next((profile for profile in self._profiles if profile["id"] == profile_id), None)
+
+    def summaries(self) -> List[Dict[str, Any]]:
+        return [{key: value for key, value in profile.items() if key != "collapsed"}
+                for profile in reversed(self._profiles)]
+
+
+class ProfilingMiddleware:
+    # Profiles a request when it carries X-Profile: 1 (or ?profile=1) and authorize()
+    # accepts its headers. One request at a time; others with the flag run unprofiled.
+
+    def __init__(self, app, authorize: Callable[[Dict[str, str]], bool], store: ProfileStore,
+                 interval_ms: Optional[float] = None, max_seconds: Optional[float] = None,
+                 block_ms: Optional[float] = None, max_depth: int = 64):
+        self.app = app
+        self.authorize = authorize
+        self.store = store
+        self.interval = (interval_ms or float(os.getenv("PROFILE_INTERVAL_MS", "5"))) / 1000
+        self.max_seconds = max_seconds or float(os.getenv("PROFILE_MAX_SECONDS", "10"))
+        self.block_threshold = (block_ms or float(os.getenv("PROFILE_BLOCK_MS", "50"))) / 1000
+        self.max_depth = max_depth
+        self._active = False
+
+    @staticmethod
+    def _requested(scope) -> bool:
+        # Checked on raw bytes so unflagged requests pay next to nothing
+        if any(key == b"x-profile" and value in (b"1", b"true") for key, value in scope["headers"]):
+            return True
+        query = scope.get("query_string", b"")
+        return b"profile=" in query and any(part in (b"profile=1", b"profile=true") for part in query.split(b"&"))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+        headers = {key.decode("latin-1").lower(): value.decode("latin-1") for key, value in scope["headers"]}
+        if not self.authorize(headers):
+            await self.app(scope, receive, send)
+            return
+        if self._active:
+            await self.app(scope, receive, self._with_header(send, b"x-profile", b"busy"))
+            return
+
+        profile_id = uuid.uuid4().hex[:12]
+        send_tagged = self._with_header(send, b"x-profile-id", profile_id.encode())
+        status = 500
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send_tagged(message)
+
+        loop = asyncio.get_running_loop()
+        sampler = Sampler(loop, asyncio.current_task(), self.interval,
+                          self.max_seconds, self.max_depth, self.block_threshold)
+        self._active = True
+        previous_factory = loop.get_task_factory()
+        factory = _enrolling_factory(previous_factory)
+        loop.set_task_factory(factory)
+        token = _PROFILED.set(sampler)
+        started_at = datetime.utcnow()
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            sampler.stop()
+            _PROFILED.reset(token)
+            if loop.get_task_factory() is factory:
+                loop.set_task_factory(previous_factory)
+            self._active = False
+            # Joined off the loop so other requests don't wait out the last sample interval
+            await asyncio.to_thread(sampler.join)
+            self.store.add({
+                "id": profile_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": scope.get("query_string", b"").decode("latin-1"),
+                "status": status,
+                "started_at": started_at.isoformat(),
+                "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+                "interval_ms": self.interval * 1000,
+                # request: this request on the CPU; other: the loop running other requests;
+                # idle: the loop polling, i.e. this request awaiting Mongo, the LLM or the client
+                "samples": sampler.samples,
+                "distinct_stacks": len(sampler.stacks),
+                "blocking": sampler.blocking,
+                "truncated": sampler.truncated,
+                "collapsed": sampler.collapsed(),
+            })
+
+    @staticmethod
+    def _with_header(send, name: bytes, value: bytes):
+        async def wrapped(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers", [])) + [(name, value)]}
+            await send(message)
+        return wrapped
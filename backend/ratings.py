@@ -0,0 +1,97 @@
+# Per-product rating aggregates over approved reviews, maintained incrementally
+
+import logging
+from typing import Any, Dict, Iterable, List
+
+from pymongo import DESCENDING, UpdateOne
+
+logger = logging.getLogger(__name__)
+
+RATINGS = range(1, 6)
+
+# Ranking for /products/top-rated; ties fall back to id
+TOP_RATED_RANK = [("avg_rating", DESCENDING), ("review_count", DESCENDING)]
+
+
+def empty_ratings() -> Dict[str, Any]:
+    # Histogram keys are strings because Mongo field names must be
+    return {
+        "avg_rating": 0.0,
+        "review_count": 0,
+        "rating_sum": 0,
+        "rating_histogram": {str(rating): 0 for rating in RATINGS},
+    }
+
+
+def rating_update_pipeline(rating: int, delta: int) -> List[dict]:
+    # Update pipeline: bump count, sum and bucket, then derive the average from the new values
+    bucket = f"rating_histogram.{rating}"
+    return [
+        {"$set": {
+            "review_count": {"$add": [{"$ifNull": ["$review_count", 0]}, delta]},
+            "rating_sum": {"$add": [{"$ifNull": ["$rating_sum", 0]}, rating * delta]},
+            bucket: {"$add": [{"$ifNull": [f"${bucket}", 0]}, delta]},
+        }},
+        {"$set": {
+            "avg_rating": {"$cond": [
+                {"$gt": ["$review_count", 0]},
+                {"$divide": ["$rating_sum", "$review_count"]},
+                0.0,
+            ]},
+        }},
+    ]
+
+
+def applied_rating(product: dict, rating: int, delta: int) -> Dict[str, Any]:
+    # In-memory equivalent of rating_update_pipeline; returns the fields to set
+    histogram = {**empty_ratings()["rating_histogram"], **product.get("rating_histogram", {})}
+    histogram[str(rating)] += delta
+    count = product.get("review_count", 0) + delta
+    total = product.get("rating_sum", 0) + rating * delta
+    return {
+        "review_count": count,
+        "rating_sum": total,
+        "rating_histogram": histogram,
+        "avg_rating": total / count if count > 0 else 0.0,
+    }
+
+
+def ratings_differ(product: dict, actual: Dict[str, Any]) -> bool:
+    expected = empty_ratings()
+    return any(product.get(field, expected[field]) != actual[field]
+               for field in ("review_count", "rating_sum", "rating_histogram"))
+
+
+def ratings_from_reviews(reviews: Iterable[dict]) -> Dict[str, Dict[str, Any]]:
+    # Full recount: product_id -> aggregate fields, approved reviews only
+    ratings: Dict[str, Dict[str, Any]] = {}
+    for review in reviews:
+        product_id = review.get("product_id")
+        if not product_id or not review.get("approved"):
+            continue
+        current = ratings.setdefault(product_id, empty_ratings())
+        current.update(applied_rating(current, review["rating"], 1))
+    return ratings
+
+
+async def rebuild_ratings(db) -> int:
+    # Recompute every product's aggregates from approved reviews; returns products changed
+    pipeline = [
+        {"$match": {"approved": True, "product_id": {"$ne": None}}},
+        {"$group": {"_id": {"product_id": "$product_id", "rating": "$rating"}, "count": {"$sum": 1}}},
+    ]
+    ratings: Dict[str, Dict[str, Any]] = {}
+    async for group in db.reviews.aggregate(pipeline):
+        key = group["_id"]
+        current = ratings.setdefault(key["product_id"], empty_ratings())
+        current.update(applied_rating(current, key["rating"], group["count"]))
+
+    updates = []
+    async for product in db.products.find({}, {"_id": 0, "id": 1, "review_count": 1, "rating_sum": 1, "rating_histogram": 1}):
+        actual = ratings.get(product["id"], empty_ratings())
+        if ratings_differ(product, actual):
+            updates.append(UpdateOne({"id": product["id"]}, {"$set": actual}))
+    if updates:
+        await db.products.bulk_write(updates, ordered=False)
+        logger.info(f"Rebuilt rating aggregates for {len(updates)} products")
+    return len(updates)
@@ -0,0 +1,129 @@
+# Full-text product search: tokenizer and a BM25 inverted index for the in-memory store
+
+import math
+import re
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have i in is it its of on or our the to with without".split()
+)
+
+# Field weights shared with the Mongo text index so both backends rank alike
+PRODUCT_SEARCH_WEIGHTS = {"name": 10.0, "ingredients": 5.0, "description": 1.0}
+
+
+class SearchTimeout(TimeoutError):
+    # The backend gave up within the search latency budget
+    pass
+
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+
+def _stem(word: str) -> str:
+    # Just enough to match "cookies"/"cookie" and "berries"/"berry"; both sides
+    # of a match go through here, so "cooky" is fine as a shared stem
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith("ie"):
+        return word[:-2] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    return [_stem(word) for word in _WORD.findall(text.lower()) if word not in STOPWORDS]
+
+
+def _field_text(value) -> str:
+    if isinstance(value, (list, tuple)):
+        return " ".join(str(v) for v in value)
+    return "" if value is None else str(value)
+
+
+class InvertedIndex:
+    # term -> {doc_id: weighted term frequency}; document length is the weighted token count
+
+    def __init__(self, weights: Dict[str, float]):
+        self.weights = weights
+        self._postings: Dict[str, Dict[str, float]] = defaultdict(dict)
+        self._lengths: Dict[str, float] = {}
+        self._terms: Dict[str, List[str]] = {}
+        self._total_length = 0.0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, doc: dict) -> None:
+        doc_id = doc["id"]
+        if doc_id in self._lengths:
+            self.remove(doc_id)
+        frequencies: Dict[str, float] = defaultdict(float)
+        for field, weight in self.weights.items():
+            for term in tokenize(_field_text(doc.get(field))):
+                frequencies[term] += weight
+        for term, frequency in frequencies.items():
+            self._postings[term][doc_id] = frequency
+        length = sum(frequencies.values())
+        self._lengths[doc_id] = length
+        self._terms[doc_id] = list(frequencies)
+        self._total_length += length
+
+    def remove(self, doc_id: str) -> None:
+        if doc_id not in self._lengths:
+            return
+        for term in self._terms.pop(doc_id):
+            postings = self._postings[term]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+        self._total_length -= self._lengths.pop(doc_id)
+
+    def search(self, query: str, accept: Optional[Callable[[str], bool]] = None, limit: int = 20) -> List[Tuple[str, float]]:
+        # BM25 over the query's distinct terms; accept filters doc ids before the top-k cut
+        terms = set(tokenize(query))
+        if not terms or not self._lengths:
+            return []
+        count = len(self._lengths)
+        average = self._total_length / count or 1.0
+        scores: Dict[str, float] = defaultdict(float)
+        for term in terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, frequency in postings.items():
+                norm = K1 * (1 - B + B * self._lengths[doc_id] / average)
+                scores[doc_id] += idf * frequency * (K1 + 1) / (frequency + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        hits = []
+        for doc_id, score in ranked:
+            if accept is None or accept(doc_id):
+                hits.append((doc_id, score))
+                if len(hits) == limit:
+                    break
+        return hits
+
+
+def normalize_allergens(allergens: Iterable[str]) -> List[str]:
+    # Accepts repeated params and comma lists: ["nuts,gluten", "Dairy"] -> ["nuts", "gluten", "dairy"]
+    seen = []
+    for value in allergens:
+        for allergen in value.split(","):
+            allergen = allergen.strip().lower()
+            if allergen and allergen not in seen:
+                seen.append(allergen)
+    return seen
+
+
+def holds_any(doc: dict, field: str, values: List[str]) -> bool:
+    # Case-insensitive membership test over a list field, e.g. a product's allergens
+    wanted = {value.lower() for value in values}
+    return any(str(item).lower() in wanted for item in doc.get(field) or [])
@@ -1,5 +1,6 @@
 import asyncio
 import os
+from datetime import datetime, timedelta
 from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
 from pathlib import Path
@@ -143,12 +144,17 @@ async def seed_database():
     await db.reviews.delete_many({})
     print("Cleared existing data")
 
+    # Listings page on created_at, newest first, so every document needs one
+    now = datetime.utcnow()
+
     # Insert products
-    await db.products.insert_many(PRODUCTS_DATA)
+    await db.products.insert_many([{**product, "created_at": now - timedelta(minutes=i)}
+                                   for i, product in enumerate(PRODUCTS_DATA)])
     print(f"Inserted {len(PRODUCTS_DATA)} products")
 
     # Insert reviews
-    await db.reviews.insert_many(REVIEWS_DATA)
+    await db.reviews.insert_many([{**review, "created_at": now - timedelta(minutes=i)}
+                                  for i, review in enumerate(REVIEWS_DATA)])
     print(f"Inserted {len(REVIEWS_DATA)} reviews")
 
     print("Database seeding completed!")
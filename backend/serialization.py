@@ -0,0 +1,108 @@
+# Fast path for list responses built from stored documents
+#
+# List routes project just the model's fields at the query and hand the dicts
+# straight to orjson: no model instances, no response_model re-validation, no
+# jsonable_encoder pass. Most documents already have the shape the model would
+# produce, which a per-field type check confirms cheaply; the rest (written
+# before a field existed or changed type, like int prices or string dates) get
+# defaults filled and values coerced by the same validators the model uses.
+
+import logging
+from datetime import datetime
+from functools import lru_cache
+from typing import Annotated, Any, Callable, List, Optional, Sequence, Tuple, Type, Union, get_args, get_origin
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidFields(ValueError):
+    # fields= named something the model doesn't have
+    pass
+
+
+@lru_cache(maxsize=None)
+def response_fields(model: Type[BaseModel]) -> Tuple[str, ...]:
+    return tuple(model.model_fields)
+
+
+def requested_fields(model: Type[BaseModel], summary: Type[BaseModel], view: str,
+                     fields: Optional[str] = None) -> Tuple[str, ...]:
+    # fields= ("name,price") wins over view=summary|full; id always comes back so rows stay addressable
+    if not fields:
+        return response_fields(summary if view == "summary" else model)
+    names = tuple(dict.fromkeys(["id", *(name.strip() for name in fields.split(",") if name.strip())]))
+    unknown = [name for name in names if name not in model.model_fields]
+    if unknown:
+        raise InvalidFields(f"Unknown fields: {', '.join(unknown)}")
+    return names
+
+
+def _shape_check(annotation) -> Callable[[Any], bool]:
+    # True when a stored value is already what the field's validator would return.
+    # Exact types for scalars, so ints in float fields and strings in datetime fields fail;
+    # container contents and anything else aren't inspected.
+    nullable = False
+    if get_origin(annotation) is Union:
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        nullable = len(args) < len(get_args(annotation))
+        annotation = args[0] if len(args) == 1 else Any
+    kind = get_origin(annotation) or annotation
+    if kind in (str, int, float, bool):
+        check = lambda value: type(value) is kind
+    elif kind in (datetime, list, dict):
+        check = lambda value: isinstance(value, kind)
+    else:
+        check = lambda value: True
+    if nullable:
+        return lambda value: value is None or check(value)
+    return check
+
+
+@lru_cache(maxsize=None)
+def _field_checks(model: Type[BaseModel]) -> Tuple[Tuple[str, Any, Callable[[Any], bool]], ...]:
+    return tuple((name, field, _shape_check(field.annotation)) for name, field in model.model_fields.items())
+
+
+@lru_cache(maxsize=None)
+def _field_adapter(model: Type[BaseModel], name: str) -> TypeAdapter:
+    field = model.model_fields[name]
+    if not field.metadata:
+        return TypeAdapter(field.annotation)
+    return TypeAdapter(Annotated[(field.annotation, *field.metadata)])
+
+
+def _conform(model: Type[BaseModel], doc: dict, checks) -> bool:
+    # Brings one document to the model's shape in place; False if it can't be (a required field is missing
+    # or a value doesn't validate), and the caller drops it as model construction would have refused it
+    for name, field, check in checks:
+        if name not in doc:
+            if field.is_required():
+                return False
+            doc[name] = field.get_default(call_default_factory=True)
+        elif not check(doc[name]):
+            try:
+                doc[name] = _field_adapter(model, name).validate_python(doc[name])
+            except ValidationError:
+                return False
+    return True
+
+
+def trusted(model: Type[BaseModel], docs: List[dict], fields: Optional[Sequence[str]] = None) -> List[dict]:
+    # Conforms docs in place to what model construction would return, checking only the fields being sent.
+    # With fields, docs are trimmed to exactly those keys (projections also return the sort key).
+    checks = _field_checks(model)
+    wanted = set(fields) if fields is not None else None
+    if wanted is not None:
+        checks = tuple(check for check in checks if check[0] in wanted)
+    conformed = []
+    for doc in docs:
+        if wanted is not None:
+            for key in doc.keys() - wanted:
+                del doc[key]
+        if _conform(model, doc, checks):
+            conformed.append(doc)
+        else:
+            logger.warning(f"Skipping malformed {model.__name__} {doc.get('id')!r} in list response")
+    return conformed
@@ -1,44 +1,66 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, HTTPException, Query, Request, Response
 from dotenv import load_dotenv
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import asyncio
+import secrets
+import json
+import orjson
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, ValidationError
+from typing import Any, Dict, List, Optional, Tuple, Union
 import uuid
 from datetime import datetime
-from decimal import Decimal
 
 # AI agents
-from ai_agents.agents import AgentConfig, SearchAgent, ChatAgent
+from ai_agents.agents import AgentConfig
+from ai_agents.limiter import PRIORITY_BACKGROUND, Overloaded
+from ai_agents.registry import AgentRegistry
+
+# Keyset pagination
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursor
+
+# Storage backends
+from storage import MemoryStorage, MongoStorage
+
+# Dashboard counter reconciliation
+from counters import run_reconciliation
+
+# Catalog response cache
+from cache import TTLCache, cached_body, etag_matches
+
+# Server-side order pricing
+from pricing import PriceIndex, PricingError, price_items, to_money
+
+# Streaming exports
+from export import naive_utc, ndjson_stream, orders_csv_stream
+
+# Product rating aggregates
+from ratings import empty_ratings
+
+# Full-text product search
+from search import SearchTimeout, normalize_allergens
+
+# Real-time order feed
+from live import LiveFeed
+
+# Prometheus metrics
+from metrics import CONTENT_TYPE, REGISTRY, MetricsMiddleware, cache_metrics, observe_llm_call
+
+# Per-request profiling for admins
+from profiling import ProfileStore, ProfilingMiddleware
+
+# Unvalidated serialization for list routes
+from serialization import InvalidFields, requested_fields, response_fields, trusted
 
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB with fallback
-try:
-    mongo_url = os.environ['MONGO_URL']
-    client = AsyncIOMotorClient(mongo_url)
-    db = client[os.environ['DB_NAME']]
-    # Test connection
-    async def test_db():
-        try:
-            await client.admin.command('ismaster')
-            return True
-        except:
-            return False
-    db_available = True
-except Exception as e:
-    print(f"Warning: MongoDB connection failed: {e}")
-    print("Using mock database for development")
-    client = None
-    db = None
-    db_available = False
-
-# Mock database for development
+# Seed data for the in-memory store
 mock_reviews = [
     {
         "id": "review_001",
@@ -68,14 +90,59 @@ mock_reviews = [
         "created_at": datetime.utcnow()
     }
 ]
-mock_products = []
-mock_orders = []
-mock_status_checks = []
+
+# MongoDB with in-memory fallback
+try:
+    mongo_url = os.environ['MONGO_URL']
+    client = AsyncIOMotorClient(mongo_url)
+    storage = MongoStorage(client[os.environ['DB_NAME']])
+except Exception as e:
+    print(f"Warning: MongoDB connection failed: {e}")
+    print("Using mock database for development")
+    storage = MemoryStorage(seed={"reviews": mock_reviews})
+
+# Dashboard counter reconciliation
+COUNTERS_RECONCILE_INTERVAL = float(os.getenv("COUNTERS_RECONCILE_INTERVAL", "3600"))
+reconcile_task: Optional[asyncio.Task] = None
+
+# Product catalog cache: list pages by query, single products by id
+PRODUCT_CACHE_TTL = float(os.getenv("PRODUCT_CACHE_TTL", "60"))
+product_list_cache = TTLCache(maxsize=int(os.getenv("PRODUCT_LIST_CACHE_SIZE", "128")), ttl=PRODUCT_CACHE_TTL)
+product_cache = TTLCache(maxsize=int(os.getenv("PRODUCT_CACHE_SIZE", "1024")), ttl=PRODUCT_CACHE_TTL)
+
+# Catalog prices used to total orders
+price_index = PriceIndex(ttl=float(os.getenv("PRICE_INDEX_TTL", "300")))
+
+# Latency budget for /products/search; Mongo aborts the query past it
+SEARCH_MAX_TIME_MS = int(os.getenv("SEARCH_MAX_TIME_MS", "200"))
+
+# Live order feed: per-client queue bound, replay history for reconnects, idle keepalive
+order_feed = LiveFeed(
+    queue_size=int(os.getenv("ORDERS_LIVE_QUEUE_SIZE", "100")),
+    history=int(os.getenv("ORDERS_LIVE_HISTORY", "1000")),
+)
+ORDERS_LIVE_HEARTBEAT = float(os.getenv("ORDERS_LIVE_HEARTBEAT", "15"))
+
+# Tokens handed out by /admin/login; they gate request profiling and its reports
+admin_tokens = TTLCache(maxsize=1000, ttl=float(os.getenv("ADMIN_TOKEN_TTL", "43200")))
+
+# Finished request profiles, newest kept
+profile_store = ProfileStore(maxlen=int(os.getenv("PROFILE_HISTORY", "20")))
+
+# Rows per cursor batch when streaming exports
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+# Largest batch accepted by the bulk ingestion routes
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "1000"))
 
 # AI agents init
 agent_config = AgentConfig()
-search_agent: Optional[SearchAgent] = None
-chat_agent: Optional[ChatAgent] = None
+# Agents are built once at startup and shared by every request
+agent_registry = AgentRegistry(agent_config, observer=observe_llm_call)
+
+# Chat session ids are minted by the server, never chosen by clients: an id is an
+# unguessable capability for its conversation, so only its holder can continue or end it
+chat_sessions = TTLCache(maxsize=agent_config.max_sessions, ttl=agent_config.session_ttl)
 
 # Main app
 app = FastAPI(title="AI Agents API", description="Minimal AI Agents API with LangGraph and MCP support")
@@ -106,6 +173,10 @@ class Product(BaseModel):
     allergens: List[str] = Field(default_factory=list)
     available: bool = True
     prep_time_hours: int = 24  # hours notice needed
+    # Aggregates over approved reviews, maintained by the review routes
+    avg_rating: float = 0.0
+    review_count: int = 0
+    rating_histogram: Dict[str, int] = Field(default_factory=lambda: empty_ratings()["rating_histogram"])
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -141,6 +212,14 @@ class OrderItem(BaseModel):
     price: float
 
 
+class OrderItemCreate(BaseModel):
+    product_id: str
+    quantity: int = Field(ge=1)
+    # Accepted for older clients; name and price always come from the catalog
+    product_name: Optional[str] = None
+    price: Optional[float] = None
+
+
 class Order(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     customer_name: str
@@ -156,13 +235,16 @@ class Order(BaseModel):
     special_instructions: Optional[str] = None
 
 
+ORDER_STATUSES = ["pending", "confirmed", "preparing", "ready", "delivered", "cancelled"]
+
+
 class OrderCreate(BaseModel):
     customer_name: str
     customer_email: str
     customer_phone: str
     delivery_address: str
     delivery_notes: Optional[str] = None
-    items: List[OrderItem]
+    items: List[OrderItemCreate] = Field(min_length=1)
     delivery_date: Optional[datetime] = None
     special_instructions: Optional[str] = None
 
@@ -192,6 +274,117 @@ class ReviewUpdate(BaseModel):
     approved: bool
 
 
+# Slim rows for view=summary: what list screens show, without the detail fields
+class ProductSummary(BaseModel):
+    id: str
+    name: str
+    price: float
+    category: str
+    image_url: str
+    available: bool = True
+    avg_rating: float = 0.0
+    review_count: int = 0
+
+
+class OrderSummary(BaseModel):
+    id: str
+    customer_name: str
+    total_amount: float
+    status: str = "pending"
+    order_date: datetime
+    delivery_date: Optional[datetime] = None
+
+
+class ReviewSummary(BaseModel):
+    id: str
+    customer_name: str
+    rating: int
+    comment: str
+    product_id: Optional[str] = None
+    created_at: datetime
+
+
+# Paginated list responses
+# Schemas for the docs only: list routes serialize stored documents themselves (see serialization.trusted)
+class StatusCheckPage(BaseModel):
+    items: List[StatusCheck]
+    next_cursor: Optional[str] = None
+
+
+class ProductPage(BaseModel):
+    items: List[Product]
+    next_cursor: Optional[str] = None
+
+
+class OrderPage(BaseModel):
+    items: List[Order]
+    next_cursor: Optional[str] = None
+
+
+class ReviewPage(BaseModel):
+    items: List[Review]
+    next_cursor: Optional[str] = None
+
+
+class ProductSummaryPage(BaseModel):
+    items: List[ProductSummary]
+    next_cursor: Optional[str] = None
+
+
+class OrderSummaryPage(BaseModel):
+    items: List[OrderSummary]
+    next_cursor: Optional[str] = None
+
+
+class ReviewSummaryPage(BaseModel):
+    items: List[ReviewSummary]
+    next_cursor: Optional[str] = None
+
+
+# Bulk ingestion results, one entry per submitted item
+class BulkItemResult(BaseModel):
+    index: int
+    success: bool
+    id: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BulkInsertResponse(BaseModel):
+    inserted: int
+    failed: int
+    results: List[BulkItemResult]
+
+
+# Bulk order status transitions: explicit pairs or filter + target status
+class OrderStatusChange(BaseModel):
+    order_id: str
+    status: str
+
+
+class OrderStatusFilter(BaseModel):
+    status: str
+
+
+class BulkOrderStatusUpdate(BaseModel):
+    updates: Optional[List[OrderStatusChange]] = None
+    filter: Optional[OrderStatusFilter] = None
+    status: Optional[str] = None
+
+
+class OrderStatusResult(BaseModel):
+    order_id: str
+    matched: bool
+    modified: bool
+    previous_status: Optional[str] = None
+
+
+class BulkOrderStatusResponse(BaseModel):
+    matched: int
+    modified: int
+    truncated: bool = False
+    results: List[OrderStatusResult]
+
+
 # Admin authentication models
 class AdminLoginRequest(BaseModel):
     username: str
@@ -207,6 +400,10 @@ class ChatRequest(BaseModel):
     message: str
     agent_type: str = "chat"  # "chat" or "search"
     context: Optional[dict] = None
+    # Server-side history: new_session starts one and the response carries its id;
+    # later turns send that session_id back
+    session_id: Optional[str] = Field(None, max_length=128)
+    new_session: bool = False
 
 
 class ChatResponse(BaseModel):
@@ -216,6 +413,7 @@ class ChatResponse(BaseModel):
     capabilities: List[str]
     metadata: dict = Field(default_factory=dict)
     error: Optional[str] = None
+    session_id: Optional[str] = None
 
 
 class SearchRequest(BaseModel):
@@ -240,211 +438,557 @@ async def root():
 async def create_status_check(input: StatusCheckCreate):
     status_dict = input.dict()
     status_obj = StatusCheck(**status_dict)
-    _ = await db.status_checks.insert_one(status_obj.dict())
+    await storage.status_checks.insert(status_obj.dict())
     return status_obj
 
-@api_router.get("/status", response_model=List[StatusCheck])
-async def get_status_checks():
-    status_checks = await db.status_checks.find().to_list(1000)
-    return [StatusCheck(**status_check) for status_check in status_checks]
+@api_router.get("/status", response_class=ORJSONResponse, responses={200: {"model": StatusCheckPage}})
+async def get_status_checks(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
+    # Newest first, like the other list routes; follow next_cursor for older checks
+    status_checks, next_cursor = await find_page(
+        storage.status_checks, {}, limit, cursor, fields=response_fields(StatusCheck)
+    )
+    return ORJSONResponse({"items": trusted(StatusCheck, status_checks), "next_cursor": next_cursor})
 
 
 # Product routes
+def invalidate_product_cache(product_id: Optional[str] = None):
+    # Any product write can change any list page
+    product_list_cache.clear()
+    if product_id:
+        product_cache.invalidate(product_id)
+
+
+def etag_response(request: Request, entry) -> Response:
+    # no-cache: clients may store the body but must revalidate, which costs a 304 at most
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+def list_fields(model, summary, view: str, fields: Optional[str]) -> Tuple[str, ...]:
+    # view=summary picks the slim model's fields; fields=name,price picks any subset and wins
+    try:
+        return requested_fields(model, summary, view, fields)
+    except InvalidFields as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def find_page(repository, filters: dict, limit: int, cursor: Optional[str], fields=None):
+    # List routes pass their model's fields; the projection happens in the query
+    try:
+        return await repository.find_page(filters, limit, cursor, fields=fields)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def validation_message(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" for e in error.errors())
+
+
+def validate_batch(model, items: List[Dict[str, Any]]) -> Tuple[list, Dict[int, str]]:
+    # Validate every item up front; invalid ones are reported, never raised
+    if len(items) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch too large. Max {BULK_MAX_ITEMS} items")
+    valid, errors = [], {}
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, model(**item)))
+        except ValidationError as e:
+            errors[index] = validation_message(e)
+    return valid, errors
+
+
+async def insert_batch(repository, valid: list, errors: Dict[int, str], total: int) -> BulkInsertResponse:
+    # One unordered insert_many; per-item failures come back by position
+    docs = [obj.dict() for _, obj in valid]
+    write_errors = await repository.insert_many(docs)
+
+    results = [BulkItemResult(index=i, success=False, error=msg) for i, msg in errors.items()]
+    for (index, obj), write_error in zip(valid, write_errors):
+        if write_error:
+            results.append(BulkItemResult(index=index, success=False, id=obj.id, error=write_error))
+        else:
+            results.append(BulkItemResult(index=index, success=True, id=obj.id))
+    results.sort(key=lambda r: r.index)
+
+    inserted = sum(1 for r in results if r.success)
+    return BulkInsertResponse(inserted=inserted, failed=total - inserted, results=results)
+
+
+def inserted_objects(valid: list, response: BulkInsertResponse) -> list:
+    succeeded = {r.index for r in response.results if r.success}
+    return [obj for index, obj in valid if index in succeeded]
+
+
 @api_router.post("/products", response_model=Product)
 async def create_product(product: ProductCreate):
     product_dict = product.dict()
     product_obj = Product(**product_dict)
-    await db.products.insert_one(product_obj.dict())
+    await storage.products.insert(product_obj.dict())
+    await storage.bump_counters(total_products=1, available_products=int(product_obj.available))
+    invalidate_product_cache()
+    price_index.upsert(product_obj.dict())
     return product_obj
 
 
-@api_router.get("/products", response_model=List[Product])
-async def get_products(category: Optional[str] = None, available_only: bool = True):
+@api_router.post("/products/bulk", response_model=BulkInsertResponse)
+async def create_products_bulk(items: List[Dict[str, Any]]):
+    valid, errors = validate_batch(ProductCreate, items)
+    valid = [(index, Product(**product.dict())) for index, product in valid]
+
+    response = await insert_batch(storage.products, valid, errors, len(items))
+    created = inserted_objects(valid, response)
+    await storage.bump_counters(
+        total_products=len(created),
+        available_products=sum(1 for product in created if product.available)
+    )
+    if created:
+        invalidate_product_cache()
+    for product in created:
+        price_index.upsert(product.dict())
+    return response
+
+
+@api_router.get("/products", responses={200: {"model": Union[ProductPage, ProductSummaryPage]}})
+async def get_products(
+    request: Request,
+    category: Optional[str] = None,
+    available_only: bool = True,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    view: str = Query("full", pattern="^(summary|full)$"),
+    fields: Optional[str] = None,
+):
+    selected = list_fields(Product, ProductSummary, view, fields)
+    cache_key = (category, available_only, limit, cursor, selected)
+    entry = product_list_cache.get(cache_key)
+    if entry is not None:
+        return etag_response(request, entry)
+    # A write during the read below makes this fill stale; set() then skips it
+    generation = product_list_cache.generation
+
     query = {}
     if category:
         query["category"] = category
     if available_only:
         query["available"] = True
 
-    products = await db.products.find(query).sort("created_at", -1).to_list(1000)
-    return [Product(**product) for product in products]
+    products, next_cursor = await find_page(storage.products, query, limit, cursor, fields=selected)
+    entry = cached_body(orjson.dumps({"items": trusted(Product, products, selected), "next_cursor": next_cursor}))
+    product_list_cache.set(cache_key, entry, generation)
+    return etag_response(request, entry)
+
+
+@api_router.get("/products/top-rated", responses={200: {"model": List[Product]}})
+async def get_top_rated_products(
+    request: Request,
+    limit: int = Query(10, ge=1, le=50),
+    min_reviews: int = Query(1, ge=0),
+    category: Optional[str] = None,
+):
+    # Served from the products_top_rated index; cleared with the other list pages
+    cache_key = ("top-rated", limit, min_reviews, category)
+    entry = product_list_cache.get(cache_key)
+    if entry is not None:
+        return etag_response(request, entry)
+    # A write during the read below makes this fill stale; set() then skips it
+    generation = product_list_cache.generation
+
+    query: Dict[str, Any] = {"available": True}
+    if min_reviews:
+        query["review_count"] = {"$gte": min_reviews}
+    if category:
+        query["category"] = category
+
+    products = await storage.products.top(query, limit, fields=response_fields(Product))
+    entry = cached_body(orjson.dumps(trusted(Product, products)))
+    product_list_cache.set(cache_key, entry, generation)
+    return etag_response(request, entry)
+
+
+@api_router.get("/products/search", responses={200: {"model": List[Product]}})
+async def search_products(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=50),
+    exclude_allergens: List[str] = Query([]),
+    category: Optional[str] = None,
+):
+    # Mongo text index when connected, in-process BM25 index on the mock store
+    allergens = normalize_allergens(exclude_allergens)
+    cache_key = ("search", " ".join(q.lower().split()), limit, tuple(sorted(allergens)), category)
+    entry = product_list_cache.get(cache_key)
+    if entry is not None:
+        return etag_response(request, entry)
+    # A write during the read below makes this fill stale; set() then skips it
+    generation = product_list_cache.generation
+
+    query: Dict[str, Any] = {"available": True}
+    if category:
+        query["category"] = category
+
+    try:
+        products = await storage.products.search(
+            q, query, limit, exclude={"allergens": allergens}, max_time_ms=SEARCH_MAX_TIME_MS,
+            fields=response_fields(Product),
+        )
+    except SearchTimeout:
+        raise HTTPException(status_code=503, detail="Search took too long, try a more specific query")
+
+    entry = cached_body(orjson.dumps(trusted(Product, products)))
+    product_list_cache.set(cache_key, entry, generation)
+    return etag_response(request, entry)
 
 
 @api_router.get("/products/{product_id}", response_model=Product)
-async def get_product(product_id: str):
-    product = await db.products.find_one({"id": product_id})
+async def get_product(request: Request, product_id: str):
+    entry = product_cache.get(product_id)
+    if entry is not None:
+        return etag_response(request, entry)
+    generation = product_cache.generation
+
+    product = await storage.products.get(product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
-    return Product(**product)
+
+    entry = cached_body(Product(**product).model_dump_json().encode())
+    product_cache.set(product_id, entry, generation)
+    return etag_response(request, entry)
 
 
 @api_router.put("/products/{product_id}", response_model=Product)
 async def update_product(product_id: str, product_update: ProductUpdate):
     update_data = {k: v for k, v in product_update.dict().items() if v is not None}
-    if update_data:
-        update_data["updated_at"] = datetime.utcnow()
-        await db.products.update_one(
-            {"id": product_id},
-            {"$set": update_data}
-        )
-
-    updated_product = await db.products.find_one({"id": product_id})
-    if not updated_product:
+    if not update_data:
+        product = await storage.products.get(product_id)
+        if not product:
+            raise HTTPException(status_code=404, detail="Product not found")
+        return Product(**product)
+
+    update_data["updated_at"] = datetime.utcnow()
+    # Pre-image tells us whether availability flipped
+    previous = await storage.products.update(product_id, update_data)
+    if not previous:
         raise HTTPException(status_code=404, detail="Product not found")
+
+    updated_product = {**previous, **update_data}
+    await storage.bump_counters(
+        available_products=int(updated_product["available"]) - int(previous.get("available", True))
+    )
+    invalidate_product_cache(product_id)
+    price_index.upsert(updated_product)
     return Product(**updated_product)
 
 
 @api_router.delete("/products/{product_id}")
 async def delete_product(product_id: str):
-    result = await db.products.delete_one({"id": product_id})
-    if result.deleted_count == 0:
+    deleted = await storage.products.delete(product_id)
+    if not deleted:
         raise HTTPException(status_code=404, detail="Product not found")
+    await storage.bump_counters(total_products=-1, available_products=-int(deleted.get("available", True)))
+    invalidate_product_cache(product_id)
+    price_index.invalidate(product_id)
     return {"message": "Product deleted successfully"}
 
 
 # Order routes
+def priced_order(order: OrderCreate, entries) -> Order:
+    # Raises PricingError for unknown or unavailable products
+    items, total = price_items(order.items, entries)
+    order_dict = order.dict()
+    order_dict["items"] = items
+    order_dict["total_amount"] = to_money(total)
+    return Order(**order_dict)
+
+
 @api_router.post("/orders", response_model=Order)
 async def create_order(order: OrderCreate):
-    # Calculate total amount
-    total_amount = sum(item.price * item.quantity for item in order.items)
-
-    order_dict = order.dict()
-    order_dict["total_amount"] = total_amount
-    order_obj = Order(**order_dict)
+    # Totals come from catalog prices, resolved in one lookup for all items
+    entries = await price_index.resolve(storage.products, (item.product_id for item in order.items))
+    try:
+        order_obj = priced_order(order, entries)
+    except PricingError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    await db.orders.insert_one(order_obj.dict())
+    await storage.orders.insert(order_obj.dict())
+    await storage.bump_counters(total_orders=1, pending_orders=int(order_obj.status == "pending"))
     return order_obj
 
 
-@api_router.get("/orders", response_model=List[Order])
-async def get_orders(status: Optional[str] = None):
+@api_router.post("/orders/bulk", response_model=BulkInsertResponse)
+async def create_orders_bulk(items: List[Dict[str, Any]]):
+    valid, errors = validate_batch(OrderCreate, items)
+    # One price lookup covers every product in the batch
+    entries = await price_index.resolve(
+        storage.products, (item.product_id for _, order in valid for item in order.items)
+    )
+    priced = []
+    for index, order in valid:
+        try:
+            priced.append((index, priced_order(order, entries)))
+        except PricingError as e:
+            errors[index] = str(e)
+    valid = priced
+
+    response = await insert_batch(storage.orders, valid, errors, len(items))
+    created = inserted_objects(valid, response)
+    await storage.bump_counters(
+        total_orders=len(created),
+        pending_orders=sum(1 for order in created if order.status == "pending")
+    )
+    return response
+
+
+@api_router.get("/orders", response_class=ORJSONResponse, responses={200: {"model": Union[OrderPage, OrderSummaryPage]}})
+async def get_orders(
+    status: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    view: str = Query("full", pattern="^(summary|full)$"),
+    fields: Optional[str] = None,
+):
+    selected = list_fields(Order, OrderSummary, view, fields)
     query = {}
     if status:
         query["status"] = status
 
-    orders = await db.orders.find(query).sort("order_date", -1).to_list(1000)
-    return [Order(**order) for order in orders]
+    orders, next_cursor = await find_page(storage.orders, query, limit, cursor, fields=selected)
+    return ORJSONResponse({"items": trusted(Order, orders, selected), "next_cursor": next_cursor})
+
+
+@api_router.get("/orders/export")
+async def export_orders(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    status: Optional[str] = None,
+):
+    # Streams oldest-first straight from the cursor; nothing is buffered beyond one batch.
+    # Bounds are normalized before the response starts, since errors after that truncate it.
+    start = naive_utc(start) if start else None
+    end = naive_utc(end) if end else None
+    if start and end and start >= end:
+        raise HTTPException(status_code=400, detail="'from' must be earlier than 'to'")
+
+    filters = {"status": status} if status else {}
+    docs = storage.orders.stream(filters, start, end, batch_size=EXPORT_BATCH_SIZE)
+    if format == "csv":
+        body, media_type = orders_csv_stream(docs), "text/csv"
+    else:
+        body, media_type = ndjson_stream(docs), "application/x-ndjson"
+
+    filename = f"orders-{datetime.utcnow():%Y%m%dT%H%M%S}.{format}"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@api_router.get("/orders/live")
+async def live_orders(
+    request: Request,
+    last_event_id: Optional[str] = Query(None, description="Resume point when Last-Event-ID can't be sent"),
+):
+    # Server-Sent Events for order inserts and updates, fed by the storage change source
+    if not order_feed.available:
+        raise HTTPException(status_code=503, detail="Live order feed unavailable, poll /api/orders instead")
+    resume_from = request.headers.get("last-event-id") or last_event_id
+
+    async def events():
+        # Tell EventSource to reconnect quickly if the connection drops
+        yield "retry: 1000\n\n"
+        async for change in order_feed.listen(resume_from, ORDERS_LIVE_HEARTBEAT):
+            if change is None:
+                yield ": keepalive\n\n"
+            elif change.op == "reset":
+                # Resume point is gone: the client should refetch /orders, then trust the feed
+                yield sse_event("reset", {}, event_id=change.token or None)
+            else:
+                try:
+                    order = Order(**change.doc).model_dump(mode="json")
+                except ValidationError as e:
+                    logger.warning(f"Skipping malformed order in live feed: {e}")
+                    continue
+                yield sse_event(f"order_{change.op}", order, event_id=change.token)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @api_router.get("/orders/{order_id}", response_model=Order)
 async def get_order(order_id: str):
-    order = await db.orders.find_one({"id": order_id})
+    order = await storage.orders.get(order_id)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     return Order(**order)
 
 
+def check_order_status(status: str):
+    if status not in ORDER_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of: {ORDER_STATUSES}")
+
+
+@api_router.put("/orders/status", response_model=BulkOrderStatusResponse)
+async def update_order_statuses(request: BulkOrderStatusUpdate):
+    if request.updates is not None:
+        return await update_listed_order_statuses(request.updates)
+    if request.filter is not None and request.status is not None:
+        return await update_filtered_order_statuses(request.filter.status, request.status)
+    raise HTTPException(status_code=400, detail="Provide either updates, or filter and status")
+
+
+async def update_listed_order_statuses(updates: List[OrderStatusChange]) -> BulkOrderStatusResponse:
+    # Later pairs for the same order win, as they would sequentially. Explicit pairs are
+    # last-writer-wins like the single-order route; previous_status is read just before.
+    targets = {change.order_id: change.status for change in updates}
+    if len(targets) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch too large. Max {BULK_MAX_ITEMS} items")
+    for status in set(targets.values()):
+        check_order_status(status)
+
+    previous = {order["id"]: order.get("status") for order in await storage.orders.get_many(list(targets))}
+    matched, modified = await storage.orders.bulk_update(
+        {order_id: {"status": status} for order_id, status in targets.items()}
+    )
+
+    results = []
+    pending_delta = 0
+    for order_id, status in targets.items():
+        if order_id not in previous:
+            results.append(OrderStatusResult(order_id=order_id, matched=False, modified=False))
+            continue
+        old_status = previous[order_id]
+        pending_delta += int(status == "pending") - int(old_status == "pending")
+        results.append(OrderStatusResult(
+            order_id=order_id, matched=True, modified=old_status != status, previous_status=old_status
+        ))
+
+    await storage.bump_counters(pending_orders=pending_delta)
+    return BulkOrderStatusResponse(matched=matched, modified=modified, results=results)
+
+
+async def update_filtered_order_statuses(from_status: str, to_status: str) -> BulkOrderStatusResponse:
+    # Each write re-checks from_status, so an order another request moved meanwhile
+    # (say, cancelled) is left alone. Counts come from the write itself.
+    check_order_status(from_status)
+    check_order_status(to_status)
+    matching, next_cursor = await storage.orders.find_page({"status": from_status}, BULK_MAX_ITEMS, fields=["id"])
+    matched, modified = await storage.orders.bulk_update(
+        {order["id"]: {"status": to_status} for order in matching}, expected={"status": from_status}
+    )
+
+    results = [
+        OrderStatusResult(order_id=order["id"], matched=True, modified=from_status != to_status,
+                          previous_status=from_status)
+        for order in matching
+    ]
+    if matched < len(matching):
+        # Some orders moved before the write reached them and a bulk write doesn't say which,
+        # so read them back: those not at to_status now were skipped, at the status they have
+        reread = await storage.orders.get_many([result.order_id for result in results])
+        current = {order["id"]: order.get("status") for order in reread}
+        for result in results:
+            if current.get(result.order_id) != to_status:
+                result.matched = result.modified = False
+                result.previous_status = current.get(result.order_id)
+
+    # Every modified order went from from_status to to_status
+    await storage.bump_counters(pending_orders=modified * (int(to_status == "pending") - int(from_status == "pending")))
+    return BulkOrderStatusResponse(matched=matched, modified=modified, truncated=next_cursor is not None, results=results)
+
+
 @api_router.put("/orders/{order_id}/status")
 async def update_order_status(order_id: str, status: str):
-    valid_statuses = ["pending", "confirmed", "preparing", "ready", "delivered", "cancelled"]
-    if status not in valid_statuses:
-        raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of: {valid_statuses}")
+    check_order_status(status)
 
-    result = await db.orders.update_one(
-        {"id": order_id},
-        {"$set": {"status": status}}
-    )
+    previous = await storage.orders.update(order_id, {"status": status})
 
-    if result.matched_count == 0:
+    if not previous:
         raise HTTPException(status_code=404, detail="Order not found")
 
+    await storage.bump_counters(pending_orders=int(status == "pending") - int(previous.get("status") == "pending"))
     return {"message": f"Order status updated to {status}"}
 
 
 # Review routes
+async def adjust_product_rating(review: dict, delta: int):
+    # Only approved reviews count; callers pass the review as it was before the change
+    if review.get("product_id"):
+        await storage.apply_rating(review["product_id"], review["rating"], delta)
+        invalidate_product_cache(review["product_id"])
+
+
 @api_router.post("/reviews", response_model=Review)
 async def create_review(review: ReviewCreate):
     review_dict = review.dict()
     review_obj = Review(**review_dict)
 
-    if db_available and db:
-        await db.reviews.insert_one(review_obj.dict())
-    else:
-        # Use mock database
-        mock_reviews.append(review_obj.dict())
-
+    await storage.reviews.insert(review_obj.dict())
+    await storage.bump_counters(total_reviews=1, approved_reviews=int(review_obj.approved))
+    if review_obj.approved:
+        await adjust_product_rating(review_obj.dict(), 1)
     return review_obj
 
 
-@api_router.get("/reviews", response_model=List[Review])
-async def get_reviews(approved_only: bool = True, product_id: Optional[str] = None):
-    if db_available and db:
-        query = {}
-        if approved_only:
-            query["approved"] = True
-        if product_id:
-            query["product_id"] = product_id
-
-        reviews = await db.reviews.find(query).sort("created_at", -1).to_list(1000)
-        return [Review(**review) for review in reviews]
-    else:
-        # Use mock database
-        filtered_reviews = mock_reviews.copy()
-
-        if approved_only:
-            filtered_reviews = [r for r in filtered_reviews if r.get("approved", False)]
-        if product_id:
-            filtered_reviews = [r for r in filtered_reviews if r.get("product_id") == product_id]
+@api_router.get("/reviews", response_class=ORJSONResponse, responses={200: {"model": Union[ReviewPage, ReviewSummaryPage]}})
+async def get_reviews(
+    approved_only: bool = True,
+    product_id: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    view: str = Query("full", pattern="^(summary|full)$"),
+    fields: Optional[str] = None,
+):
+    selected = list_fields(Review, ReviewSummary, view, fields)
+    query = {}
+    if approved_only:
+        query["approved"] = True
+    if product_id:
+        query["product_id"] = product_id
 
-        # Sort by created_at descending
-        filtered_reviews.sort(key=lambda x: x.get("created_at", datetime.utcnow()), reverse=True)
-        return [Review(**review) for review in filtered_reviews]
+    reviews, next_cursor = await find_page(storage.reviews, query, limit, cursor, fields=selected)
+    return ORJSONResponse({"items": trusted(Review, reviews, selected), "next_cursor": next_cursor})
 
 
 @api_router.get("/reviews/{review_id}", response_model=Review)
 async def get_review(review_id: str):
-    if db_available and db:
-        review = await db.reviews.find_one({"id": review_id})
-        if not review:
-            raise HTTPException(status_code=404, detail="Review not found")
-        return Review(**review)
-    else:
-        # Use mock database
-        review = next((r for r in mock_reviews if r.get("id") == review_id), None)
-        if not review:
-            raise HTTPException(status_code=404, detail="Review not found")
-        return Review(**review)
+    review = await storage.reviews.get(review_id)
+    if not review:
+        raise HTTPException(status_code=404, detail="Review not found")
+    return Review(**review)
 
 
 @api_router.put("/reviews/{review_id}/approve", response_model=Review)
 async def approve_review(review_id: str, review_update: ReviewUpdate):
-    if db_available and db:
-        result = await db.reviews.update_one(
-            {"id": review_id},
-            {"$set": {"approved": review_update.approved}}
-        )
+    previous = await storage.reviews.update(review_id, {"approved": review_update.approved})
 
-        if result.matched_count == 0:
-            raise HTTPException(status_code=404, detail="Review not found")
+    if not previous:
+        raise HTTPException(status_code=404, detail="Review not found")
 
-        updated_review = await db.reviews.find_one({"id": review_id})
-        return Review(**updated_review)
-    else:
-        # Use mock database
-        review = next((r for r in mock_reviews if r.get("id") == review_id), None)
-        if not review:
-            raise HTTPException(status_code=404, detail="Review not found")
-
-        # Update the review in mock database
-        review["approved"] = review_update.approved
-        return Review(**review)
+    delta = int(review_update.approved) - int(previous.get("approved", False))
+    await storage.bump_counters(approved_reviews=delta)
+    if delta:
+        await adjust_product_rating(previous, delta)
+    return Review(**{**previous, "approved": review_update.approved})
 
 
 @api_router.delete("/reviews/{review_id}")
 async def delete_review(review_id: str):
-    if db_available and db:
-        result = await db.reviews.delete_one({"id": review_id})
-        if result.deleted_count == 0:
-            raise HTTPException(status_code=404, detail="Review not found")
-        return {"message": "Review deleted successfully"}
-    else:
-        # Use mock database
-        review_index = next((i for i, r in enumerate(mock_reviews) if r.get("id") == review_id), None)
-        if review_index is None:
-            raise HTTPException(status_code=404, detail="Review not found")
-
-        mock_reviews.pop(review_index)
-        return {"message": "Review deleted successfully"}
+    deleted = await storage.reviews.delete(review_id)
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Review not found")
+    await storage.bump_counters(total_reviews=-1, approved_reviews=-int(deleted.get("approved", False)))
+    if deleted.get("approved"):
+        await adjust_product_rating(deleted, -1)
+    return {"message": "Review deleted successfully"}
 
 
 # Admin authentication routes
@@ -453,8 +997,8 @@ async def admin_login(request: AdminLoginRequest):
     # Simple hardcoded admin credentials as requested
     if request.username == "admin" and request.password == "admin":
         # Generate a simple token (in production this would be a proper JWT)
-        import secrets
         token = secrets.token_urlsafe(32)
+        admin_tokens.set(token, True)
         return AdminLoginResponse(
             success=True,
             token=token,
@@ -466,81 +1010,121 @@ async def admin_login(request: AdminLoginRequest):
             message="Invalid credentials"
         )
 
+def admin_token(headers) -> Optional[str]:
+    # "Authorization: Bearer <token>" or "X-Admin-Token: <token>"
+    authorization = headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        return authorization[7:].strip()
+    return headers.get("x-admin-token")
+
+
+def is_admin(headers) -> bool:
+    token = admin_token(headers)
+    return bool(token) and admin_tokens.get(token) is not None
+
+
+def require_admin(request: Request) -> None:
+    if not is_admin(request.headers):
+        raise HTTPException(status_code=401, detail="Admin token required")
+
+
+@api_router.get("/admin/profiles")
+async def list_profiles(request: Request):
+    # Newest first; send X-Profile: 1 with an admin token on any request to add one
+    require_admin(request)
+    return profile_store.summaries()
+
+
+@api_router.get("/admin/profiles/{profile_id}")
+async def get_profile(request: Request, profile_id: str, format: str = Query("json", pattern="^(json|collapsed)$")):
+    require_admin(request)
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "collapsed":
+        # Feed to flamegraph.pl or drop into speedscope
+        return Response(content=profile["collapsed"], media_type="text/plain")
+    return profile
+
+
+@api_router.get("/admin/indexes")
+async def get_index_report(request: Request):
+    # Declared vs. actual indexes, plus per-index usage since server start
+    require_admin(request)
+    return await storage.index_report()
+
+
+@api_router.post("/admin/analytics/reconcile")
+async def reconcile_analytics(request: Request):
+    # Recount from scratch and report how far the counters had drifted
+    require_admin(request)
+    return await storage.reconcile_counters()
+
+
+@api_router.get("/admin/orders/live")
+async def get_live_feed_stats(request: Request):
+    # Connected clients, changes published and clients cut off for lagging
+    require_admin(request)
+    return order_feed.stats()
+
+
 # Analytics routes
 @api_router.get("/analytics/dashboard")
 async def get_dashboard_analytics():
-    if db_available and db:
-        # Get counts
-        total_products = await db.products.count_documents({})
-        available_products = await db.products.count_documents({"available": True})
-        total_orders = await db.orders.count_documents({})
-        pending_orders = await db.orders.count_documents({"status": "pending"})
-        total_reviews = await db.reviews.count_documents({})
-        approved_reviews = await db.reviews.count_documents({"approved": True})
-
-        # Get recent orders
-        recent_orders = await db.orders.find().sort("order_date", -1).limit(5).to_list(5)
-        recent_orders_data = [Order(**order) for order in recent_orders]
-
-        # Get pending reviews
-        pending_reviews = await db.reviews.find({"approved": False}).sort("created_at", -1).limit(10).to_list(10)
-        pending_reviews_data = [Review(**review) for review in pending_reviews]
-    else:
-        # Use mock database
-        total_products = len(mock_products)
-        available_products = len([p for p in mock_products if p.get("available", True)])
-        total_orders = len(mock_orders)
-        pending_orders = len([o for o in mock_orders if o.get("status") == "pending"])
-        total_reviews = len(mock_reviews)
-        approved_reviews = len([r for r in mock_reviews if r.get("approved", False)])
-
-        # Recent orders (empty for mock)
-        recent_orders_data = []
-
-        # Pending reviews
-        pending_reviews_data = [Review(**r) for r in mock_reviews if not r.get("approved", False)]
+    # O(1) counters read alongside the two index-backed top-N queries
+    counts, activity = await asyncio.gather(storage.read_counters(), storage.recent_activity())
+    stats = {**counts, **activity}
 
     return {
         "products": {
-            "total": total_products,
-            "available": available_products
+            "total": stats["total_products"],
+            "available": stats["available_products"]
         },
         "orders": {
-            "total": total_orders,
-            "pending": pending_orders
+            "total": stats["total_orders"],
+            "pending": stats["pending_orders"]
         },
         "reviews": {
-            "total": total_reviews,
-            "approved": approved_reviews,
-            "pending": total_reviews - approved_reviews
+            "total": stats["total_reviews"],
+            "approved": stats["approved_reviews"],
+            "pending": stats["total_reviews"] - stats["approved_reviews"]
         },
-        "recent_orders": recent_orders_data,
-        "pending_reviews": pending_reviews_data
+        "recent_orders": [Order(**order) for order in stats["recent_orders"]],
+        "pending_reviews": [Review(**review) for review in stats["pending_reviews"]]
     }
 
 
 # AI agent routes
+def overloaded_error(e: Overloaded) -> HTTPException:
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+
+def chat_session(request: ChatRequest) -> Optional[str]:
+    # The session to run this turn in, or None for a stateless (cacheable) call
+    if request.session_id is None and not request.new_session:
+        return None
+    if agent_config.session_ttl <= 0:
+        raise HTTPException(status_code=400, detail="Conversation memory is disabled")
+    session_id = request.session_id
+    if session_id is None:
+        session_id = secrets.token_urlsafe(24)
+    elif chat_sessions.get(session_id) is None:
+        raise HTTPException(status_code=404, detail="Session not found or expired; start a new one")
+    # Re-set on every turn so the id lives as long as the conversation's memory
+    chat_sessions.set(session_id, True)
+    return session_id
+
+
 @api_router.post("/chat", response_model=ChatResponse)
 async def chat_with_agent(request: ChatRequest):
     # Chat with AI agent
-    global search_agent, chat_agent
-    
+    session_id = chat_session(request)
     try:
-        # Init agents if needed
-        if request.agent_type == "search" and search_agent is None:
-            search_agent = SearchAgent(agent_config)
-            
-        elif request.agent_type == "chat" and chat_agent is None:
-            chat_agent = ChatAgent(agent_config)
-        
         # Select agent
-        agent = search_agent if request.agent_type == "search" else chat_agent
-        
-        if agent is None:
-            raise HTTPException(status_code=500, detail="Failed to initialize agent")
+        agent = await agent_registry.get("search" if request.agent_type == "search" else "chat")
         
         # Execute agent
-        response = await agent.execute(request.message)
+        response = await agent.execute(request.message, session_id=session_id)
         
         return ChatResponse(
             success=response.success,
@@ -548,9 +1132,12 @@ async def chat_with_agent(request: ChatRequest):
             agent_type=request.agent_type,
             capabilities=agent.get_capabilities(),
             metadata=response.metadata,
-            error=response.error
+            error=response.error,
+            session_id=session_id
         )
         
+    except Overloaded as e:
+        raise overloaded_error(e)
     except Exception as e:
         logger.error(f"Error in chat endpoint: {e}")
         return ChatResponse(
@@ -562,19 +1149,46 @@ async def chat_with_agent(request: ChatRequest):
         )
 
 
+def sse_event(event: str, data: Any, event_id: Optional[str] = None) -> str:
+    prefix = f"id: {event_id}\n" if event_id else ""
+    return f"{prefix}event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@api_router.post("/chat/stream")
+async def stream_chat(request: ChatRequest):
+    # Same agents as /chat, but tokens go out as Server-Sent Events while the model generates
+    session_id = chat_session(request)
+    agent = await agent_registry.get("search" if request.agent_type == "search" else "chat")
+
+    # Wait for the first event so a full queue can still become a plain 503
+    stream = agent.stream(request.message, session_id=session_id)
+    try:
+        first = await stream.__anext__()
+    except Overloaded as e:
+        raise overloaded_error(e)
+
+    async def events():
+        yield sse_event(first["event"], first["data"])
+        async for event in stream:
+            yield sse_event(event["event"], event["data"])
+
+    # Keep proxies from buffering the stream into one response
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    if session_id:
+        headers["X-Session-Id"] = session_id
+    return StreamingResponse(events(), media_type="text/event-stream", headers=headers)
+
+
 @api_router.post("/search", response_model=SearchResponse)
 async def search_and_summarize(request: SearchRequest):
     # Web search with AI summary
-    global search_agent
-    
     try:
-        # Init search agent if needed
-        if search_agent is None:
-            search_agent = SearchAgent(agent_config)
+        search_agent = await agent_registry.get("search")
         
         # Search with agent
         search_prompt = f"Search for information about: {request.query}. Provide a comprehensive summary with key findings."
-        result = await search_agent.execute(search_prompt, use_tools=True)
+        # Interactive chat is admitted ahead of search when the model is saturated
+        result = await search_agent.execute(search_prompt, use_tools=True, priority=PRIORITY_BACKGROUND)
         
         if result.success:
             return SearchResponse(
@@ -593,6 +1207,8 @@ async def search_and_summarize(request: SearchRequest):
                 error=result.error
             )
             
+    except Overloaded as e:
+        raise overloaded_error(e)
     except Exception as e:
         logger.error(f"Error in search endpoint: {e}")
         return SearchResponse(
@@ -604,13 +1220,60 @@ async def search_and_summarize(request: SearchRequest):
         )
 
 
+@api_router.get("/admin/agents/cache")
+async def get_agent_cache_stats(request: Request):
+    # Hit/miss counters for agents that have been created so far
+    require_admin(request)
+    return {
+        f"{name}_agent": agent.cache.stats() if agent.cache else None
+        for name, agent in agent_registry.agents.items()
+    }
+
+
+@api_router.get("/admin/agents/coalescing")
+async def get_agent_coalescing_stats(request: Request):
+    # How many identical concurrent calls rode along on another call's upstream request
+    require_admin(request)
+    return {f"{name}_agent": agent.inflight.stats() for name, agent in agent_registry.agents.items()}
+
+
+@api_router.delete("/chat/sessions/{session_id}")
+async def end_chat_session(session_id: str):
+    # Only ids this server issued, so knowing one is the proof of ownership
+    if chat_sessions.get(session_id) is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    chat_sessions.invalidate(session_id)
+    # Forget the conversation on every agent that holds it
+    for agent in agent_registry.agents.values():
+        if agent.sessions:
+            agent.sessions.drop(session_id)
+    return {"message": "Session ended"}
+
+
+@api_router.get("/admin/agents/sessions")
+async def get_agent_session_stats(request: Request):
+    require_admin(request)
+    return {
+        f"{name}_agent": agent.sessions.stats() if agent.sessions else None
+        for name, agent in agent_registry.agents.items()
+    }
+
+
+@api_router.get("/admin/agents/limits")
+async def get_agent_limit_stats(request: Request):
+    # Per-model slots, token bucket level and queue depth
+    require_admin(request)
+    return {model: limiter.stats() for model, limiter in agent_registry.limiters.items()}
+
+
 @api_router.get("/agents/capabilities")
 async def get_agent_capabilities():
     # Get agent capabilities
     try:
+        # Computed once when the registry starts
         capabilities = {
-            "search_agent": SearchAgent(agent_config).get_capabilities(),
-            "chat_agent": ChatAgent(agent_config).get_capabilities()
+            f"{name}_agent": agent_capabilities
+            for name, agent_capabilities in (await agent_registry.capabilities()).items()
         }
         return {
             "success": True,
@@ -626,6 +1289,27 @@ async def get_agent_capabilities():
 # Include router
 app.include_router(api_router)
 
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    caches = {
+        "product_list": product_list_cache.stats(),
+        "product": product_cache.stats(),
+        "price_index": price_index.stats(),
+    }
+    for name, agent in agent_registry.agents.items():
+        if agent.cache:
+            caches[f"agent_{name}"] = agent.cache.stats()
+    return caches
+
+
+REGISTRY.collector(lambda: cache_metrics(cache_stats()))
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    # Prometheus scrape target, kept outside the /api prefix the frontend calls
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -634,6 +1318,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in per request: X-Profile: 1 or ?profile=1, from an admin
+app.add_middleware(ProfilingMiddleware, authorize=is_admin, store=profile_store)
+
+# Outermost, so latency includes every other middleware
+app.add_middleware(MetricsMiddleware)
+
 # Logging config
 logging.basicConfig(
     level=logging.INFO,
@@ -644,23 +1334,68 @@ logger = logging.getLogger(__name__)
 @app.on_event("startup")
 async def startup_event():
     # Initialize agents on startup
-    global search_agent, chat_agent
     logger.info("Starting AI Agents API...")
-    
-    # Lazy agent init for faster startup
+
+    # Keyset pagination needs a sort value on every document
+    try:
+        backfilled = await storage.backfill_sort_fields()
+        if backfilled:
+            logger.info(f"Sort fields backfilled: {backfilled}")
+    except Exception as e:
+        logger.error(f"Failed to backfill sort fields: {e}")
+
+    try:
+        created = await storage.ensure_indexes()
+        logger.info(f"Indexes ensured: {created}")
+    except Exception as e:
+        logger.error(f"Failed to create indexes: {e}")
+
+    try:
+        warmed = await price_index.warm(storage.products)
+        logger.info(f"Price index warmed with {warmed} products")
+    except Exception as e:
+        logger.error(f"Failed to warm price index: {e}")
+
+    # Counters start exact and are re-verified periodically
+    global reconcile_task
+    try:
+        await storage.reconcile_counters()
+    except Exception as e:
+        logger.error(f"Failed to reconcile dashboard counters: {e}")
+    reconcile_task = asyncio.create_task(
+        run_reconciliation(storage.reconcile_counters, COUNTERS_RECONCILE_INTERVAL)
+    )
+
+    # Backfills products created before rating aggregates existed
+    try:
+        corrected = await storage.rebuild_ratings()
+        if corrected:
+            invalidate_product_cache()
+            logger.info(f"Rating aggregates rebuilt for {corrected} products")
+    except Exception as e:
+        logger.error(f"Failed to rebuild rating aggregates: {e}")
+
+    try:
+        await agent_registry.start()
+    except Exception as e:
+        # Agents are still built on first use
+        logger.error(f"Failed to start agent registry: {e}")
+
+    order_feed.start(storage.watch_orders)
+
     logger.info("AI Agents API ready!")
 
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
     # Cleanup on shutdown
-    global search_agent, chat_agent, client
+    if reconcile_task:
+        reconcile_task.cancel()
+
+    await order_feed.close()
 
-    # Close MCP
-    if search_agent and search_agent.mcp_client:
-        # MCP cleanup automatic
-        pass
+    # Drops the agents and their pooled connections
+    await agent_registry.close()
 
-    if client:
-        client.close()
+    await storage.close()
     logger.info("AI Agents API shutdown complete.")
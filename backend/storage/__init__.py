@@ -0,0 +1,14 @@
+# Storage backends behind one repository interface
+
+from .base import Repository, Storage
+from .memory import MemoryRepository, MemoryStorage
+from .mongo import MongoRepository, MongoStorage
+
+__all__ = [
+    "Repository",
+    "Storage",
+    "MemoryRepository",
+    "MemoryStorage",
+    "MongoRepository",
+    "MongoStorage"
+]
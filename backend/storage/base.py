@@ -0,0 +1,147 @@
+# Repository interface shared by the Mongo and in-memory backends
+
+import asyncio
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from analytics import PENDING_REVIEWS_LIMIT, RECENT_ORDERS_LIMIT
+from live import Change
+
+
+class Repository(ABC):
+    # One collection of documents keyed by their "id" field and listed newest-first by sort_field
+
+    def __init__(self, name: str, sort_field: str):
+        self.name = name
+        self.sort_field = sort_field
+
+    @abstractmethod
+    async def get(self, doc_id: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    async def get_many(self, doc_ids: List[str]) -> List[dict]:
+        # Unknown ids are skipped; order is unspecified
+        ...
+
+    @abstractmethod
+    async def find_page(self, filters: Dict[str, Any], limit: int, cursor: Optional[str] = None,
+                        fields: Optional[Sequence[str]] = None) -> Tuple[List[dict], Optional[str]]:
+        # Equality filters, keyset-paginated on (sort_field, id) descending; raises InvalidCursor.
+        # fields, if given, limits the returned keys (sort_field and id always come back).
+        ...
+
+    def projected_fields(self, fields: Sequence[str]) -> List[str]:
+        return list(dict.fromkeys([*fields, self.sort_field, "id"]))
+
+    @abstractmethod
+    async def top(self, filters: Dict[str, Any], limit: int, fields: Optional[Sequence[str]] = None) -> List[dict]:
+        # Highest-ranked docs by the repository's rank fields; filters may use {"$gte": value}.
+        # fields, if given, limits the returned keys.
+        ...
+
+    @abstractmethod
+    async def search(self, text: str, filters: Dict[str, Any], limit: int,
+                     exclude: Optional[Dict[str, List[str]]] = None, max_time_ms: Optional[int] = None,
+                     fields: Optional[Sequence[str]] = None) -> List[dict]:
+        # Relevance-ranked full-text matches; exclude drops docs whose list field holds any
+        # of the given values (case-insensitive). Raises SearchTimeout past max_time_ms.
+        # fields, if given, limits the returned keys.
+        ...
+
+    @abstractmethod
+    def stream(self, filters: Dict[str, Any], start: Optional[datetime] = None, end: Optional[datetime] = None,
+               batch_size: int = 500) -> AsyncIterator[dict]:
+        # Oldest-first over [start, end) on sort_field without materializing the result
+        ...
+
+    @abstractmethod
+    async def insert(self, doc: dict) -> None:
+        ...
+
+    @abstractmethod
+    async def insert_many(self, docs: List[dict]) -> List[Optional[str]]:
+        # Unordered: every doc is attempted; returns an error message or None per doc
+        ...
+
+    @abstractmethod
+    async def update(self, doc_id: str, fields: Dict[str, Any]) -> Optional[dict]:
+        # Applies fields and returns the pre-image, or None when doc_id is unknown
+        ...
+
+    @abstractmethod
+    async def bulk_update(self, updates: Dict[str, Dict[str, Any]],
+                          expected: Optional[Dict[str, Any]] = None) -> Tuple[int, int]:
+        # Applies per-id field sets in one batch, each only where the doc still equals
+        # expected (e.g. {"status": "pending"}); returns (matched, modified)
+        ...
+
+    @abstractmethod
+    async def delete(self, doc_id: str) -> Optional[dict]:
+        # Returns the deleted document, or None when doc_id is unknown
+        ...
+
+    @abstractmethod
+    async def count(self, filters: Dict[str, Any]) -> int:
+        ...
+
+
+class Storage(ABC):
+    # Collections plus the cross-collection operations the API needs
+    backend: str = ""
+
+    def __init__(self, products: Repository, orders: Repository, reviews: Repository, status_checks: Repository):
+        self.products = products
+        self.orders = orders
+        self.reviews = reviews
+        self.status_checks = status_checks
+
+    async def recent_activity(self) -> Dict[str, List[dict]]:
+        (recent_orders, _), (pending_reviews, _) = await asyncio.gather(
+            self.orders.find_page({}, RECENT_ORDERS_LIMIT),
+            self.reviews.find_page({"approved": False}, PENDING_REVIEWS_LIMIT),
+        )
+        return {"recent_orders": recent_orders, "pending_reviews": pending_reviews}
+
+    async def backfill_sort_fields(self) -> Dict[str, int]:
+        # Gives documents missing their sort field LEGACY_SORT_VALUE; returns counts by collection
+        return {}
+
+    @abstractmethod
+    async def ensure_indexes(self) -> Dict[str, List[str]]:
+        ...
+
+    @abstractmethod
+    async def index_report(self) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    async def bump_counters(self, **deltas: int) -> None:
+        ...
+
+    @abstractmethod
+    async def read_counters(self) -> Dict[str, int]:
+        ...
+
+    @abstractmethod
+    async def reconcile_counters(self) -> Dict[str, Dict[str, int]]:
+        ...
+
+    @abstractmethod
+    async def apply_rating(self, product_id: str, rating: int, delta: int) -> None:
+        # Adds (delta=1) or removes (delta=-1) one approved rating from a product's aggregates
+        ...
+
+    @abstractmethod
+    async def rebuild_ratings(self) -> int:
+        # Recount every product's aggregates from approved reviews; returns products corrected
+        ...
+
+    @abstractmethod
+    def watch_orders(self, resume_after: Optional[str] = None) -> AsyncIterator[Change]:
+        # Order inserts and updates as they happen, starting after the resume_after token
+        ...
+
+    async def close(self) -> None:
+        pass
@@ -0,0 +1,286 @@
+# Indexed in-memory storage for development and tests
+
+import asyncio
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from counters import bump_memory_counters, empty_counters, reconcile_memory_counters
+from live import Change, ChangeBus
+from pagination import LEGACY_SORT_VALUE, build_page, decode_cursor
+from ratings import TOP_RATED_RANK, applied_rating, empty_ratings, ratings_differ, ratings_from_reviews
+from search import PRODUCT_SEARCH_WEIGHTS, InvertedIndex, holds_any
+
+from .base import Repository, Storage
+
+
+def project(doc: dict, fields: Optional[Sequence[str]]) -> dict:
+    # A copy holding just fields (all of them without), like a Mongo projection
+    return {field: doc[field] for field in fields if field in doc} if fields else dict(doc)
+
+
+class MemoryRepository(Repository):
+    # Dict by id for O(1) lookups, plus (sort_value, id) lists kept sorted
+    # for the whole collection and per value of each indexed field; with a rank,
+    # also a list kept in rank order for top(), and with search weights an
+    # inverted index for search(). on_change, if set, hears every insert and update.
+
+    def __init__(self, name: str, sort_field: str, indexed_fields: Iterable[str] = (),
+                 rank: Optional[List[Tuple[str, int]]] = None, search_weights: Optional[Dict[str, float]] = None,
+                 on_change: Optional[Callable[[str, dict], None]] = None):
+        super().__init__(name, sort_field)
+        self.on_change = on_change
+        self._docs: Dict[str, dict] = {}
+        self._order: List[tuple] = []
+        self._indexes: Dict[str, Dict[Any, List[tuple]]] = {field: {} for field in indexed_fields}
+        self.rank = rank
+        self._ranked: List[tuple] = []
+        self._text = InvertedIndex(search_weights) if search_weights else None
+
+    def _key(self, doc: dict) -> tuple:
+        return (doc[self.sort_field], doc["id"])
+
+    def _rank_key(self, doc: dict) -> tuple:
+        # Rank fields are numeric, so descending is negation
+        return tuple(-doc.get(field, 0) if direction < 0 else doc.get(field, 0)
+                     for field, direction in self.rank) + (doc["id"],)
+
+    def _add(self, doc: dict) -> None:
+        key = self._key(doc)
+        self._docs[doc["id"]] = doc
+        insort(self._order, key)
+        for field, buckets in self._indexes.items():
+            insort(buckets.setdefault(doc.get(field), []), key)
+        if self.rank:
+            insort(self._ranked, self._rank_key(doc))
+        if self._text is not None:
+            self._text.add(doc)
+
+    def _remove(self, doc: dict) -> None:
+        key = self._key(doc)
+        del self._docs[doc["id"]]
+        self._discard(self._order, key)
+        if self.rank:
+            self._discard(self._ranked, self._rank_key(doc))
+        if self._text is not None:
+            self._text.remove(doc["id"])
+        for field, buckets in self._indexes.items():
+            bucket = buckets.get(doc.get(field))
+            self._discard(bucket, key)
+            if not bucket:
+                buckets.pop(doc.get(field), None)
+
+    @staticmethod
+    def _discard(entries: List[tuple], key: tuple) -> None:
+        i = bisect_left(entries, key)
+        if i < len(entries) and entries[i] == key:
+            del entries[i]
+
+    def _candidates(self, filters: Dict[str, Any]) -> Tuple[List[tuple], Dict[str, Any]]:
+        # Narrowest indexed bucket, plus the filters it doesn't already satisfy
+        best_field, best = None, self._order
+        for field, value in filters.items():
+            if field in self._indexes and not isinstance(value, dict):
+                bucket = self._indexes[field].get(value, [])
+                if best_field is None or len(bucket) < len(best):
+                    best_field, best = field, bucket
+        rest = {k: v for k, v in filters.items() if k != best_field}
+        return best, rest
+
+    @staticmethod
+    def _matches(doc: dict, filters: Dict[str, Any]) -> bool:
+        for field, value in filters.items():
+            if isinstance(value, dict):
+                if doc.get(field) is None or doc[field] < value["$gte"]:
+                    return False
+            elif doc.get(field) != value:
+                return False
+        return True
+
+    def seed(self, docs: Iterable[dict]) -> None:
+        # Backfilled on the way in, as MongoStorage.backfill_sort_fields does at startup
+        for doc in docs:
+            doc = dict(doc)
+            if doc.get(self.sort_field) is None:
+                doc[self.sort_field] = LEGACY_SORT_VALUE
+            self._add(doc)
+
+    def all(self) -> List[dict]:
+        return list(self._docs.values())
+
+    async def get(self, doc_id: str) -> Optional[dict]:
+        doc = self._docs.get(doc_id)
+        return dict(doc) if doc is not None else None
+
+    async def get_many(self, doc_ids: List[str]) -> List[dict]:
+        return [dict(self._docs[doc_id]) for doc_id in doc_ids if doc_id in self._docs]
+
+    async def find_page(self, filters: Dict[str, Any], limit: int, cursor: Optional[str] = None,
+                        fields: Optional[Sequence[str]] = None) -> Tuple[List[dict], Optional[str]]:
+        entries, rest = self._candidates(filters)
+        end = bisect_left(entries, decode_cursor(cursor)) if cursor else len(entries)
+        keep = self.projected_fields(fields) if fields else None
+
+        docs = []
+        for i in range(end - 1, -1, -1):
+            doc = self._docs[entries[i][1]]
+            if rest and not self._matches(doc, rest):
+                continue
+            docs.append(project(doc, keep))
+            if len(docs) > limit:
+                break
+        return build_page(docs, self.sort_field, limit)
+
+    async def top(self, filters: Dict[str, Any], limit: int, fields: Optional[Sequence[str]] = None) -> List[dict]:
+        ranked = self._ranked if self.rank else [(key[1],) for key in reversed(self._order)]
+        docs = []
+        for key in ranked:
+            doc = self._docs[key[-1]]
+            if self._matches(doc, filters):
+                docs.append(project(doc, fields))
+                if len(docs) == limit:
+                    break
+        return docs
+
+    async def search(self, text: str, filters: Dict[str, Any], limit: int,
+                     exclude: Optional[Dict[str, List[str]]] = None, max_time_ms: Optional[int] = None,
+                     fields: Optional[Sequence[str]] = None) -> List[dict]:
+        if self._text is None:
+            return []
+        exclude = {field: values for field, values in (exclude or {}).items() if values}
+
+        def accept(doc_id: str) -> bool:
+            doc = self._docs[doc_id]
+            return self._matches(doc, filters) and not any(
+                holds_any(doc, field, values) for field, values in exclude.items()
+            )
+
+        return [project(self._docs[doc_id], fields) for doc_id, _ in self._text.search(text, accept, limit)]
+
+    async def stream(self, filters: Dict[str, Any], start: Optional[datetime] = None, end: Optional[datetime] = None,
+                     batch_size: int = 500) -> AsyncIterator[dict]:
+        entries, rest = self._candidates(filters)
+        lo = bisect_left(entries, (start,)) if start is not None else 0
+        hi = bisect_left(entries, (end,)) if end is not None else len(entries)
+        # Snapshot the keys so concurrent writes can't shift positions under us
+        keys = entries[lo:hi]
+        for n, (_, doc_id) in enumerate(keys, 1):
+            doc = self._docs.get(doc_id)
+            if doc is not None and (not rest or self._matches(doc, rest)):
+                yield dict(doc)
+            if n % batch_size == 0:
+                # Let other requests run between batches
+                await asyncio.sleep(0)
+
+    def _changed(self, op: str, doc: dict) -> None:
+        if self.on_change is not None:
+            self.on_change(op, doc)
+
+    async def insert(self, doc: dict) -> None:
+        self._add(dict(doc))
+        self._changed("insert", doc)
+
+    async def insert_many(self, docs: List[dict]) -> List[Optional[str]]:
+        errors: List[Optional[str]] = []
+        for doc in docs:
+            # Mirrors the unique id index on the Mongo side
+            if doc["id"] in self._docs:
+                errors.append(f"Duplicate id: {doc['id']}")
+                continue
+            self._add(dict(doc))
+            self._changed("insert", doc)
+            errors.append(None)
+        return errors
+
+    async def update(self, doc_id: str, fields: Dict[str, Any]) -> Optional[dict]:
+        previous = self._docs.get(doc_id)
+        if previous is None:
+            return None
+        # Re-adding keeps every index consistent when sort or indexed fields change
+        self._remove(previous)
+        current = {**previous, **fields}
+        self._add(current)
+        self._changed("update", current)
+        return dict(previous)
+
+    async def bulk_update(self, updates: Dict[str, Dict[str, Any]],
+                          expected: Optional[Dict[str, Any]] = None) -> Tuple[int, int]:
+        matched = modified = 0
+        for doc_id, fields in updates.items():
+            doc = self._docs.get(doc_id)
+            if doc is None or (expected and not self._matches(doc, expected)):
+                continue
+            matched += 1
+            if any(doc.get(field) != value for field, value in fields.items()):
+                await self.update(doc_id, fields)
+                modified += 1
+        return matched, modified
+
+    async def delete(self, doc_id: str) -> Optional[dict]:
+        doc = self._docs.get(doc_id)
+        if doc is None:
+            return None
+        self._remove(doc)
+        return dict(doc)
+
+    async def count(self, filters: Dict[str, Any]) -> int:
+        entries, rest = self._candidates(filters)
+        if not rest:
+            return len(entries)
+        return sum(1 for _, doc_id in entries if self._matches(self._docs[doc_id], rest))
+
+
+class MemoryStorage(Storage):
+    backend = "memory"
+
+    def __init__(self, seed: Optional[Dict[str, List[dict]]] = None):
+        # Stands in for the orders change stream
+        self.order_changes = ChangeBus()
+        super().__init__(
+            products=MemoryRepository("products", "created_at", ["category", "available"], rank=TOP_RATED_RANK,
+                                      search_weights=PRODUCT_SEARCH_WEIGHTS),
+            orders=MemoryRepository("orders", "order_date", ["status"], on_change=self.order_changes.publish),
+            reviews=MemoryRepository("reviews", "created_at", ["approved", "product_id"]),
+            status_checks=MemoryRepository("status_checks", "timestamp"),
+        )
+        for name, docs in (seed or {}).items():
+            getattr(self, name).seed(docs)
+        self.counters = empty_counters()
+        self._reconcile()
+
+    def _reconcile(self) -> Dict[str, Dict[str, int]]:
+        return reconcile_memory_counters(self.counters, self.products.all(), self.orders.all(), self.reviews.all())
+
+    async def ensure_indexes(self) -> Dict[str, List[str]]:
+        # Secondary indexes are built as documents arrive
+        return {}
+
+    async def index_report(self) -> Dict[str, Any]:
+        return {"database": False, "collections": {}}
+
+    async def bump_counters(self, **deltas: int) -> None:
+        bump_memory_counters(self.counters, **deltas)
+
+    async def read_counters(self) -> Dict[str, int]:
+        return dict(self.counters)
+
+    async def reconcile_counters(self) -> Dict[str, Dict[str, int]]:
+        return self._reconcile()
+
+    async def apply_rating(self, product_id: str, rating: int, delta: int) -> None:
+        product = await self.products.get(product_id)
+        if product is not None:
+            await self.products.update(product_id, applied_rating(product, rating, delta))
+
+    async def rebuild_ratings(self) -> int:
+        ratings = ratings_from_reviews(self.reviews.all())
+        changed = 0
+        for product in self.products.all():
+            actual = ratings.get(product["id"], empty_ratings())
+            if ratings_differ(product, actual):
+                await self.products.update(product["id"], actual)
+                changed += 1
+        return changed
+
+    def watch_orders(self, resume_after: Optional[str] = None) -> AsyncIterator[Change]:
+        return self.order_changes.watch(resume_after)
@@ -0,0 +1,232 @@
+# Motor-backed storage
+
+import re
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, ExecutionTimeout, OperationFailure
+
+from counters import COUNTERS_COLLECTION, bump_counters, read_counters, reconcile_counters
+from indexes import ensure_indexes, index_drift
+from live import Change, FeedUnavailable, history_lost
+from metrics import timed
+from pagination import LEGACY_SORT_VALUE, build_page, keyset_query, keyset_sort
+from ratings import TOP_RATED_RANK, rating_update_pipeline, rebuild_ratings
+from search import SearchTimeout
+
+from .base import Repository, Storage
+
+# Documents leave the repository without Mongo's ObjectId
+NO_OBJECT_ID = {"_id": 0}
+
+
+def projection(fields: Optional[Sequence[str]]) -> dict:
+    return {**NO_OBJECT_ID, **{field: 1 for field in fields}} if fields else NO_OBJECT_ID
+
+# Change stream operation types that feed the live order feed, as feed ops
+ORDER_CHANGE_OPS = {"insert": "insert", "update": "update", "replace": "update"}
+
+# Server error codes: $changeStream on a standalone mongod, and a resume token past the oplog
+CHANGE_STREAMS_UNSUPPORTED = 40573
+CHANGE_STREAM_HISTORY_LOST = 286
+
+
+class MongoRepository(Repository):
+
+    def __init__(self, collection, sort_field: str, rank: Optional[List[Tuple[str, int]]] = None):
+        super().__init__(collection.name, sort_field)
+        self.collection = collection
+        self.rank = rank or [(sort_field, -1)]
+
+    @timed("get")
+    async def get(self, doc_id: str) -> Optional[dict]:
+        return await self.collection.find_one({"id": doc_id}, NO_OBJECT_ID)
+
+    @timed("get_many")
+    async def get_many(self, doc_ids: List[str]) -> List[dict]:
+        if not doc_ids:
+            return []
+        return await self.collection.find({"id": {"$in": list(doc_ids)}}, NO_OBJECT_ID).to_list(None)
+
+    @timed("find_page")
+    async def find_page(self, filters: Dict[str, Any], limit: int, cursor: Optional[str] = None,
+                        fields: Optional[Sequence[str]] = None) -> Tuple[List[dict], Optional[str]]:
+        query = keyset_query(dict(filters), self.sort_field, cursor)
+        docs = await (
+            self.collection.find(query, projection(self.projected_fields(fields) if fields else None))
+            .sort(keyset_sort(self.sort_field))
+            .limit(limit + 1)
+            .to_list(limit + 1)
+        )
+        return build_page(docs, self.sort_field, limit)
+
+    @timed("top")
+    async def top(self, filters: Dict[str, Any], limit: int, fields: Optional[Sequence[str]] = None) -> List[dict]:
+        return await (
+            self.collection.find(filters, projection(fields))
+            .sort(self.rank + [("id", 1)])
+            .limit(limit)
+            .to_list(limit)
+        )
+
+    @timed("search")
+    async def search(self, text: str, filters: Dict[str, Any], limit: int,
+                     exclude: Optional[Dict[str, List[str]]] = None, max_time_ms: Optional[int] = None,
+                     fields: Optional[Sequence[str]] = None) -> List[dict]:
+        query = {**filters, "$text": {"$search": text}}
+        for field, values in (exclude or {}).items():
+            if values:
+                query[field] = {"$nin": [re.compile(f"^{re.escape(value)}$", re.IGNORECASE) for value in values]}
+        score = {"$meta": "textScore"}
+        cursor = self.collection.find(query, {**projection(fields), "score": score}).sort([("score", score)]).limit(limit)
+        if max_time_ms:
+            cursor = cursor.max_time_ms(max_time_ms)
+        try:
+            docs = await cursor.to_list(limit)
+        except ExecutionTimeout as e:
+            raise SearchTimeout(str(e)) from e
+        for doc in docs:
+            doc.pop("score", None)
+        return docs
+
+    async def stream(self, filters: Dict[str, Any], start: Optional[datetime] = None, end: Optional[datetime] = None,
+                     batch_size: int = 500) -> AsyncIterator[dict]:
+        query = dict(filters)
+        bounds = {}
+        if start is not None:
+            bounds["$gte"] = start
+        if end is not None:
+            bounds["$lt"] = end
+        if bounds:
+            query[self.sort_field] = bounds
+        # batch_size caps each getMore, so memory stays bounded by one batch
+        cursor = (
+            self.collection.find(query, NO_OBJECT_ID)
+            .sort([(self.sort_field, 1), ("id", 1)])
+            .batch_size(batch_size)
+        )
+        async for doc in cursor:
+            yield doc
+
+    @timed("insert")
+    async def insert(self, doc: dict) -> None:
+        # insert_one adds _id to the dict it is given
+        await self.collection.insert_one(dict(doc))
+
+    @timed("insert_many")
+    async def insert_many(self, docs: List[dict]) -> List[Optional[str]]:
+        errors: List[Optional[str]] = [None] * len(docs)
+        if not docs:
+            return errors
+        try:
+            await self.collection.insert_many([dict(doc) for doc in docs], ordered=False)
+        except BulkWriteError as e:
+            # Unordered inserts keep going past failures and report each by index
+            for write_error in e.details.get("writeErrors", []):
+                errors[write_error["index"]] = write_error["errmsg"]
+        return errors
+
+    @timed("update")
+    async def update(self, doc_id: str, fields: Dict[str, Any]) -> Optional[dict]:
+        return await self.collection.find_one_and_update(
+            {"id": doc_id},
+            {"$set": fields},
+            projection=NO_OBJECT_ID,
+            return_document=ReturnDocument.BEFORE,
+        )
+
+    @timed("bulk_update")
+    async def bulk_update(self, updates: Dict[str, Dict[str, Any]],
+                          expected: Optional[Dict[str, Any]] = None) -> Tuple[int, int]:
+        # The expected values ride in each filter, so a concurrent change wins over this batch
+        if not updates:
+            return 0, 0
+        result = await self.collection.bulk_write(
+            [UpdateOne({**(expected or {}), "id": doc_id}, {"$set": fields}) for doc_id, fields in updates.items()],
+            ordered=False,
+        )
+        return result.matched_count, result.modified_count
+
+    @timed("backfill_sort_field")
+    async def backfill_sort_field(self) -> int:
+        # A missing sort field sorts below every cursor value, so $lt keysets never reach it;
+        # matching None covers both missing and null
+        result = await self.collection.update_many({self.sort_field: None}, {"$set": {self.sort_field: LEGACY_SORT_VALUE}})
+        return result.modified_count
+
+    @timed("delete")
+    async def delete(self, doc_id: str) -> Optional[dict]:
+        return await self.collection.find_one_and_delete({"id": doc_id}, projection=NO_OBJECT_ID)
+
+    @timed("count")
+    async def count(self, filters: Dict[str, Any]) -> int:
+        return await self.collection.count_documents(filters)
+
+
+class MongoStorage(Storage):
+    backend = "mongo"
+
+    def __init__(self, db):
+        self.db = db
+        super().__init__(
+            products=MongoRepository(db.products, "created_at", rank=TOP_RATED_RANK),
+            orders=MongoRepository(db.orders, "order_date"),
+            reviews=MongoRepository(db.reviews, "created_at"),
+            status_checks=MongoRepository(db.status_checks, "timestamp"),
+        )
+
+    async def backfill_sort_fields(self) -> Dict[str, int]:
+        repositories = (self.products, self.orders, self.reviews, self.status_checks)
+        counts = {repository.name: await repository.backfill_sort_field() for repository in repositories}
+        return {name: count for name, count in counts.items() if count}
+
+    async def ensure_indexes(self) -> Dict[str, List[str]]:
+        return await ensure_indexes(self.db)
+
+    async def index_report(self) -> Dict[str, Any]:
+        return {"database": True, "collections": await index_drift(self.db)}
+
+    @timed("bump_counters", COUNTERS_COLLECTION)
+    async def bump_counters(self, **deltas: int) -> None:
+        await bump_counters(self.db, **deltas)
+
+    @timed("read_counters", COUNTERS_COLLECTION)
+    async def read_counters(self) -> Dict[str, int]:
+        return await read_counters(self.db)
+
+    async def reconcile_counters(self) -> Dict[str, Dict[str, int]]:
+        return await reconcile_counters(self.db)
+
+    @timed("apply_rating", "products")
+    async def apply_rating(self, product_id: str, rating: int, delta: int) -> None:
+        await self.db.products.update_one({"id": product_id}, rating_update_pipeline(rating, delta))
+
+    async def rebuild_ratings(self) -> int:
+        return await rebuild_ratings(self.db)
+
+    async def watch_orders(self, resume_after: Optional[str] = None) -> AsyncIterator[Change]:
+        pipeline = [{"$match": {"operationType": {"$in": list(ORDER_CHANGE_OPS)}}}]
+        resume = {"_data": resume_after} if resume_after else None
+        try:
+            async with self.db.orders.watch(pipeline, full_document="updateLookup", resume_after=resume) as stream:
+                async for change in stream:
+                    doc = change.get("fullDocument")
+                    if doc is None:
+                        # Deleted before the update lookup ran
+                        continue
+                    doc.pop("_id", None)
+                    yield Change(change["_id"]["_data"], ORDER_CHANGE_OPS[change["operationType"]], doc)
+            return
+        except OperationFailure as e:
+            if e.code == CHANGE_STREAMS_UNSUPPORTED:
+                raise FeedUnavailable("change streams need a replica set or Atlas cluster") from e
+            if e.code != CHANGE_STREAM_HISTORY_LOST or resume_after is None:
+                raise
+        # The oplog no longer reaches resume_after: tell clients they missed changes, then carry on from now
+        yield history_lost()
+        async for change in self.watch_orders():
+            yield change
+
+    async def close(self) -> None:
+        self.db.client.close()
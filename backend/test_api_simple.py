@@ -30,7 +30,7 @@ def test_basic_endpoints():
         response = requests.get(f"{API_BASE}/products")
         print(f"   GET /products: {response.status_code}")
         if response.status_code == 200:
-            products = response.json()
+            products = response.json()["items"]
             print(f"   Found {len(products)} products")
 
         # Test creating a product
@@ -46,6 +46,7 @@ def test_basic_endpoints():
             "prep_time_hours": 24
         }
 
+        product_id = "test_prod_1"
         response = requests.post(f"{API_BASE}/products", json=test_product)
         print(f"   POST /products: {response.status_code}")
         if response.status_code == 200:
@@ -67,7 +68,7 @@ def test_basic_endpoints():
             "delivery_address": "123 Test St, Test City, ST 12345",
             "items": [
                 {
-                    "product_id": "test_prod_1",
+                    "product_id": product_id,
                     "product_name": "Test Cookies",
                     "quantity": 2,
                     "price": 15.99
@@ -88,7 +89,7 @@ def test_basic_endpoints():
         response = requests.get(f"{API_BASE}/orders")
         print(f"   GET /orders: {response.status_code}")
         if response.status_code == 200:
-            orders = response.json()
+            orders = response.json()["items"]
             print(f"   Found {len(orders)} orders")
 
         print("\n⭐ Testing Reviews Endpoints...")
@@ -116,7 +117,7 @@ def test_basic_endpoints():
         response = requests.get(f"{API_BASE}/reviews?approved_only=true")
         print(f"   GET /reviews (approved): {response.status_code}")
         if response.status_code == 200:
-            reviews = response.json()
+            reviews = response.json()["items"]
             print(f"   Found {len(reviews)} approved reviews")
 
         print("\n📊 Testing Analytics Dashboard...")
@@ -41,7 +41,7 @@ def test_api_endpoints():
     try:
         response = requests.get(f"{BASE_URL}/reviews?approved_only=false")
         if response.status_code == 200:
-            reviews = response.json()
+            reviews = response.json()["items"]
             print(f"✅ Retrieved {len(reviews)} reviews")
         else:
             print(f"❌ Failed to get reviews: {response.status_code}")
@@ -62,7 +62,7 @@ def test_api_endpoints():
     try:
         response = requests.get(f"{BASE_URL}/reviews?approved_only=true")
         if response.status_code == 200:
-            approved_reviews = response.json()
+            approved_reviews = response.json()["items"]
             print(f"✅ Retrieved {len(approved_reviews)} approved reviews")
         else:
             print(f"❌ Failed to get approved reviews: {response.status_code}")
@@ -0,0 +1,40 @@
+# Test that admin routes need a token from /admin/login
+
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Add backend to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+import server
+from storage import MemoryStorage
+
+ADMIN_ROUTES = [
+    ("get", "/api/admin/indexes"),
+    ("post", "/api/admin/analytics/reconcile"),
+    ("get", "/api/admin/orders/live"),
+    ("get", "/api/admin/agents/cache"),
+    ("get", "/api/admin/agents/coalescing"),
+    ("get", "/api/admin/agents/sessions"),
+    ("get", "/api/admin/agents/limits"),
+    ("get", "/api/admin/profiles"),
+]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(server, "storage", MemoryStorage())
+    return TestClient(server.app)
+
+
+@pytest.mark.parametrize("method,path", ADMIN_ROUTES)
+def test_admin_routes_require_a_token(client, method, path):
+    assert getattr(client, method)(path).status_code == 401
+    assert getattr(client, method)(path, headers={"X-Admin-Token": "guess"}).status_code == 401
+
+    token = client.post("/api/admin/login", json={"username": "admin", "password": "admin"}).json()["token"]
+    assert getattr(client, method)(path, headers={"Authorization": f"Bearer {token}"}).status_code == 200
@@ -0,0 +1,84 @@
+# Test the agent response cache
+
+import asyncio
+import sys
+from pathlib import Path
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+
+# Add backend to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from ai_agents import AgentConfig, ChatAgent, ResponseCache
+from ai_agents.cache import CachedResponse
+
+
+def answer(text):
+    return CachedResponse(text, {"model": "m"})
+
+
+def test_normalized_prompts_share_an_entry():
+    cache = ResponseCache()
+    cache.set("system", "m", "What are your opening hours?", answer("7am to 6pm"))
+
+    assert cache.get("system", "m", "  what are your OPENING hours ").content == "7am to 6pm"
+    assert cache.get("other system", "m", "What are your opening hours?") is None
+    assert cache.get("system", "other-model", "What are your opening hours?") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_similarity_tier_matches_rephrased_prompts():
+    cache = ResponseCache(similarity_threshold=0.6)
+    cache.set("system", "m", "do you have gluten free cakes", answer("Yes, three kinds"))
+
+    assert cache.get("system", "m", "do you have any gluten free cakes").content == "Yes, three kinds"
+    assert cache.get("system", "m", "where do you deliver") is None
+    assert cache.stats()["similar_hits"] == 1
+
+
+def test_ttl_and_lru_eviction(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("ai_agents.cache.time.monotonic", lambda: clock[0])
+    cache = ResponseCache(maxsize=2, ttl=60)
+    cache.set("s", "m", "a", answer("A"))
+    cache.set("s", "m", "b", answer("B"))
+    cache.get("s", "m", "a")
+    cache.set("s", "m", "c", answer("C"))
+
+    # "b" was least recently used
+    assert cache.get("s", "m", "b") is None
+    assert cache.get("s", "m", "a").content == "A"
+
+    clock[0] += 61
+    assert cache.get("s", "m", "c") is None
+
+
+def test_execute_serves_repeats_from_cache():
+    agent = ChatAgent(AgentConfig(api_key="test", cache_ttl=60))
+    agent.llm = GenericFakeChatModel(messages=iter(["Fresh daily", "should not be used"]))
+
+    first = asyncio.run(agent.execute("Is the bread fresh?"))
+    second = asyncio.run(agent.execute("is the bread fresh"))
+
+    assert first.metadata["cached"] is False
+    assert second.content == "Fresh daily"
+    assert second.metadata["cached"] is True
+
+
+def test_tool_calls_bypass_cache_unless_requested():
+    async def no_tools():
+        return []
+
+    agent = ChatAgent(AgentConfig(api_key="test", cache_ttl=60))
+    agent.llm = GenericFakeChatModel(messages=iter(["one", "two", "three"]))
+    agent.mcp_client = object()
+    agent.load_tools = no_tools
+
+    asyncio.run(agent.execute("news today"))
+    assert asyncio.run(agent.execute("news today")).content == "two"
+    assert agent.cache.stats()["bypassed"] == 2
+
+    asyncio.run(agent.execute("news today", use_cache=True))
+    assert asyncio.run(agent.execute("news today", use_cache=True)).content == "three"
@@ -0,0 +1,101 @@
+# Test upstream admission control for agent calls
+
+import asyncio
+import sys
+from pathlib import Path
+
+import httpx
+import openai
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+
+# Add backend to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from ai_agents import AgentConfig, ChatAgent, ModelLimiter, Overloaded, PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE
+
+
+def rate_limit_error():
+    response = httpx.Response(429, request=httpx.Request("POST", "http://llm.test/chat/completions"))
+    return openai.RateLimitError("rate limited", response=response, body=None)
+
+
+def test_interactive_waiters_admitted_before_background():
+    limiter = ModelLimiter(max_concurrency=1, rate=0)
+    order = []
+
+    async def call(name, priority):
+        async with limiter.slot(priority):
+            order.append(name)
+            await asyncio.sleep(0.01)
+
+    async def run():
+        first = asyncio.ensure_future(call("first", PRIORITY_BACKGROUND))
+        await asyncio.sleep(0)
+        await asyncio.gather(
+            first,
+            call("search", PRIORITY_BACKGROUND),
+            call("chat", PRIORITY_INTERACTIVE),
+        )
+
+    asyncio.run(run())
+    assert order == ["first", "chat", "search"]
+
+
+def test_full_queue_fails_fast_with_retry_after():
+    limiter = ModelLimiter(max_concurrency=1, rate=2, max_queue=2)
+
+    async def run():
+        holder = await limiter.acquire()
+        waiters = [asyncio.ensure_future(limiter.acquire()) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as excinfo:
+            await limiter.acquire()
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        limiter.release()
+        return holder, excinfo.value
+
+    _, error = asyncio.run(run())
+    assert error.retry_after == 2
+    assert limiter.stats()["rejected"] == 1
+    assert limiter.stats()["queued"] == 0
+
+
+def test_token_bucket_paces_admissions():
+    limiter = ModelLimiter(max_concurrency=10, rate=50, burst=1)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        for _ in range(4):
+            async with limiter.slot():
+                pass
+        return loop.time() - started
+
+    # One token up front, then three more at 50/s
+    assert asyncio.run(run()) >= 0.05
+
+
+def test_rate_limited_calls_retry_with_backoff(monkeypatch):
+    monkeypatch.setattr("ai_agents.agents.backoff_delay", lambda attempt: 0)
+
+    class FlakyModel(GenericFakeChatModel):
+        failures: int = 2
+
+        async def _agenerate(self, *args, **kwargs):
+            if self.failures:
+                self.failures -= 1
+                raise rate_limit_error()
+            return await super()._agenerate(*args, **kwargs)
+
+    agent = ChatAgent(AgentConfig(api_key="test", cache_ttl=0, max_retries=3))
+    agent.llm = FlakyModel(messages=iter(["Baked fresh"]))
+    agent.limiter = ModelLimiter(max_concurrency=1, rate=0)
+
+    response = asyncio.run(agent.execute("Fresh?"))
+    assert response.success and response.content == "Baked fresh"
+    assert agent.limiter.stats()["admitted"] == 3
+    assert agent.limiter.stats()["active"] == 0
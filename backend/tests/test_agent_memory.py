@@ -0,0 +1,101 @@
+# Test server-side conversation memory
+
+import asyncio
+import sys
+from pathlib import Path
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+
+# Add backend to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from ai_agents import AgentConfig, ChatAgent, SessionStore
+
+
+class RecordingModel(GenericFakeChatModel):
+    seen: list = []
+
+    async def _agenerate(self, messages, *args, **kwargs):
+        self.seen.append(list(messages))
+        return await super()._agenerate(messages, *args, **kwargs)
+
+
+def chat_agent(replies, **config):
+    agent = ChatAgent(AgentConfig(api_key="test", **config))
+    agent.llm = RecordingModel(messages=iter(replies), seen=[])
+    return agent
+
+
+def test_turns_in_a_session_carry_history():
+    agent = chat_agent(["Hi Sam", "You are Sam"])
+
+    async def run():
+        await agent.execute("I'm Sam", session_id="s1")
+        return await agent.execute("Who am I?", session_id="s1")
+
+    response = asyncio.run(run())
+    assert response.content == "You are Sam"
+    contents = [m.content for m in agent.llm.seen[-1][1:]]
+    assert contents == ["I'm Sam", "Hi Sam", "Who am I?"]
+    assert isinstance(agent.llm.seen[-1][2], AIMessage)
+
+
+def test_old_turns_compact_into_summary():
+    agent = chat_agent(["a1", "a2", "a3", "Customer wants a cake", "a4"],
+                       session_token_budget=40, session_max_messages=40)
+
+    async def run():
+        for i in range(3):
+            await agent.execute(f"question {i} " + "x" * 40, session_id="s")
+        await asyncio.gather(*agent._background)
+        await agent.execute("next", session_id="s")
+
+    asyncio.run(run())
+    session = agent.sessions.get("s")
+    assert session.summary == "Customer wants a cake"
+    last_call = agent.llm.seen[-1]
+    assert "Customer wants a cake" in last_call[0].content
+    # The most recent exchange before compaction stays verbatim
+    assert [m.content for m in last_call if isinstance(m, HumanMessage)][-2].startswith("question 2")
+    assert agent.sessions.stats()["compactions"] == 1
+
+
+def test_summary_failure_falls_back_to_truncation():
+    class FailingSummaries(RecordingModel):
+        async def _agenerate(self, messages, *args, **kwargs):
+            if "Condense" in messages[0].content:
+                raise RuntimeError("summaries unavailable")
+            return await super()._agenerate(messages, *args, **kwargs)
+
+    agent = chat_agent([], session_max_messages=4, session_token_budget=10000, max_retries=0)
+    agent.llm = FailingSummaries(messages=iter(["one", "two"]), seen=[])
+
+    async def run():
+        await agent.execute("first", session_id="s")
+        await agent.execute("second", session_id="s")
+        await asyncio.gather(*agent._background)
+
+    asyncio.run(run())
+    session = agent.sessions.get("s")
+    assert session.summary == "user: first\nassistant: one"
+    assert [turn.content for turn in session.turns] == ["second", "two"]
+
+
+def test_sessions_expire_and_evict(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr("ai_agents.memory.time.monotonic", lambda: clock[0])
+    store = SessionStore(max_sessions=2, ttl=60)
+
+    store.get("a").add("user", "hello")
+    store.get("b")
+    store.get("a")
+    store.get("c")
+    # "b" was least recently used
+    assert store.stats()["evicted"] == 1
+    assert [turn.content for turn in store.get("a").turns] == ["hello"]
+
+    clock[0] += 61
+    assert list(store.get("a").turns) == []
+    assert store.stats()["expired"] == 2
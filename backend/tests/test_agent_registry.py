@@ -0,0 +1,47 @@
+# Test the shared agent registry
+
+import asyncio
+import sys
+from pathlib import Path
+
+# Add backend to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from ai_agents import AgentConfig, AgentRegistry, ChatAgent
+
+
+def test_concurrent_first_requests_share_one_agent():
+    built = []
+
+    def factory(config, http_client):
+        built.append(http_client)
+        return ChatAgent(config, http_client)
+
+    async def run():
+        registry = AgentRegistry(AgentConfig(api_key="test"), {"chat": factory})
+        agents = await asyncio.gather(*(registry.get("chat") for _ in range(20)))
+        client = registry.http_client
+        await registry.close()
+        return agents, client
+
+    agents, client = asyncio.run(run())
+    assert len(built) == 1
+    assert all(agent is agents[0] for agent in agents)
+    assert agents[0].llm.http_async_client is client
+    assert client.is_closed
+
+
+def test_capabilities_computed_once():
+    async def run():
+        registry = AgentRegistry(AgentConfig(api_key="test"), {"chat": ChatAgent})
+        await registry.start()
+        first = await registry.capabilities()
+        registry.agents["chat"].get_capabilities = lambda: ["changed"]
+        second = await registry.capabilities()
+        await registry.close()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first is second
+    assert "conversation" in first["chat"]
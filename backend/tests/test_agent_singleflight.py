@@ -0,0 +1,57 @@
+# Test coalescing of identical concurrent agent calls
+
+import asyncio
+import sys
+from pathlib import Path
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+
+# Add backend to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from ai_agents import AgentConfig, ChatAgent, SingleFlight
+
+
+class SlowModel(GenericFakeChatModel):
+    calls: int = 0
+
+    async def _agenerate(self, *args, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return await super()._agenerate(*args, **kwargs)
+
+
+def test_identical_prompts_share_one_upstream_call():
+    agent = ChatAgent(AgentConfig(api_key="test", cache_ttl=0))
+    agent.llm = SlowModel(messages=iter(["Sourdough", "Rye"]))
+
+    async def run():
+        same = await asyncio.gather(*(agent.execute("Bread of the day?") for _ in range(10)))
+        other = await agent.execute("Cake of the day?")
+        return same, other
+
+    same, other = asyncio.run(run())
+    assert agent.llm.calls == 2
+    assert {response.content for response in same} == {"Sourdough"}
+    assert sum(bool(response.metadata.get("coalesced")) for response in same) == 9
+    assert other.content == "Rye"
+    assert agent.inflight.stats() == {"in_flight": 0, "executed": 2, "coalesced": 9, "coalesced_ratio": 0.8182}
+
+
+def test_cancelled_caller_does_not_cancel_shared_call():
+    flight = SingleFlight()
+
+    async def upstream():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def run():
+        leader = asyncio.ensure_future(flight.do("k", upstream))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("k", upstream))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(run()) == ("done", True)
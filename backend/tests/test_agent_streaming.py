@@ -0,0 +1,45 @@
+# Test token streaming from agents
+
+import asyncio
+import sys
+from pathlib import Path
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+
+# Add backend to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from ai_agents import AgentConfig, ChatAgent
+
+
+def collect(agent, prompt):
+    async def run():
+        return [event async for event in agent.stream(prompt)]
+    return asyncio.run(run())
+
+
+def test_stream_emits_tokens_then_timing():
+    agent = ChatAgent(AgentConfig(api_key="test"))
+    agent.llm = GenericFakeChatModel(messages=iter(["Open daily from seven"]))
+
+    events = collect(agent, "When do you open?")
+
+    tokens = [event["data"]["content"] for event in events if event["event"] == "token"]
+    assert "".join(tokens) == "Open daily from seven"
+    done = events[-1]
+    assert done["event"] == "done"
+    assert done["data"]["chunks"] == len(tokens)
+    assert 0 <= done["data"]["time_to_first_token_ms"] <= done["data"]["total_latency_ms"]
+
+
+def test_stream_reports_errors_as_final_event():
+    class FailingModel(GenericFakeChatModel):
+        async def _astream(self, *args, **kwargs):
+            raise RuntimeError("upstream unavailable")
+            yield
+
+    agent = ChatAgent(AgentConfig(api_key="test"))
+    agent.llm = FailingModel(messages=iter([]))
+
+    assert collect(agent, "hi") == [{"event": "error", "data": {"error": "upstream unavailable"}}]
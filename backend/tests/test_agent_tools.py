@@ -0,0 +1,122 @@
+# Test MCP tool loading and the tool-calling loop
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.tools import tool
+
+# Add backend to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from ai_agents import AgentConfig, SearchAgent
+
+
+class ToolModel(GenericFakeChatModel):
+    seen: list = []
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    async def _agenerate(self, messages, *args, **kwargs):
+        self.seen.append(list(messages))
+        return await super()._agenerate(messages, *args, **kwargs)
+
+
+class FakeMCPClient:
+    def __init__(self, tools):
+        self.tools = tools
+        self.loads = 0
+
+    async def get_tools(self):
+        self.loads += 1
+        return self.tools
+
+
+@tool
+async def web_search(query: str) -> str:
+    """Search the web."""
+    await asyncio.sleep(0.1)
+    return f"results for {query}"
+
+
+@tool
+async def slow_lookup(query: str) -> str:
+    """Never finishes in time."""
+    await asyncio.sleep(5)
+    return "too late"
+
+
+def tool_call(name, call_id, query):
+    return {"name": name, "args": {"query": query}, "id": call_id, "type": "tool_call"}
+
+
+def search_agent(tools, replies, **config):
+    agent = SearchAgent(AgentConfig(api_key="test", cache_ttl=0, **config))
+    agent.mcp_client = FakeMCPClient(tools)
+    agent.llm = ToolModel(messages=iter(replies), seen=[])
+    return agent
+
+
+def test_independent_tool_calls_run_concurrently():
+    agent = search_agent([web_search], [
+        AIMessage(content="", tool_calls=[tool_call("web_search", "a", "croissants"), tool_call("web_search", "b", "baguettes")]),
+        AIMessage(content="Both are French"),
+    ])
+
+    started = time.perf_counter()
+    response = asyncio.run(agent.execute("Where are croissants and baguettes from?"))
+    elapsed = time.perf_counter() - started
+
+    assert response.content == "Both are French"
+    assert response.metadata["tools_used"] == 2
+    assert elapsed < 0.19
+    tool_messages = [m for m in agent.llm.seen[-1] if isinstance(m, ToolMessage)]
+    assert [m.content for m in tool_messages] == ["results for croissants", "results for baguettes"]
+
+
+def test_slow_tools_time_out_without_failing_the_answer():
+    agent = search_agent([web_search, slow_lookup], [
+        AIMessage(content="", tool_calls=[tool_call("web_search", "a", "rye"), tool_call("slow_lookup", "b", "rye")]),
+        AIMessage(content="Rye is dense"),
+    ], tool_timeout=0.2)
+
+    response = asyncio.run(agent.execute("Tell me about rye"))
+
+    assert response.success and response.content == "Rye is dense"
+    statuses = {m.tool_call_id: m.status for m in agent.llm.seen[-1] if isinstance(m, ToolMessage)}
+    assert statuses == {"a": "success", "b": "error"}
+
+
+def test_tool_schemas_are_cached_between_calls():
+    agent = search_agent([web_search], ["one", "two"])
+
+    async def run():
+        await agent.execute("first")
+        await agent.execute("second")
+        await agent.load_tools(force=True)
+
+    asyncio.run(run())
+    assert agent.mcp_client.loads == 2
+    assert "tool_calling" in agent.get_capabilities()
+
+
+def test_unreachable_mcp_server_does_not_block_startup():
+    class HangingMCPClient(FakeMCPClient):
+        async def get_tools(self):
+            self.loads += 1
+            await asyncio.sleep(60)
+
+    agent = search_agent([web_search], ["one"], mcp_load_timeout=0.05)
+    agent.mcp_client = HangingMCPClient([web_search])
+
+    started = time.monotonic()
+    assert asyncio.run(agent.load_tools()) == []
+    assert time.monotonic() - started < 1
+    # Later calls wait for the refresh interval instead of hanging again
+    assert asyncio.run(agent.load_tools()) == []
+    assert agent.mcp_client.loads == 1
@@ -0,0 +1,105 @@
+# Test dashboard aggregation, in memory and through the Mongo facets
+
+import asyncio
+import random
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add backend to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from analytics import dashboard_from_memory, dashboard_from_mongo
+
+
+def test_dashboard_from_memory_matches_facet_semantics():
+    base = datetime(2024, 1, 1)
+    products = [{"id": "p1", "available": True}, {"id": "p2", "available": False}, {"id": "p3"}]
+    orders = [
+        {"id": f"o{i:02d}", "status": "pending" if i % 3 == 0 else "ready", "order_date": base + timedelta(hours=i)}
+        for i in range(20)
+    ]
+    reviews = [
+        {"id": f"r{i:02d}", "approved": i % 2 == 0, "created_at": base + timedelta(minutes=i)}
+        for i in range(30)
+    ]
+    random.Random(1).shuffle(orders)
+    random.Random(2).shuffle(reviews)
+
+    stats = dashboard_from_memory(products, orders, reviews)
+
+    assert stats["total_products"] == 3
+    # p3 has no available flag, which the facet's {"available": True} doesn't match
+    assert stats["available_products"] == 1
+    assert stats["total_orders"] == 20
+    assert stats["pending_orders"] == 7
+    assert stats["total_reviews"] == 30
+    assert stats["approved_reviews"] == 15
+    assert [o["id"] for o in stats["recent_orders"]] == ["o19", "o18", "o17", "o16", "o15"]
+    assert [r["id"] for r in stats["pending_reviews"]] == [f"r{i:02d}" for i in range(29, 9, -2)]
+
+
+def test_dashboard_from_memory_empty():
+    stats = dashboard_from_memory([], [], [])
+    assert stats["total_orders"] == 0
+    assert stats["recent_orders"] == []
+    assert stats["pending_reviews"] == []
+
+
+class FakeCollection:
+    # Runs the dashboard's $facet pipelines with Mongo's semantics for the stages they use
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def aggregate(self, pipeline):
+        [stage] = pipeline
+        result = {name: self._run(stages) for name, stages in stage["$facet"].items()}
+        return FakeCursor([result])
+
+    def _run(self, stages):
+        docs = list(self.docs)
+        for stage in stages:
+            [(op, spec)] = stage.items()
+            if op == "$match":
+                # Equality never matches a missing field
+                docs = [d for d in docs if all(k in d and d[k] == v for k, v in spec.items())]
+            elif op == "$sort":
+                for field, direction in reversed(list(spec.items())):
+                    docs.sort(key=lambda d: d[field], reverse=direction < 0)
+            elif op == "$limit":
+                docs = docs[:spec]
+            elif op == "$count":
+                docs = [{spec: len(docs)}] if docs else []
+            elif op == "$project":
+                docs = [{k: v for k, v in d.items() if k != "_id"} for d in docs]
+        return docs
+
+
+class FakeCursor:
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length):
+        return self.docs[:length]
+
+
+def test_docs_without_flags_count_the_same_in_both_implementations():
+    base = datetime(2024, 1, 1)
+    products = [{"id": "p1", "available": True}, {"id": "p2", "available": False}, {"id": "p3"}]
+    orders = [{"id": "o1", "status": "pending", "order_date": base}]
+    reviews = [
+        {"id": "r1", "approved": True, "created_at": base},
+        {"id": "r2", "approved": False, "created_at": base + timedelta(minutes=1)},
+        {"id": "r3", "created_at": base + timedelta(minutes=2)},
+    ]
+    db = SimpleNamespace(products=FakeCollection(products), orders=FakeCollection(orders),
+                         reviews=FakeCollection(reviews))
+
+    from_mongo = asyncio.run(dashboard_from_mongo(db))
+    assert dashboard_from_memory(products, orders, reviews) == from_mongo
+    assert from_mongo["available_products"] == 1
+    assert [r["id"] for r in from_mongo["pending_reviews"]] == ["r2"]
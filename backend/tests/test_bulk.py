@@ -0,0 +1,144 @@
+# Test bulk ingestion and bulk order status routes on the in-memory store
+
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Add backend to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+import server
+from storage import MemoryStorage
+
+
+def product(name="Brownie", **overrides):
+    return {"name": name, "description": "Fudgy", "price": 4.5, "category": "bars",
+            "image_url": "https://example.com/b.jpg", **overrides}
+
+
+def order(i, status):
+    return {"id": f"o{i}", "customer_name": f"C{i}", "customer_email": "c@example.com",
+            "customer_phone": "555", "delivery_address": "1 Main St", "items": [],
+            "total_amount": 10.0, "status": status, "order_date": datetime(2024, 1, 1) + timedelta(minutes=i)}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # No startup event: the app runs against a fresh memory store only
+    monkeypatch.setattr(server, "storage", MemoryStorage(seed={
+        "orders": [order(0, "pending"), order(1, "pending"), order(2, "cancelled"), order(3, "pending")],
+    }))
+    return TestClient(server.app)
+
+
+def counters():
+    return asyncio.run(server.storage.read_counters())
+
+
+def test_bulk_products_report_invalid_items_by_index(client):
+    response = client.post("/api/products/bulk", json=[product(), {"name": "No price"}, product("Tart")])
+    body = response.json()
+    assert response.status_code == 200
+    assert (body["inserted"], body["failed"]) == (2, 1)
+    assert [r["success"] for r in body["results"]] == [True, False, True]
+    assert "price" in body["results"][1]["error"]
+    assert counters()["total_products"] == 2
+
+
+def test_bulk_orders_reject_unknown_products(client):
+    created = client.post("/api/products/bulk", json=[product()]).json()["results"][0]["id"]
+    item = {"customer_name": "Ann", "customer_email": "a@example.com", "customer_phone": "555",
+            "delivery_address": "2 Main St"}
+    response = client.post("/api/orders/bulk", json=[
+        {**item, "items": [{"product_id": created, "quantity": 2}]},
+        {**item, "items": [{"product_id": "missing", "quantity": 1}]},
+    ])
+    body = response.json()
+    assert (body["inserted"], body["failed"]) == (1, 1)
+    assert body["results"][1]["error"]
+    assert counters()["total_orders"] == 5
+
+
+def test_duplicate_ids_fail_per_item():
+    # Generated ids never collide in practice; insert_many's error path still reports by position
+    storage = MemoryStorage()
+    first, second = server.Product(**product()), server.Product(**product("Tart"))
+    second.id = first.id
+    response = asyncio.run(server.insert_batch(storage.products, [(0, first), (2, second)], {1: "bad"}, 3))
+    assert [(r.index, r.success) for r in response.results] == [(0, True), (1, False), (2, False)]
+    assert "Duplicate id" in response.results[2].error
+    assert (response.inserted, response.failed) == (1, 2)
+
+
+def test_batches_over_the_limit_are_refused(client, monkeypatch):
+    monkeypatch.setattr(server, "BULK_MAX_ITEMS", 2)
+    assert client.post("/api/products/bulk", json=[product()] * 3).status_code == 413
+    updates = [{"order_id": f"o{i}", "status": "ready"} for i in range(3)]
+    assert client.put("/api/orders/status", json={"updates": updates}).status_code == 413
+
+
+def test_status_updates_by_id(client):
+    response = client.put("/api/orders/status", json={"updates": [
+        {"order_id": "o0", "status": "confirmed"},
+        {"order_id": "o2", "status": "cancelled"},
+        {"order_id": "missing", "status": "ready"},
+    ]})
+    body = response.json()
+    assert (body["matched"], body["modified"], body["truncated"]) == (2, 1, False)
+    assert [(r["order_id"], r["matched"], r["modified"], r["previous_status"]) for r in body["results"]] == [
+        ("o0", True, True, "pending"), ("o2", True, False, "cancelled"), ("missing", False, False, None)
+    ]
+    assert counters()["pending_orders"] == 2
+
+
+def test_status_updates_by_filter_are_capped(client, monkeypatch):
+    monkeypatch.setattr(server, "BULK_MAX_ITEMS", 2)
+    response = client.put("/api/orders/status", json={"filter": {"status": "pending"}, "status": "preparing"})
+    body = response.json()
+    assert (body["matched"], body["modified"], body["truncated"]) == (2, 2, True)
+    assert [(r["order_id"], r["matched"], r["modified"], r["previous_status"]) for r in body["results"]] == [
+        ("o3", True, True, "pending"), ("o1", True, True, "pending")
+    ]
+    assert counters()["pending_orders"] == 1
+    # The cancelled order is untouched and the remaining pending one waits for the next call
+    statuses = {o["id"]: o["status"] for o in server.storage.orders.all()}
+    assert statuses == {"o0": "pending", "o1": "preparing", "o2": "cancelled", "o3": "preparing"}
+
+
+def test_filter_results_name_orders_that_changed_meanwhile(client, monkeypatch):
+    # Another request cancels o1 after the pending orders are read but before the write
+    find_page = server.storage.orders.find_page
+
+    async def racing_find_page(*args, **kwargs):
+        page = await find_page(*args, **kwargs)
+        await server.storage.orders.update("o1", {"status": "cancelled"})
+        return page
+
+    monkeypatch.setattr(server.storage.orders, "find_page", racing_find_page)
+    body = client.put("/api/orders/status", json={"filter": {"status": "pending"}, "status": "confirmed"}).json()
+    assert (body["matched"], body["modified"]) == (2, 2)
+    assert [(r["order_id"], r["matched"], r["modified"], r["previous_status"]) for r in body["results"]] == [
+        ("o3", True, True, "pending"), ("o1", False, False, "cancelled"), ("o0", True, True, "pending")
+    ]
+
+
+def test_filter_writes_skip_orders_changed_meanwhile():
+    # Between reading pending orders and writing, another request cancels one
+    storage = MemoryStorage(seed={"orders": [order(0, "pending"), order(1, "cancelled")]})
+    matched, modified = asyncio.run(storage.orders.bulk_update(
+        {"o0": {"status": "preparing"}, "o1": {"status": "preparing"}}, expected={"status": "pending"}
+    ))
+    assert (matched, modified) == (1, 1)
+    assert asyncio.run(storage.orders.get("o1"))["status"] == "cancelled"
+
+
+def test_invalid_status_rejected(client):
+    assert client.put("/api/orders/status", json={"updates": [{"order_id": "o0", "status": "lost"}]}).status_code == 400
+    assert client.put("/api/orders/status", json={"filter": {"status": "nope"}, "status": "ready"}).status_code == 400
+    assert client.put("/api/orders/status", json={"status": "ready"}).status_code == 400
+    assert asyncio.run(server.storage.orders.get("o0"))["status"] == "pending"
@@ -0,0 +1,64 @@
+# Test LRU + TTL response cache
+
+import sys
+from pathlib import Path
+
+# Add backend to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+import cache
+from cache import TTLCache, cached_body, etag_matches
+
+
+def test_lru_eviction_keeps_recently_used():
+    c = TTLCache(maxsize=2, ttl=60)
+    c.set("a", 1)
+    c.set("b", 2)
+    assert c.get("a") == 1
+    c.set("c", 3)
+    assert c.get("b") is None
+    assert c.get("a") == 1
+    assert c.get("c") == 3
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    c = TTLCache(maxsize=8, ttl=5)
+    c.set("a", 1)
+    now[0] += 4.9
+    assert c.get("a") == 1
+    now[0] += 0.2
+    assert c.get("a") is None
+    assert c.stats()["size"] == 0
+
+
+def test_stats_track_hits_and_misses():
+    c = TTLCache()
+    c.get("missing")
+    c.set("k", "v")
+    c.get("k")
+    stats = c.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_ratio"]) == (1, 1, 0.5)
+
+
+def test_fill_started_before_invalidation_is_dropped():
+    c = TTLCache(maxsize=4, ttl=60)
+    generation = c.generation
+    # An update clears the cache while the miss is still reading the old document
+    c.invalidate("p1")
+    assert c.set("p1", "stale", generation) is False
+    assert c.get("p1") is None
+    assert c.set("p1", "fresh", c.generation) is True
+    assert c.get("p1") == "fresh"
+
+
+def test_etag_matching():
+    entry = cached_body(b'{"a":1}')
+    assert entry.etag != cached_body(b'{"a":2}').etag
+    assert etag_matches(entry.etag, entry.etag)
+    assert etag_matches(f'"other", W/{entry.etag}', entry.etag)
+    assert etag_matches("*", entry.etag)
+    assert not etag_matches(None, entry.etag)
+    assert not etag_matches('"other"', entry.etag)
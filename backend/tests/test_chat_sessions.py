@@ -0,0 +1,74 @@
+# Test that chat session ids are issued by the server and only work for their holder
+
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Add backend to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+import server
+from ai_agents import AgentResponse
+from ai_agents.memory import SessionStore
+
+
+class EchoAgent:
+    # Records which session each turn ran in
+
+    def __init__(self):
+        self.sessions = SessionStore()
+        self.turns = []
+
+    async def execute(self, prompt, session_id=None):
+        self.turns.append((session_id, prompt))
+        if session_id:
+            self.sessions.get(session_id).add("user", prompt)
+        return AgentResponse(success=True, content=prompt)
+
+    def get_capabilities(self):
+        return ["conversation"]
+
+
+class FakeRegistry:
+
+    def __init__(self):
+        self.agent = EchoAgent()
+        self.agents = {"chat": self.agent}
+
+    async def get(self, name):
+        return self.agent
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(server, "agent_registry", FakeRegistry())
+    monkeypatch.setattr(server, "chat_sessions", server.TTLCache(maxsize=10, ttl=60))
+    return TestClient(server.app)
+
+
+def test_server_issues_session_ids(client):
+    assert client.post("/api/chat", json={"message": "hi"}).json()["session_id"] is None
+
+    first = client.post("/api/chat", json={"message": "I'm Sam", "new_session": True}).json()
+    session_id = first["session_id"]
+    assert len(session_id) >= 32
+    second = client.post("/api/chat", json={"message": "Who am I?", "session_id": session_id}).json()
+    assert second["session_id"] == session_id
+    assert server.agent_registry.agent.turns == [(None, "hi"), (session_id, "I'm Sam"), (session_id, "Who am I?")]
+
+
+def test_client_chosen_ids_are_refused(client):
+    response = client.post("/api/chat", json={"message": "hi", "session_id": "alice"})
+    assert response.status_code == 404
+    assert server.agent_registry.agent.turns == []
+    assert client.delete("/api/chat/sessions/alice").status_code == 404
+
+
+def test_ending_a_session_forgets_it(client):
+    session_id = client.post("/api/chat", json={"message": "hi", "new_session": True}).json()["session_id"]
+    assert client.delete(f"/api/chat/sessions/{session_id}").status_code == 200
+    assert server.agent_registry.agent.sessions.stats()["sessions"] == 0
+    assert client.post("/api/chat", json={"message": "again", "session_id": session_id}).status_code == 404
@@ -0,0 +1,85 @@
+# Test streaming order exports
+
+import asyncio
+import csv
+import io
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Add backend to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from export import ORDER_CSV_COLUMNS, naive_utc, ndjson_stream, orders_csv_stream
+from storage import MemoryRepository
+
+
+def order(i, status="pending"):
+    return {
+        "id": f"order-{i}", "customer_name": f"Customer {i}", "customer_email": "c@example.com",
+        "customer_phone": "555", "delivery_address": "1 Main St,\nApt 2", "delivery_notes": None,
+        "items": [{"product_id": "p", "product_name": 'Cake, "large"', "quantity": 2, "price": 30.0}],
+        "total_amount": 60.0, "status": status, "order_date": datetime(2024, 1, i),
+    }
+
+
+def collect(stream) -> bytes:
+    async def run():
+        return b"".join([chunk async for chunk in stream])
+    return asyncio.run(run())
+
+
+def repository():
+    repo = MemoryRepository("orders", "order_date", indexed_fields=("status",))
+    repo.seed([order(i, "delivered" if i % 2 else "pending") for i in range(1, 11)])
+    return repo
+
+
+def test_stream_is_oldest_first_within_window():
+    repo = repository()
+    body = collect(ndjson_stream(repo.stream({}, datetime(2024, 1, 3), datetime(2024, 1, 7), batch_size=2)))
+    rows = [json.loads(line) for line in body.decode().splitlines()]
+    assert [row["id"] for row in rows] == ["order-3", "order-4", "order-5", "order-6"]
+    assert rows[0]["order_date"] == "2024-01-03T00:00:00"
+
+
+def test_stream_applies_filters():
+    repo = repository()
+    body = collect(ndjson_stream(repo.stream({"status": "pending"}, batch_size=3)))
+    assert [json.loads(line)["id"] for line in body.decode().splitlines()] == [
+        "order-2", "order-4", "order-6", "order-8", "order-10",
+    ]
+
+
+def test_csv_round_trips_quoting_and_newlines():
+    repo = repository()
+    body = collect(orders_csv_stream(repo.stream({}, end=datetime(2024, 1, 3))))
+    rows = list(csv.DictReader(io.StringIO(body.decode())))
+    assert list(rows[0]) == ORDER_CSV_COLUMNS
+    assert len(rows) == 2
+    assert rows[0]["delivery_address"] == "1 Main St,\nApt 2"
+    assert rows[0]["items"] == '2 x Cake, "large" @ 30.0'
+    assert rows[0]["item_count"] == "2"
+    assert rows[0]["delivery_notes"] == ""
+
+
+def test_csv_neutralizes_formula_cells():
+    repo = MemoryRepository("orders", "order_date")
+    repo.seed([{**order(1), "customer_name": "=HYPERLINK(\"http://x\")", "delivery_address": "@SUM(A1)",
+                "delivery_notes": "-2+3", "special_instructions": "ring twice"}])
+    row = next(csv.DictReader(io.StringIO(collect(orders_csv_stream(repo.stream({}))).decode())))
+    assert row["customer_name"] == "'=HYPERLINK(\"http://x\")"
+    assert row["delivery_address"] == "'@SUM(A1)"
+    assert row["delivery_notes"] == "'-2+3"
+    assert row["special_instructions"] == "ring twice"
+    assert row["total_amount"] == "60.0"
+
+
+def test_aware_bounds_become_naive_utc():
+    repo = repository()
+    start = naive_utc(datetime(2024, 1, 9, 2, tzinfo=timezone(timedelta(hours=2))))
+    assert start == datetime(2024, 1, 9)
+    ids = [json.loads(line)["id"] for line in collect(ndjson_stream(repo.stream({}, start))).decode().splitlines()]
+    assert ids == ["order-9", "order-10"]
@@ -0,0 +1,45 @@
+# Test the agent path end to end against the offline fake LLM
+
+import asyncio
+import sys
+from pathlib import Path
+
+# Add backend and benchmarks to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+sys.path.insert(0, str(backend_dir / "benchmarks"))
+
+from ai_agents import AgentConfig, ChatAgent
+from fake_llm import FakeLLMConfig, serve_in_background
+
+
+def agent_for(fake_config, **config):
+    base_url = serve_in_background(fake_config)
+    return ChatAgent(AgentConfig(api_base_url=base_url, api_key="test", cache_ttl=0, **config))
+
+
+def test_execute_and_stream_through_openai_client():
+    fake = FakeLLMConfig(latency_ms=20, tokens_per_sec=0, reply_tokens=5)
+    agent = agent_for(fake)
+
+    async def run():
+        response = await agent.execute("What's fresh?")
+        events = [event async for event in agent.stream("And tomorrow?")]
+        return response, events
+
+    response, events = asyncio.run(run())
+    assert response.success and len(response.content.split()) == 5
+    assert [event["event"] for event in events] == ["token"] * 5 + ["done"]
+    assert events[-1]["data"]["time_to_first_token_ms"] >= 20
+    assert fake.stats == {"requests": 2, "errors": 0, "streams": 1}
+
+
+def test_injected_rate_limits_are_retried_then_reported(monkeypatch):
+    monkeypatch.setattr("ai_agents.agents.backoff_delay", lambda attempt: 0)
+    fake = FakeLLMConfig(latency_ms=0, tokens_per_sec=0, error_rate=1.0, error_status=429)
+    agent = agent_for(fake, max_retries=2)
+
+    response = asyncio.run(agent.execute("Busy?"))
+
+    assert not response.success
+    assert fake.stats["requests"] == 3
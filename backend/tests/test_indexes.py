@@ -0,0 +1,88 @@
+# Test declared index specs and drift reporting
+
+import asyncio
+import sys
+from pathlib import Path
+
+from bson import SON
+from pymongo.errors import OperationFailure
+
+# Add backend to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from indexes import INDEX_SPECS, _key_list, index_drift
+
+
+class FakeCollection:
+    # Just the two cursors index_drift reads, shaped like the server's replies
+
+    def __init__(self, indexes, ops=None, stats_error=False):
+        self.indexes = indexes
+        self.ops = ops or {}
+        self.stats_error = stats_error
+
+    async def list_indexes(self):
+        for index in self.indexes:
+            yield index
+
+    async def aggregate(self, pipeline):
+        if self.stats_error:
+            raise OperationFailure("not authorized on db to execute command $indexStats")
+        for index in self.indexes:
+            yield {"name": index["name"], "accesses": {"ops": self.ops.get(index["name"], 1), "since": None}}
+
+
+def server_indexes(collection):
+    # What list_indexes returns once ensure_indexes has run
+    indexes = [{"name": "_id_", "key": SON([("_id", 1)])}]
+    for model in INDEX_SPECS[collection]:
+        key = SON(model.document["key"])
+        if "text" in key.values():
+            key = SON([("_fts", "text"), ("_ftsx", 1)])
+        indexes.append({"name": model.document["name"], "key": key})
+    return indexes
+
+
+def test_key_list_normalizes_key_shapes():
+    assert _key_list(SON([("available", 1), ("created_at", -1)])) == [["available", 1], ["created_at", -1]]
+    assert _key_list([("available", 1), ("created_at", -1)]) == [["available", 1], ["created_at", -1]]
+    assert _key_list([("name", "text"), ("ingredients", "text")]) == _key_list({"_fts": "text", "_ftsx": 1})
+
+
+def test_storefront_default_query_has_a_sorting_index():
+    keys = {m.document["name"]: _key_list(m.document["key"]) for m in INDEX_SPECS["products"]}
+    assert keys["products_available_recent"] == [["available", 1], ["created_at", -1], ["id", -1]]
+
+
+def test_provisioned_indexes_report_no_drift():
+    db = {name: FakeCollection(server_indexes(name)) for name in INDEX_SPECS}
+    report = asyncio.run(index_drift(db))
+    for collection in INDEX_SPECS:
+        assert {k: report[collection][k] for k in ("missing", "mismatched", "undeclared", "unused")} == {
+            "missing": [], "mismatched": [], "undeclared": [], "unused": [],
+        }
+
+
+def test_drift_flags_missing_mismatched_undeclared_and_unused():
+    indexes = [index for index in server_indexes("orders") if index["name"] != "orders_recent"]
+    for index in indexes:
+        if index["name"] == "orders_status_recent":
+            index["key"] = SON([("status", 1), ("order_date", 1)])
+    indexes.append({"name": "legacy_email", "key": SON([("customer_email", 1)])})
+    db = {name: FakeCollection(server_indexes(name)) for name in INDEX_SPECS}
+    db["orders"] = FakeCollection(indexes, ops={"orders_id": 0})
+
+    report = asyncio.run(index_drift(db))["orders"]
+
+    assert report["missing"] == ["orders_recent"]
+    assert report["mismatched"] == ["orders_status_recent"]
+    assert report["undeclared"] == ["legacy_email"]
+    assert report["unused"] == ["orders_id"]
+
+
+def test_drift_without_index_stats_privilege():
+    db = {name: FakeCollection(server_indexes(name), stats_error=True) for name in INDEX_SPECS}
+    report = asyncio.run(index_drift(db))
+    assert report["products"]["usage"] == {}
+    assert report["products"]["missing"] == []
@@ -0,0 +1,166 @@
+# Test list routes served from projected documents via orjson
+
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Add backend to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+import server
+from serialization import trusted
+from storage import MemoryStorage
+
+BASE = datetime(2024, 1, 1, 12, 30, 15, 250000)
+
+# Written before delivery_notes, delivery_date and special_instructions existed
+LEGACY_ORDER = {"id": "o-legacy", "customer_name": "Old", "customer_email": "o@example.com", "customer_phone": "555",
+                "delivery_address": "1 Main St", "items": [], "total_amount": 5.0, "status": "delivered",
+                "order_date": BASE - timedelta(days=1)}
+
+
+def orders():
+    return [LEGACY_ORDER] + [
+        {**LEGACY_ORDER, "id": f"o{i}", "delivery_notes": "Ring twice", "delivery_date": None,
+         "special_instructions": None, "order_date": BASE + timedelta(minutes=i),
+         "items": [{"product_id": "p1", "product_name": "Tart", "quantity": 2, "price": 3.25}], "total_amount": 6.5}
+        for i in range(3)
+    ]
+
+
+def products():
+    # The first has no rating aggregates, as before they were maintained
+    return [{"id": f"p{i}", "name": f"Cake {i}", "description": "Sponge", "price": 12.5, "category": "cakes",
+             "image_url": "https://example.com/c.jpg", "available": True,
+             "created_at": BASE + timedelta(hours=i), "updated_at": BASE + timedelta(hours=i)} for i in range(3)]
+
+
+def reviews():
+    return [{"id": f"r{i}", "customer_name": "Ann", "rating": 5, "comment": "Lovely", "approved": True,
+             "created_at": BASE + timedelta(minutes=i)} for i in range(3)]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(server, "storage", MemoryStorage(seed={
+        "orders": orders(), "products": products(), "reviews": reviews(),
+        "status_checks": [{"id": "s1", "client_name": "probe", "timestamp": BASE}],
+    }))
+    server.invalidate_product_cache()
+    return TestClient(server.app)
+
+
+def validated(page_model, model, docs, next_cursor=None):
+    # What the model-per-row handlers returned through response_model
+    return page_model(items=[model(**doc) for doc in docs], next_cursor=next_cursor).model_dump(mode="json")
+
+
+def newest_first(docs, sort_field):
+    return sorted(docs, key=lambda doc: (doc[sort_field], doc["id"]), reverse=True)
+
+
+def test_trusted_fills_missing_defaults_like_the_model():
+    doc = dict(LEGACY_ORDER)
+    assert trusted(server.Order, [doc]) == [server.Order(**LEGACY_ORDER).model_dump()]
+
+
+def test_trusted_coerces_old_value_shapes_like_the_model():
+    # Written by hand or an older client: an int price and a string date
+    legacy = {**products()[0], "price": 12, "created_at": "2024-01-01T12:30:15"}
+    [doc] = trusted(server.Product, [dict(legacy)])
+    assert doc == server.Product(**legacy).model_dump()
+    assert type(doc["price"]) is float and doc["created_at"] == datetime(2024, 1, 1, 12, 30, 15)
+
+
+def test_trusted_drops_docs_the_model_would_refuse(caplog):
+    # No image_url (required), and a rating that isn't a number
+    broken = {k: v for k, v in products()[1].items() if k != "image_url"}
+    assert trusted(server.Product, [products()[0], broken]) == [server.Product(**products()[0]).model_dump()]
+    assert trusted(server.Review, [{**reviews()[0], "rating": "five"}]) == []
+    assert "p1" in caplog.text
+    # A projection that leaves the missing field out doesn't need it
+    assert trusted(server.Product, [dict(broken)], ("id", "name")) == [{"id": "p1", "name": "Cake 1"}]
+
+
+def test_legacy_doc_missing_a_required_field_is_left_out_of_the_page(client):
+    broken = {k: v for k, v in orders()[1].items() if k != "customer_phone"}
+    asyncio.run(server.storage.orders.insert({**broken, "id": "o-broken"}))
+    response = client.get("/api/orders")
+    assert response.status_code == 200
+    assert [order["id"] for order in response.json()["items"]] == ["o2", "o1", "o0", "o-legacy"]
+
+
+def test_find_page_projects_fields_plus_sort_key():
+    storage = MemoryStorage(seed={"products": products()})
+
+    async def run():
+        first, cursor = await storage.products.find_page({}, 2, fields=("id", "name"))
+        second, _ = await storage.products.find_page({}, 2, cursor, fields=("id", "name"))
+        return first, second
+
+    first, second = asyncio.run(run())
+    # The sort key comes back for the cursor
+    assert first == [{"id": "p2", "name": "Cake 2", "created_at": BASE + timedelta(hours=2)},
+                     {"id": "p1", "name": "Cake 1", "created_at": BASE + timedelta(hours=1)}]
+    assert [doc["id"] for doc in second] == ["p0"]
+
+
+@pytest.mark.parametrize("path,page_model,model,docs,sort_field", [
+    ("/api/orders", server.OrderPage, server.Order, orders, "order_date"),
+    ("/api/products", server.ProductPage, server.Product, products, "created_at"),
+    ("/api/reviews", server.ReviewPage, server.Review, reviews, "created_at"),
+])
+def test_list_routes_match_model_validated_output(client, path, page_model, model, docs, sort_field):
+    expected = newest_first(docs(), sort_field)
+    first = client.get(path, params={"limit": 2}).json()
+    assert first["items"] == validated(page_model, model, expected[:2])["items"]
+    rest = client.get(path, params={"limit": 2, "cursor": first["next_cursor"]}).json()
+    assert rest == validated(page_model, model, expected[2:4])
+
+
+@pytest.mark.parametrize("path,params", [
+    ("/api/products/top-rated", {"min_reviews": 0}),
+    ("/api/products/search", {"q": "cake"}),
+])
+def test_ranked_product_routes_match_model_validated_output(client, path, params):
+    # Includes one written with an int price, which the model sends as a float
+    legacy = {**products()[0], "id": "p-int", "name": "Cake int", "price": 12}
+    asyncio.run(server.storage.products.insert(legacy))
+    server.invalidate_product_cache()
+    body = client.get(path, params=params).json()
+    stored = {doc["id"]: doc for doc in server.storage.products.all()}
+    assert sorted(row["id"] for row in body) == sorted(stored)
+    assert body == [server.Product(**stored[row["id"]]).model_dump(mode="json") for row in body]
+
+
+def test_status_checks_page_newest_first_without_a_silent_cap(client):
+    server.storage.status_checks.seed(
+        {"id": f"s{i}", "client_name": "probe", "timestamp": BASE + timedelta(seconds=i)} for i in range(2, 5)
+    )
+    seen, cursor = [], None
+    while True:
+        page = client.get("/api/status", params={"limit": 3, **({"cursor": cursor} if cursor else {})}).json()
+        seen += page["items"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert [check["id"] for check in seen] == ["s4", "s3", "s2", "s1"]
+    assert seen[-1] == server.StatusCheck(id="s1", client_name="probe", timestamp=BASE).model_dump(mode="json")
+    assert client.get("/api/status", params={"cursor": "bogus"}).status_code == 400
+
+
+def test_list_routes_document_the_schema_they_bypass():
+    # The body is written by the route, so the page model is documented rather than validated
+    paths = server.app.openapi()["paths"]
+    for path in ("/api/status", "/api/products", "/api/products/top-rated", "/api/products/search", "/api/orders", "/api/reviews"):
+        schema = paths[path]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+        assert "$ref" in schema or "anyOf" in schema or schema.get("type") == "array"
+    routes = {route.path: route for route in server.app.routes if "GET" in getattr(route, "methods", ())}
+    for path in ("/api/status", "/api/orders", "/api/reviews"):
+        assert routes[path].response_model is None
+        assert routes[path].response_class is server.ORJSONResponse
@@ -0,0 +1,125 @@
+# Test the live order feed over the in-memory change bus
+
+import asyncio
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Add backend to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from live import LiveFeed
+from storage import MemoryStorage
+
+
+def order(order_id, status="pending"):
+    return {"id": order_id, "status": status, "order_date": datetime(2024, 1, 1)}
+
+
+async def collect(listener, count):
+    changes = []
+    while len(changes) < count:
+        change = await asyncio.wait_for(listener.__anext__(), 1)
+        if change is not None:
+            changes.append(change)
+    return changes
+
+
+def test_inserts_and_updates_reach_listeners():
+    async def run():
+        storage = MemoryStorage()
+        feed = LiveFeed()
+        feed.start(storage.watch_orders)
+        await asyncio.sleep(0)
+        listener = feed.listen()
+        pending = asyncio.ensure_future(collect(listener, 2))
+        await asyncio.sleep(0)
+
+        await storage.orders.insert(order("o1"))
+        await storage.orders.update("o1", {"status": "confirmed"})
+        changes = await pending
+        await listener.aclose()
+        await feed.close()
+        return [(c.op, c.doc["status"]) for c in changes], feed.stats()["clients"]
+
+    changes, clients = asyncio.run(run())
+    assert changes == [("insert", "pending"), ("update", "confirmed")]
+    assert clients == 0
+
+
+def test_reconnect_replays_from_last_event_id_or_resets():
+    async def run():
+        storage = MemoryStorage()
+        feed = LiveFeed(history=3)
+        feed.start(storage.watch_orders)
+        await asyncio.sleep(0)
+        for i in range(5):
+            await storage.orders.insert(order(f"o{i}"))
+        await asyncio.sleep(0)
+        tokens = [c.token for c in feed._history]
+
+        resumed = await collect(feed.listen(tokens[0]), 2)
+        reset = await collect(feed.listen("gone-1"), 1)
+        await feed.close()
+        return [c.doc["id"] for c in resumed], reset[0].op
+
+    resumed, reset = asyncio.run(run())
+    assert resumed == ["o3", "o4"]
+    assert reset == "reset"
+
+
+def test_slow_client_is_cut_off_after_draining_its_queue():
+    async def run():
+        storage = MemoryStorage()
+        feed = LiveFeed(queue_size=2)
+        feed.start(storage.watch_orders)
+        listener = feed.listen()
+        first = asyncio.ensure_future(collect(listener, 1))
+        await asyncio.sleep(0)
+
+        for i in range(4):
+            await storage.orders.insert(order(f"o{i}"))
+            await asyncio.sleep(0)
+        received = [c.doc["id"] for c in await first]
+        async for change in listener:
+            received.append(change.doc["id"])
+        await feed.close()
+        return received, feed.stats()["lagged"]
+
+    received, lagged = asyncio.run(run())
+    assert received == ["o0", "o1", "o2"]
+    assert lagged == 1
+
+
+def test_lost_source_history_resets_clients():
+    async def run():
+        storage = MemoryStorage()
+        feed = LiveFeed(retry_delay=0.01)
+        feed.start(storage.watch_orders)
+        await asyncio.sleep(0)
+        await storage.orders.insert(order("o1"))
+        await asyncio.sleep(0)
+        before = feed._history[-1].token
+        listener = feed.listen()
+        pending = asyncio.ensure_future(collect(listener, 2))
+        await asyncio.sleep(0)
+
+        # The watcher drops and o2 lands while it is gone, as when the oplog rolls past its token
+        await feed.close()
+        await storage.orders.insert(order("o2"))
+        feed.start(storage.watch_orders)
+        await asyncio.sleep(0)
+        await storage.orders.insert(order("o3"))
+
+        changes = await pending
+        stale = await collect(feed.listen(before), 1)
+        await listener.aclose()
+        await feed.close()
+        return [(c.op, c.doc.get("id")) for c in changes], stale[0].op, feed.stats()["resets"]
+
+    changes, stale, resets = asyncio.run(run())
+    assert changes == [("reset", None), ("insert", "o3")]
+    # Event ids from before the gap can't be replayed from any more
+    assert stale == "reset"
+    assert resets == 1
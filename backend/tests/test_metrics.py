@@ -0,0 +1,76 @@
+# Test the metrics primitives and the agent/storage instrumentation feeding them
+
+import asyncio
+import sys
+from pathlib import Path
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+
+# Add backend to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from ai_agents import AgentConfig, ChatAgent
+from metrics import MONGO_ERRORS, MONGO_LATENCY, Counter, Histogram, MetricsRegistry, cache_metrics, timed
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("latency_seconds", "Latency", ["route"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, "/a")
+
+    lines = histogram.render()
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 2' in lines
+    assert 'latency_seconds_bucket{route="/a",le="1"} 3' in lines
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 4' in lines
+    assert 'latency_seconds_count{route="/a"} 4' in lines
+    assert histogram.count("/a") == 4
+
+
+def test_registry_renders_metrics_and_collectors():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests", ["status"])
+    requests.inc("200")
+    requests.inc("200")
+    registry.collector(lambda: cache_metrics({"products": {"hits": 3, "misses": 1, "hit_ratio": 0.75, "size": 2}}))
+
+    text = registry.render()
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{status="200"} 2' in text
+    assert 'cache_hit_ratio{cache="products"} 0.75' in text
+    assert isinstance(requests, Counter)
+
+
+def test_agent_reports_each_upstream_call():
+    calls = []
+    agent = ChatAgent(AgentConfig(api_key="test", cache_ttl=0))
+    agent.llm = GenericFakeChatModel(messages=iter(["Fresh daily"]))
+    agent.observer = calls.append
+
+    response = asyncio.run(agent.execute("Fresh?", use_tools=False))
+    assert response.success
+    assert [(call.mode, call.outcome) for call in calls] == [("invoke", "ok")]
+    assert calls[0].model == agent.config.model_name and calls[0].seconds >= 0
+
+
+def test_timed_operations_record_latency_and_errors():
+    class Repository:
+        name = "timed_orders"
+
+        @timed("get")
+        async def get(self, fail=False):
+            if fail:
+                raise RuntimeError("boom")
+            return {"id": "o1"}
+
+    async def run():
+        repository = Repository()
+        await repository.get()
+        try:
+            await repository.get(fail=True)
+        except RuntimeError:
+            pass
+
+    asyncio.run(run())
+    assert MONGO_LATENCY.count("timed_orders", "get") == 2
+    assert MONGO_ERRORS.value("timed_orders", "get") == 1
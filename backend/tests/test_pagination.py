@@ -0,0 +1,51 @@
+# Test keyset pagination helpers
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+# Add backend to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from pagination import (
+    InvalidCursor, build_page, decode_cursor, encode_cursor, keyset_query,
+)
+
+
+def make_docs(count):
+    # Pairs share a timestamp so the id tie-breaker matters
+    base = datetime(2024, 1, 1)
+    return [
+        {"id": f"doc_{i:03d}", "created_at": base + timedelta(minutes=i // 2)}
+        for i in range(count)
+    ]
+
+
+def test_cursor_round_trip():
+    ts = datetime(2024, 5, 6, 7, 8, 9, 123000)
+    assert decode_cursor(encode_cursor(ts, "abc")) == (ts, "abc")
+
+
+def test_invalid_cursor_rejected():
+    with pytest.raises(InvalidCursor):
+        decode_cursor("not-a-cursor")
+
+
+def test_keyset_query_merges_filter():
+    ts = datetime(2024, 1, 1)
+    query = keyset_query({"status": "pending"}, "order_date", encode_cursor(ts, "x"))
+    assert query["$and"][0] == {"status": "pending"}
+    assert query["$and"][1]["$or"][1] == {"order_date": ts, "id": {"$lt": "x"}}
+    assert keyset_query({"status": "pending"}, "order_date", None) == {"status": "pending"}
+
+
+def test_build_page_only_sets_cursor_when_more_rows():
+    docs = make_docs(3)
+    assert build_page(docs, "created_at", 3) == (docs, None)
+    page, cursor = build_page(docs, "created_at", 2)
+    assert page == docs[:2]
+    assert decode_cursor(cursor) == (docs[1]["created_at"], docs[1]["id"])
+
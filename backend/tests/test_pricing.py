@@ -0,0 +1,85 @@
+# Test server-side order pricing
+
+import asyncio
+import sys
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add backend to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from pricing import PriceIndex, PricingError, price_items, to_money
+from storage import MemoryRepository
+
+
+def product(product_id, price, available=True):
+    return {"id": product_id, "name": product_id.title(), "price": price, "available": available,
+            "created_at": datetime(2024, 1, 1)}
+
+
+def item(product_id, quantity):
+    return SimpleNamespace(product_id=product_id, quantity=quantity)
+
+
+def test_totals_use_catalog_prices_in_decimal():
+    index = PriceIndex()
+    entries = {"scone": index.upsert(product("scone", 0.1)), "tart": index.upsert(product("tart", 0.2))}
+
+    priced, total = price_items([item("scone", 3), item("tart", 1)], entries)
+
+    # Float math would give 0.5000000000000001
+    assert total == Decimal("0.5")
+    assert to_money(total) == 0.5
+    assert priced[0] == {"product_id": "scone", "product_name": "Scone", "quantity": 3, "price": 0.1}
+
+
+def test_unknown_and_unavailable_products_rejected():
+    index = PriceIndex()
+    entries = {"pie": index.upsert(product("pie", 12, available=False))}
+    with pytest.raises(PricingError) as excinfo:
+        price_items([item("pie", 1), item("ghost", 1), item("ghost", 2)], entries)
+    assert excinfo.value.unknown == ["ghost"]
+    assert excinfo.value.unavailable == ["pie"]
+
+
+def test_resolve_fetches_only_misses():
+    class CountingRepository(MemoryRepository):
+        calls = []
+
+        async def get_many(self, doc_ids):
+            self.calls.append(sorted(doc_ids))
+            return await super().get_many(doc_ids)
+
+    repo = CountingRepository("products", "created_at")
+    repo.seed([product("cake", 30), product("bun", 2)])
+    index = PriceIndex()
+    index.upsert(product("cake", 30))
+
+    entries = asyncio.run(index.resolve(repo, ["cake", "bun", "bun", "nope"]))
+
+    assert set(entries) == {"cake", "bun"}
+    assert repo.calls == [["bun", "nope"]]
+
+
+def test_resolve_does_not_overwrite_a_concurrent_update():
+    index = PriceIndex()
+
+    class SlowRepository(MemoryRepository):
+        async def get_many(self, doc_ids):
+            docs = await super().get_many(doc_ids)
+            # update_product lands while this read is in flight
+            index.upsert(product("cake", 35))
+            return docs
+
+    repo = SlowRepository("products", "created_at")
+    repo.seed([product("cake", 30)])
+
+    entries = asyncio.run(index.resolve(repo, ["cake"]))
+
+    assert entries["cake"].price == Decimal("35")
+    assert asyncio.run(index.resolve(repo, ["cake"]))["cake"].price == Decimal("35")
@@ -0,0 +1,118 @@
+# Test opt-in request profiling
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add backend to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+import pytest
+from starlette.responses import StreamingResponse
+
+import profiling
+from profiling import ProfileStore, ProfilingMiddleware
+
+
+def spin(seconds):
+    # Holds the event loop like a slow serialization loop would
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+async def slow_app(scope, receive, send):
+    spin(0.08)
+    await asyncio.sleep(0.05)
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+async def streaming_app(scope, receive, send):
+    # StreamingResponse iterates the body in an anyio child task, as the export and SSE routes do
+    async def chunks():
+        spin(0.08)
+        yield b"a"
+        await asyncio.sleep(0.05)
+        yield b"b"
+
+    await StreamingResponse(chunks())(scope, receive, send)
+
+
+def request(middleware, headers=(), query=b""):
+    sent = []
+    received = []
+
+    async def receive():
+        # The body, then nothing until the response is done (StreamingResponse listens for a disconnect)
+        if received:
+            await asyncio.Event().wait()
+        received.append(True)
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/api/products", "query_string": query,
+             "headers": [(k.encode(), v.encode()) for k, v in headers]}
+    asyncio.run(middleware(scope, receive, send))
+    return dict(sent[0]["headers"])
+
+
+def middleware(store, app=slow_app):
+    return ProfilingMiddleware(app, authorize=lambda headers: headers.get("x-admin-token") == "secret",
+                               store=store, interval_ms=2, block_ms=40)
+
+
+def test_profiles_only_authorized_flagged_requests():
+    store = ProfileStore(maxlen=2)
+    app = middleware(store)
+
+    assert b"x-profile-id" not in request(app, [("x-profile", "1")])
+    assert b"x-profile-id" not in request(app, [("x-admin-token", "secret")])
+    assert store.summaries() == []
+
+    headers = request(app, [("x-admin-token", "secret")], query=b"profile=1")
+    profile = store.get(headers[b"x-profile-id"].decode())
+    assert profile["status"] == 200 and profile["path"] == "/api/products"
+
+
+def test_profile_captures_stacks_idle_time_and_blocking():
+    store = ProfileStore()
+    headers = request(middleware(store), [("x-admin-token", "secret"), ("x-profile", "1")])
+    profile = store.get(headers[b"x-profile-id"].decode())
+
+    assert profile["samples"]["request"] > 0 and profile["samples"]["idle"] > 0
+    assert "spin (tests/test_profiling.py" in profile["collapsed"]
+    assert profile["collapsed"].splitlines()[0].rsplit(" ", 1)[1].isdigit()
+    assert profile["blocking"] and profile["blocking"][0]["duration_ms"] >= 40
+    assert "spin" in profile["blocking"][0]["stack"]
+    assert "collapsed" not in store.summaries()[0]
+
+
+def test_profile_without_private_task_map(monkeypatch):
+    # Later Pythons may not expose asyncio.tasks._current_tasks
+    monkeypatch.setattr(profiling, "_CURRENT_TASKS", None)
+    store = ProfileStore()
+    headers = request(middleware(store), [("x-admin-token", "secret"), ("x-profile", "1")])
+    profile = store.get(headers[b"x-profile-id"].decode())
+
+    assert profile["samples"]["request"] > 0 and profile["samples"]["idle"] > 0
+    assert "spin (tests/test_profiling.py" in profile["collapsed"]
+    assert profile["blocking"] and profile["blocking"][0]["duration_ms"] >= 40
+
+
+@pytest.mark.parametrize("private_task_map", [True, False])
+def test_streaming_body_work_counts_as_the_request(monkeypatch, private_task_map):
+    if not private_task_map:
+        monkeypatch.setattr(profiling, "_CURRENT_TASKS", None)
+    store = ProfileStore()
+    headers = request(middleware(store, streaming_app), [("x-admin-token", "secret"), ("x-profile", "1")])
+    profile = store.get(headers[b"x-profile-id"].decode())
+
+    assert profile["status"] == 200
+    assert profile["samples"]["request"] > profile["samples"]["other"]
+    assert "spin (tests/test_profiling.py" in profile["collapsed"]
+    assert profile["blocking"] and profile["blocking"][0]["request_share"] > 0.5
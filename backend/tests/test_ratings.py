@@ -0,0 +1,66 @@
+# Test incremental product rating aggregates
+
+import asyncio
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Add backend to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from ratings import applied_rating, empty_ratings, ratings_from_reviews
+from storage import MemoryStorage
+
+
+def product(product_id, category="cakes", available=True):
+    return {"id": product_id, "name": product_id, "category": category, "available": available,
+            "created_at": datetime(2024, 1, 1)}
+
+
+def review(review_id, product_id, rating, approved=True):
+    return {"id": review_id, "product_id": product_id, "rating": rating, "approved": approved,
+            "created_at": datetime(2024, 1, 2)}
+
+
+def test_incremental_updates_match_a_full_recount():
+    reviews = [review("r1", "p", 5), review("r2", "p", 4), review("r3", "p", 4), review("r4", "p", 1, approved=False)]
+
+    fields = empty_ratings()
+    for r in reviews[:3]:
+        fields.update(applied_rating(fields, r["rating"], 1))
+    fields.update(applied_rating(fields, 5, -1))
+
+    expected = ratings_from_reviews(reviews[1:])["p"]
+    assert fields == expected
+    assert expected["avg_rating"] == 4.0
+    assert expected["rating_histogram"] == {"1": 0, "2": 0, "3": 0, "4": 2, "5": 0}
+
+
+def test_top_rated_follows_rating_changes():
+    storage = MemoryStorage(seed={"products": [product("a"), product("b"), product("c", available=False)]})
+
+    async def run():
+        await storage.apply_rating("a", 4, 1)
+        await storage.apply_rating("b", 5, 1)
+        await storage.apply_rating("c", 5, 1)
+        first = await storage.products.top({"available": True, "review_count": {"$gte": 1}}, 10)
+        await storage.apply_rating("b", 5, -1)
+        second = await storage.products.top({"available": True, "review_count": {"$gte": 1}}, 10)
+        return [p["id"] for p in first], [p["id"] for p in second]
+
+    assert asyncio.run(run()) == (["b", "a"], ["a"])
+
+
+def test_rebuild_backfills_products_without_aggregates():
+    storage = MemoryStorage(seed={
+        "products": [product("a"), product("b")],
+        "reviews": [review("r1", "a", 3), review("r2", "a", 5), review("r3", "b", 2, approved=False)],
+    })
+
+    corrected = asyncio.run(storage.rebuild_ratings())
+    a = asyncio.run(storage.products.get("a"))
+
+    assert corrected == 1
+    assert (a["avg_rating"], a["review_count"]) == (4.0, 2)
+    assert asyncio.run(storage.rebuild_ratings()) == 0
@@ -0,0 +1,66 @@
+# Test the in-memory BM25 product search
+
+import asyncio
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Add backend to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from search import PRODUCT_SEARCH_WEIGHTS, InvertedIndex, normalize_allergens, tokenize
+from storage import MemoryStorage
+
+
+def product(product_id, name, description="", ingredients=(), allergens=(), available=True):
+    return {"id": product_id, "name": name, "description": description, "ingredients": list(ingredients),
+            "allergens": list(allergens), "category": "cakes", "available": available,
+            "created_at": datetime(2024, 1, 1)}
+
+
+CATALOG = [
+    product("brownie", "Chocolate Brownie", "Fudgy and rich", ["chocolate", "butter", "flour"], ["gluten", "dairy"]),
+    product("torte", "Flourless Torte", "Gluten free chocolate cake", ["chocolate", "almonds", "eggs"], ["nuts", "eggs"]),
+    product("loaf", "Banana Loaf", "Moist loaf with a hint of chocolate", ["banana", "flour"], ["gluten"]),
+    product("hidden", "Chocolate Cookies", "Baked daily", ["chocolate"], [], available=False),
+]
+
+
+def test_tokenize_drops_stopwords_and_stems_plurals():
+    assert tokenize("The Cookies and Berries, with Glass!") == ["cooky", "berry", "glass"]
+    assert tokenize("cookie berry") == tokenize("cookies berries")
+
+
+def test_name_matches_outrank_description_matches():
+    index = InvertedIndex(PRODUCT_SEARCH_WEIGHTS)
+    for doc in CATALOG[:3]:
+        index.add(doc)
+
+    ranked = [doc_id for doc_id, _ in index.search("chocolate")]
+    assert ranked[0] == "brownie"
+    assert ranked[-1] == "loaf"
+
+    index.remove("brownie")
+    assert [doc_id for doc_id, _ in index.search("fudgy")] == []
+
+
+def test_search_applies_filters_and_allergen_exclusion():
+    storage = MemoryStorage(seed={"products": CATALOG})
+
+    async def run():
+        everything = await storage.products.search("chocolate", {"available": True}, 10)
+        no_gluten = await storage.products.search("chocolate", {"available": True}, 10,
+                                                  exclude={"allergens": normalize_allergens(["Gluten"])})
+        await storage.products.update("torte", {"name": "Almond Torte"})
+        renamed = await storage.products.search("flourless", {}, 10)
+        return [p["id"] for p in everything], [p["id"] for p in no_gluten], renamed
+
+    everything, no_gluten, renamed = asyncio.run(run())
+    assert "hidden" not in everything and set(everything) == {"brownie", "torte", "loaf"}
+    assert no_gluten == ["torte"]
+    assert renamed == []
+
+
+def test_normalize_allergens_splits_and_dedupes():
+    assert normalize_allergens(["nuts, Gluten", "gluten", ""]) == ["nuts", "gluten"]
@@ -0,0 +1,44 @@
+# Test view=summary / fields= selection for list routes
+
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+import pytest
+from pydantic import BaseModel, Field
+
+# Add backend to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from serialization import InvalidFields, requested_fields, trusted
+
+
+class Item(BaseModel):
+    id: str
+    name: str
+    price: float
+    tags: List[str] = Field(default_factory=list)
+    notes: Optional[str] = None
+    created_at: datetime
+
+
+class ItemSummary(BaseModel):
+    id: str
+    name: str
+    price: float
+
+
+def test_requested_fields_picks_view_or_explicit_subset():
+    assert requested_fields(Item, ItemSummary, "full") == ("id", "name", "price", "tags", "notes", "created_at")
+    assert requested_fields(Item, ItemSummary, "summary") == ("id", "name", "price")
+    assert requested_fields(Item, ItemSummary, "full", " price, name,price") == ("id", "price", "name")
+    with pytest.raises(InvalidFields):
+        requested_fields(Item, ItemSummary, "full", "name,secret")
+
+
+def test_trusted_trims_to_selection():
+    # Projections also return the sort key; only the selected fields are encoded
+    doc = {"id": "a", "name": "Loaf", "created_at": datetime(2024, 1, 1)}
+    assert trusted(Item, [doc], ("id", "name", "tags")) == [{"id": "a", "name": "Loaf", "tags": []}]
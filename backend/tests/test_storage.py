@@ -0,0 +1,115 @@
+# Test indexed in-memory storage backend
+
+import asyncio
+import random
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add backend to Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from pagination import LEGACY_SORT_VALUE
+from storage import MemoryRepository, MemoryStorage
+
+
+def make_orders(count):
+    # Pairs share a timestamp so the id tie-breaker matters
+    base = datetime(2024, 1, 1)
+    statuses = ["pending", "ready", "delivered"]
+    orders = [
+        {"id": f"o{i:03d}", "status": statuses[i % 3], "order_date": base + timedelta(minutes=i // 2)}
+        for i in range(count)
+    ]
+    random.Random(7).shuffle(orders)
+    return orders
+
+
+def newest_first(docs):
+    return [d["id"] for d in sorted(docs, key=lambda d: (d["order_date"], d["id"]), reverse=True)]
+
+
+async def collect_pages(repo, filters, limit):
+    seen, cursor = [], None
+    while True:
+        page, cursor = await repo.find_page(filters, limit, cursor)
+        seen.extend(d["id"] for d in page)
+        if cursor is None:
+            return seen
+
+
+def test_pages_cover_every_row_once_in_order():
+    orders = make_orders(25)
+    repo = MemoryRepository("orders", "order_date", ["status"])
+    repo.seed(orders)
+
+    assert asyncio.run(collect_pages(repo, {}, 4)) == newest_first(orders)
+    pending = [o for o in orders if o["status"] == "pending"]
+    assert asyncio.run(collect_pages(repo, {"status": "pending"}, 3)) == newest_first(pending)
+
+
+def test_documents_without_sort_field_are_backfilled_and_paged_last():
+    # seed_data.py used to write products with no created_at
+    orders = make_orders(5) + [{"id": "legacy", "status": "pending"}, {"id": "legacy_null", "order_date": None}]
+    repo = MemoryRepository("orders", "order_date", ["status"])
+    repo.seed(orders)
+
+    seen = asyncio.run(collect_pages(repo, {}, 2))
+    assert seen[-2:] == ["legacy_null", "legacy"]
+    assert len(seen) == 7
+    assert asyncio.run(repo.get("legacy"))["order_date"] == LEGACY_SORT_VALUE
+
+
+def test_update_and_delete_keep_indexes_consistent():
+    async def scenario():
+        repo = MemoryRepository("orders", "order_date", ["status"])
+        repo.seed(make_orders(9))
+
+        previous = await repo.update("o000", {"status": "ready"})
+        assert previous["status"] == "pending"
+        assert (await repo.get("o000"))["status"] == "ready"
+        assert "o000" not in await collect_pages(repo, {"status": "pending"}, 2)
+        assert "o000" in await collect_pages(repo, {"status": "ready"}, 2)
+
+        deleted = await repo.delete("o001")
+        assert deleted["id"] == "o001"
+        assert await repo.get("o001") is None
+        assert await repo.count({}) == 8
+        assert await repo.count({"status": "ready"}) == 3
+
+        assert await repo.update("missing", {"status": "ready"}) is None
+        assert await repo.delete("missing") is None
+
+    asyncio.run(scenario())
+
+
+def test_returned_documents_are_copies():
+    async def scenario():
+        repo = MemoryRepository("orders", "order_date", ["status"])
+        repo.seed(make_orders(1))
+        doc = await repo.get("o000")
+        doc["status"] = "tampered"
+        assert (await repo.get("o000"))["status"] == "pending"
+
+    asyncio.run(scenario())
+
+
+def test_memory_storage_counters_and_activity():
+    async def scenario():
+        base = datetime(2024, 1, 1)
+        reviews = [
+            {"id": f"r{i}", "approved": i == 0, "created_at": base + timedelta(minutes=i)}
+            for i in range(3)
+        ]
+        storage = MemoryStorage(seed={"reviews": reviews})
+        assert (await storage.read_counters())["total_reviews"] == 3
+
+        await storage.bump_counters(total_reviews=5)
+        result = await storage.reconcile_counters()
+        assert result["drift"] == {"total_reviews": -5}
+
+        activity = await storage.recent_activity()
+        assert [r["id"] for r in activity["pending_reviews"]] == ["r2", "r1"]
+
+    asyncio.run(scenario())
@@ -29,6 +29,22 @@ import AdminLogin from './AdminLogin';
 const API_BASE = process.env.REACT_APP_API_URL || 'http://localhost:8000';
 const API = `${API_BASE}/api`;
 
+// List routes are keyset-paginated; follow next_cursor so the dashboard sees every row
+const PAGE_SIZE = 500;
+
+const fetchAllPages = async (path, params = {}) => {
+  const items = [];
+  let cursor = null;
+  do {
+    const response = await axios.get(`${API}${path}`, {
+      params: { ...params, limit: PAGE_SIZE, ...(cursor ? { cursor } : {}) }
+    });
+    items.push(...response.data.items);
+    cursor = response.data.next_cursor;
+  } while (cursor);
+  return items;
+};
+
 const AdminDashboard = () => {
   const [isAuthenticated, setIsAuthenticated] = useState(false);
   const [adminToken, setAdminToken] = useState(null);
@@ -103,16 +119,13 @@ const AdminDashboard = () => {
       });
 
       // Load products
-      const productsResponse = await axios.get(`${API}/products?available_only=false`);
-      setProducts(productsResponse.data);
+      setProducts(await fetchAllPages('/products', { available_only: false }));
 
       // Load orders
-      const ordersResponse = await axios.get(`${API}/orders`);
-      setOrders(ordersResponse.data);
+      setOrders(await fetchAllPages('/orders'));
 
       // Load all reviews (approved and pending)
-      const reviewsResponse = await axios.get(`${API}/reviews?approved_only=false`);
-      setReviews(reviewsResponse.data);
+      setReviews(await fetchAllPages('/reviews', { approved_only: false }));
 
     } catch (error) {
       console.error('Error loading dashboard data:', error);
@@ -114,7 +114,7 @@ const HomePage = () => {
     try {
       // Fetch approved reviews from backend API
       const response = await axios.get(`${API}/reviews?approved_only=true`);
-      setReviews(response.data);
+      setReviews(response.data.items);
     } catch (error) {
       console.error('Error fetching reviews:', error);
       // Fallback to mock data if API fails
@@ -29,7 +29,7 @@ def test_review_approval_integration():
     # Step 2: Get unapproved reviews
     response = requests.get(f"{API_BASE}/reviews?approved_only=false")
     if response.status_code == 200:
-        all_reviews = response.json()
+        all_reviews = response.json()["items"]
         unapproved = [r for r in all_reviews if not r['approved']]
         print(f"✅ Found {len(unapproved)} unapproved reviews")
     else: